@@ -0,0 +1 @@
+"""Microbenchmarks for per-request hot paths."""
@@ -0,0 +1,143 @@
+#benchmarks/claim_partitions.py
+
+"""
+Claim throughput with and without claim partitions (db/migrations/007_claim_buckets.sql).
+
+    python benchmarks/claim_partitions.py postgresql://postgres@localhost:5432/equeue_test
+
+Migrates a throwaway schema, loads one queue with queued jobs and drains it with N
+concurrent claimers, each on its own connection. Unpartitioned claimers all read the
+head of jobs_runnable_idx and skip each other's locked rows; partitioned ones claim
+from their own buckets (equeue.worker.partitions) and only then from the whole queue.
+Reports jobs claimed per second and claim latency percentiles.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Any, List, Optional
+
+from equeue.db.migrate import MigrationRunner, load_migrations
+from equeue.worker.partitions import PartitionAssignment
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "db" / "migrations"
+
+CLAIM_SQL = """
+    WITH candidates AS (
+        SELECT id
+        FROM jobs
+        WHERE queue = 'default'
+            AND status = 'queued'
+            AND run_at <= $1
+            {in_bucket}
+        ORDER BY run_at, priority DESC, created_at, id
+        LIMIT $2
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE jobs AS j
+    SET status = 'running', locked_by = $3, locked_until = $1 + interval '30 seconds',
+        attempts = j.attempts + 1, updated_at = $1
+    FROM candidates AS c
+    WHERE j.id = c.id
+    RETURNING j.id
+"""
+
+
+async def _claimer(pool: Any, worker_id: str, members: list[str] | None, *, batch: int, per_claim: int) -> list[float]:
+    assignment = None
+    if members is not None:
+        assignment = PartitionAssignment(worker_id)
+        assignment.update(members)
+    any_bucket = CLAIM_SQL.format(in_bucket="")
+    one_bucket = CLAIM_SQL.format(in_bucket="AND claim_bucket = $4")
+
+    latencies: list[float] = []
+    async with pool.acquire() as conn:
+        while True:
+            start = perf_counter()
+            claimed = 0
+            now = datetime.now(timezone.utc)
+            for bucket in assignment.rotation(per_claim) if assignment is not None else []:
+                claimed += len(await conn.fetch(one_bucket, now, batch - claimed, worker_id, bucket))
+                if claimed >= batch:
+                    break
+            if claimed < batch:
+                claimed += len(await conn.fetch(any_bucket, now, batch - claimed, worker_id))
+            latencies.append(perf_counter() - start)
+            if claimed == 0:
+                return latencies
+
+
+async def run_variant(dsn: str, *, partitioned: bool, jobs: int, claimers: int, batch: int, per_claim: int) -> dict[str, Any]:
+    import asyncpg
+
+    schema = f"bench_claim_{uuid.uuid4().hex[:8]}"
+    admin = await asyncpg.connect(dsn)
+    await admin.execute(f"CREATE SCHEMA {schema}")
+    settings = {"search_path": f"{schema},public"}
+    pool = await asyncpg.create_pool(dsn, min_size=claimers, max_size=claimers, server_settings=settings)
+    try:
+        async with pool.acquire() as conn:
+            await MigrationRunner(conn).run(load_migrations(MIGRATIONS_DIR))
+            await conn.execute(
+                """
+                INSERT INTO jobs (task_name, status, queue, payload, run_at, created_by)
+                SELECT 'bench.task', 'queued', 'default', '{}'::jsonb, now() - interval '1 second', 'bench'
+                FROM generate_series(1, $1)
+                """,
+                jobs,
+            )
+            await conn.execute("ANALYZE jobs")
+
+        members = [f"w{i}" for i in range(claimers)] if partitioned else None
+        start = perf_counter()
+        results = await asyncio.gather(*(
+            _claimer(pool, f"w{i}", members, batch=batch, per_claim=per_claim) for i in range(claimers)
+        ))
+        elapsed = perf_counter() - start
+
+        latencies = sorted(t for r in results for t in r)
+        return {
+            "variant": "partitioned" if partitioned else "unpartitioned",
+            "jobs_per_s": jobs / elapsed,
+            "p50_ms": 1000 * statistics.median(latencies),
+            "p99_ms": 1000 * latencies[int(0.99 * (len(latencies) - 1))],
+        }
+    finally:
+        await pool.close()
+        await admin.execute(f"DROP SCHEMA {schema} CASCADE")
+        await admin.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python benchmarks/claim_partitions.py", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("dsn", help="postgresql://user@host:port/db (a scratch database)")
+    parser.add_argument("--jobs", type=int, default=50_000)
+    parser.add_argument("--claimers", type=int, default=32)
+    parser.add_argument("--batch", type=int, default=10, help="jobs per claim round")
+    parser.add_argument("--per-claim", type=int, default=4, help="own buckets tried per round (partitioned)")
+    args = parser.parse_args(argv)
+
+    dsn = args.dsn.replace("postgresql+asyncpg://", "postgresql://")
+    kw = {"jobs": args.jobs, "claimers": args.claimers, "batch": args.batch, "per_claim": args.per_claim}
+
+    async def run() -> list[dict[str, Any]]:
+        return [await run_variant(dsn, partitioned=p, **kw) for p in (False, True)]
+
+    results = asyncio.run(run())
+    cols = ["variant", "jobs_per_s", "p50_ms", "p99_ms"]
+    print(" | ".join(f"{c:>15}" for c in cols))
+    for r in results:
+        print(" | ".join(f"{r[c]:>15.1f}" if isinstance(r[c], float) else f"{r[c]:>15}" for c in cols))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
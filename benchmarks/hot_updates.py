@@ -0,0 +1,149 @@
+#benchmarks/hot_updates.py
+
+"""
+Lease/cancel update throughput and bloat, before and after db/migrations/005_hot_updates.sql.
+
+    python benchmarks/hot_updates.py postgresql://postgres@localhost:5432/equeue_test
+
+Each variant is migrated into its own throwaway schema, loaded with running jobs and put
+through worker-style heartbeats (extend_leases) plus cancel requests. Reports updates/s,
+the share of HOT updates and table/index growth. Autovacuum is off on both tables so
+the numbers compare like for like.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Any, List, Optional
+
+from equeue.db.migrate import MigrationRunner, load_migrations
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "db" / "migrations"
+HOT_MIGRATION = "005_hot_updates.sql"
+
+HEARTBEAT_SQL = """
+    UPDATE jobs
+    SET locked_until = $1
+    WHERE id = ANY($2::uuid[])
+        AND status = 'running'
+        AND locked_by = $3
+"""
+
+CANCEL_SQL = """
+    UPDATE jobs
+    SET cancel_requested_at = COALESCE(cancel_requested_at, $1),
+        updated_at = $1
+    WHERE id = ANY($2::uuid[])
+        AND status = 'running'
+"""
+
+
+async def _load(conn: Any, *, jobs: int, workers: int) -> dict[str, list[uuid.UUID]]:
+    now = datetime.now(timezone.utc)
+    await conn.execute(
+        """
+        INSERT INTO jobs (task_name, status, queue, payload, run_at, attempts, locked_by, locked_until, created_by)
+        SELECT 'bench.task', 'running', 'default', '{"n": 1}'::jsonb, $1::timestamptz, 1,
+            'w-' || (g % $3), $1::timestamptz + interval '30 seconds', 'bench'
+        FROM generate_series(1, $2) g
+        """,
+        now, jobs, workers,
+    )
+    rows = await conn.fetch("SELECT id, locked_by FROM jobs")
+    by_worker: dict[str, list[uuid.UUID]] = {}
+    for r in rows:
+        by_worker.setdefault(r["locked_by"], []).append(r["id"])
+    return by_worker
+
+
+async def _stats(conn: Any) -> dict[str, int]:
+    await conn.execute("SELECT pg_stat_force_next_flush()")
+    row = await conn.fetchrow(
+        """
+        SELECT n_tup_upd, n_tup_hot_upd,
+            pg_relation_size('jobs') AS heap, pg_indexes_size('jobs') AS indexes
+        FROM pg_stat_user_tables
+        WHERE relid = 'jobs'::regclass
+        """
+    )
+    return dict(row)
+
+
+async def run_variant(dsn: str, *, hot: bool, jobs: int, workers: int, rounds: int, batch: int) -> dict[str, Any]:
+    import asyncpg
+
+    schema = f"bench_hot_{uuid.uuid4().hex[:8]}"
+    admin = await asyncpg.connect(dsn)
+    await admin.execute(f"CREATE SCHEMA {schema}")
+    conn = await asyncpg.connect(dsn, server_settings={"search_path": f"{schema},public"})
+    try:
+        migrations = [m for m in load_migrations(MIGRATIONS_DIR) if hot or m.version < HOT_MIGRATION]
+        await MigrationRunner(conn).run(migrations)
+        await conn.execute("ALTER TABLE jobs SET (autovacuum_enabled = false)")
+
+        by_worker = await _load(conn, jobs=jobs, workers=workers)
+        before = await _stats(conn)
+
+        updates = 0
+        start = perf_counter()
+        for r in range(rounds):
+            locked_until = datetime.now(timezone.utc) + timedelta(seconds=30)
+            for worker, ids in by_worker.items():
+                for i in range(0, len(ids), batch):
+                    await conn.execute(HEARTBEAT_SQL, locked_until, ids[i : i + batch], worker)
+                    updates += len(ids[i : i + batch])
+            # a trickle of cancel requests on top of the heartbeats
+            for ids in by_worker.values():
+                chunk = ids[r::rounds * 10]
+                await conn.execute(CANCEL_SQL, datetime.now(timezone.utc), chunk)
+                updates += len(chunk)
+        elapsed = perf_counter() - start
+
+        after = await _stats(conn)
+        upd = after["n_tup_upd"] - before["n_tup_upd"]
+        return {
+            "variant": "after (005)" if hot else "before",
+            "updates_per_s": updates / elapsed,
+            "hot_pct": 100.0 * (after["n_tup_hot_upd"] - before["n_tup_hot_upd"]) / max(upd, 1),
+            "heap_growth_mb": (after["heap"] - before["heap"]) / 2**20,
+            "index_growth_mb": (after["indexes"] - before["indexes"]) / 2**20,
+            "heap_mb": after["heap"] / 2**20,
+            "indexes_mb": after["indexes"] / 2**20,
+        }
+    finally:
+        await conn.close()
+        await admin.execute(f"DROP SCHEMA {schema} CASCADE")
+        await admin.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python benchmarks/hot_updates.py", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("dsn", help="postgresql://user@host:port/db (a scratch database)")
+    parser.add_argument("--jobs", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=100, help="job ids per heartbeat UPDATE")
+    args = parser.parse_args(argv)
+
+    dsn = args.dsn.replace("postgresql+asyncpg://", "postgresql://")
+    kw = {"jobs": args.jobs, "workers": args.workers, "rounds": args.rounds, "batch": args.batch}
+
+    async def run() -> list[dict[str, Any]]:
+        return [await run_variant(dsn, hot=hot, **kw) for hot in (False, True)]
+
+    results = asyncio.run(run())
+    cols = ["variant", "updates_per_s", "hot_pct", "heap_growth_mb", "index_growth_mb", "heap_mb", "indexes_mb"]
+    print(" | ".join(f"{c:>15}" for c in cols))
+    for r in results:
+        print(" | ".join(f"{r[c]:>15.1f}" if isinstance(r[c], float) else f"{r[c]:>15}" for c in cols))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#benchmarks/test_hot_paths.py
+
+"""
+Microbenchmarks for code that runs on every API request.
+
+Run (compares against the stored baseline, fails on >10% mean regression):
+    python -m pytest benchmarks --benchmark-only \
+        --benchmark-storage=benchmarks/.baselines \
+        --benchmark-compare=0001 --benchmark-compare-fail=mean:10%
+
+See docs/develop/benchmarks.md for refreshing the baseline.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from equeue.api.models.jobs import (
+    EnqueueJobRequest,
+    JobListPage,
+    JobListQuery,
+    JobPublic,
+)
+from equeue.db.cursor import decode_cursor, encode_cursor
+from equeue.db.job_repo import _row_to_job, _row_to_partial_job, _row_to_record
+
+
+NOW = datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+PAGE_SIZE = 50
+
+
+def _row(i: int = 0) -> dict:
+    """Shape of a `jobs` row as returned by `res.mappings()`."""
+    return {
+        "id": uuid4(),
+        "task_name": "puzzles.extract_mate_tag",
+        "status": "queued",
+        "queue": "default",
+        "payload": {"puzzle_id": i, "tags": ["mate", "endgame"], "depth": 12},
+        "priority": 0,
+        "run_at": NOW,
+        "attempts": 0,
+        "max_attempts": 25,
+        "locked_until": None,
+        "locked_by": None,
+        "last_error": None,
+        "created_by": "user-1",
+        "created_at": NOW - timedelta(seconds=i),
+        "updated_at": NOW,
+        "cancel_requested_at": None,
+        "idempotency_key": None,
+    }
+
+
+@pytest.fixture
+def enqueue_body() -> dict:
+    return {
+        "task_name": "puzzles.extract_mate_tag",
+        "queue": "default",
+        "payload": {"puzzle_id": 1, "tags": ["mate", "endgame"], "depth": 12},
+        "priority": 5,
+        "run_at": NOW.isoformat(),
+        "idempotency_key": "abc123",
+    }
+
+
+@pytest.fixture
+def job() -> JobPublic:
+    return _row_to_job(_row())
+
+
+@pytest.fixture
+def page() -> JobListPage:
+    items = [_row_to_job(_row(i)) for i in range(PAGE_SIZE)]
+    return JobListPage(items=items, next_cursor=encode_cursor(items[-1].created_at, items[-1].id))
+
+
+# ----------- Request models -----------
+
+def test_enqueue_request_validate_python(benchmark, enqueue_body):
+    req = benchmark(EnqueueJobRequest.model_validate, enqueue_body)
+    assert req.task_name == "puzzles.extract_mate_tag"
+
+
+def test_enqueue_request_validate_json(benchmark, enqueue_body):
+    import json
+
+    raw = json.dumps(enqueue_body).encode("utf-8")
+    req = benchmark(EnqueueJobRequest.model_validate_json, raw)
+    assert req.priority == 5
+
+
+def test_job_list_query_parsing(benchmark):
+    # query params arrive as strings
+    params = {
+        "task_name": " puzzles.extract_mate_tag ",
+        "queue": "default",
+        "created_after": "2026-01-01T00:00:00+00:00",
+        "limit": "100",
+        "cursor": encode_cursor(NOW, uuid4()),
+    }
+    q = benchmark(JobListQuery.model_validate, params)
+    assert q.limit == 100
+
+
+# ----------- Response models -----------
+
+def test_job_public_serialize_json(benchmark, job):
+    out = benchmark(job.model_dump_json)
+    assert out.startswith("{")
+
+
+def test_job_public_serialize_python(benchmark, job):
+    out = benchmark(job.model_dump, mode="json")
+    assert out["status"] == "queued"
+
+
+def test_job_list_page_serialize_json(benchmark, page):
+    out = benchmark(page.model_dump_json)
+    assert out.startswith("{")
+
+
+# ----------- Cursor codec -----------
+
+def test_encode_cursor(benchmark):
+    job_id = uuid4()
+    out = benchmark(encode_cursor, NOW, job_id)
+    assert decode_cursor(out).id == job_id
+
+
+def test_decode_cursor(benchmark):
+    job_id = uuid4()
+    raw = encode_cursor(NOW, job_id)
+    c = benchmark(decode_cursor, raw)
+    assert c.id == job_id
+
+
+# ----------- Row mapping -----------
+
+def test_row_to_job(benchmark):
+    row = _row()
+    out = benchmark(_row_to_job, row)
+    assert out.id == row["id"]
+
+
+def test_row_to_job_page(benchmark):
+    rows = [_row(i) for i in range(PAGE_SIZE)]
+
+    def _map_page() -> list[JobPublic]:
+        return [_row_to_job(r) for r in rows]
+
+    out = benchmark(_map_page)
+    assert len(out) == PAGE_SIZE
+
+
+# a multi-KB config blob, as carried by fanned-out jobs
+LARGE_PAYLOAD = {"config": {f"option_{k}": {"enabled": True, "weight": k / 7, "tags": ["a", "b"]} for k in range(60)}}
+
+
+def test_row_to_job_page_serialize(benchmark):
+    # full rows, as served without fields=; compare with test_row_to_partial_job_page
+    rows = [{**_row(i), "payload": LARGE_PAYLOAD} for i in range(PAGE_SIZE)]
+
+    def _map_and_dump() -> list[dict]:
+        return [_row_to_job(r).model_dump(mode="json") for r in rows]
+
+    out = benchmark(_map_and_dump)
+    assert len(out) == PAGE_SIZE
+
+
+def test_row_to_partial_job_page(benchmark):
+    # fields=status,updated_at: what a status dashboard asks for
+    fields = ("id", "status", "updated_at")
+    rows = [{f: r[f] for f in fields} for r in (_row(i) for i in range(PAGE_SIZE))]
+
+    def _map_and_dump() -> list[dict]:
+        return [_row_to_partial_job(r, fields).model_dump(mode="json", exclude_unset=True) for r in rows]
+
+    out = benchmark(_map_and_dump)
+    assert set(out[0]) == set(fields)
+
+
+# ----------- Worker claims -----------
+
+# one full prefetch buffer of claimed rows
+CLAIM_BATCH = 500
+
+
+def test_row_to_job_claim_batch(benchmark):
+    # what claim_jobs built before JobRecord; compare with test_row_to_record_claim_batch
+    rows = [{**_row(i), "payload": LARGE_PAYLOAD, "group_id": None} for i in range(CLAIM_BATCH)]
+
+    out = benchmark(lambda: [_row_to_job(r) for r in rows])
+    assert len(out) == CLAIM_BATCH
+
+
+def test_row_to_record_claim_batch(benchmark):
+    # _RECORD_COLUMNS rows: payload as JSON text, decoded only when a task runs
+    body = json.dumps(LARGE_PAYLOAD)
+    rows = [{**_row(i), "payload": body, "payload_hash": None, "group_id": None} for i in range(CLAIM_BATCH)]
+
+    out = benchmark(lambda: [_row_to_record(r, r["payload"]) for r in rows])
+    assert len(out) == CLAIM_BATCH
@@ -0,0 +1,4 @@
+---- Fleet-wide per-task concurrency: count running jobs per task_name
+CREATE INDEX IF NOT EXISTS jobs_running_task_idx
+    ON jobs (task_name)
+    WHERE status = 'running';
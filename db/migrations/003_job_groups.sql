@@ -0,0 +1,64 @@
+---- Fan-in groups: N member jobs + one callback job released when every member is terminal.
+---- Completion is an atomic counter on the group row, maintained by a trigger on member
+---- status changes, so nobody has to poll the members.
+
+CREATE TABLE IF NOT EXISTS job_groups(
+    id                  uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    created_by          text NOT NULL,
+
+    total               integer NOT NULL,
+    remaining           integer NOT NULL,   -- members not yet terminal
+
+    -- the callback job waits as queued with run_at = 'infinity' (never claimable)
+    callback_job_id     uuid NOT NULL REFERENCES jobs(id),
+    callback_run_at     timestamptz NOT NULL,   -- earliest run_at once released
+
+    created_at          timestamptz NOT NULL DEFAULT now(),
+    completed_at        timestamptz,
+
+    CONSTRAINT total_positive CHECK (total > 0),
+    CONSTRAINT remaining_in_range CHECK (remaining >= 0 AND remaining <= total),
+    CONSTRAINT group_created_by_nonempty CHECK (length(btrim(created_by)) > 0)
+);
+
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS group_id uuid REFERENCES job_groups(id);
+
+
+---- Member terminal transitions move the counter; reaching 0 releases the callback.
+---- Leaving a terminal state (e.g. a dead member replayed) moves it back.
+CREATE OR REPLACE FUNCTION job_group_member_changed()
+RETURNS trigger AS $$
+DECLARE
+    was_terminal boolean := OLD.status IN ('succeeded', 'dead', 'cancelled');
+    is_terminal  boolean := NEW.status IN ('succeeded', 'dead', 'cancelled');
+    g job_groups%ROWTYPE;
+BEGIN
+    IF is_terminal AND NOT was_terminal THEN
+        UPDATE job_groups
+        SET remaining = remaining - 1,
+            completed_at = CASE WHEN remaining = 1 THEN COALESCE(completed_at, now()) ELSE completed_at END
+        WHERE id = NEW.group_id
+        RETURNING * INTO g;
+
+        IF g.remaining = 0 THEN
+            UPDATE jobs
+            SET run_at = GREATEST(now(), g.callback_run_at),
+                updated_at = now()
+            WHERE id = g.callback_job_id
+                AND status = 'queued'
+                AND run_at = 'infinity';
+        END IF;
+    ELSIF was_terminal AND NOT is_terminal THEN
+        UPDATE job_groups SET remaining = remaining + 1 WHERE id = NEW.group_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_jobs_group_member ON jobs;
+
+CREATE TRIGGER trg_jobs_group_member
+AFTER UPDATE OF status ON jobs
+FOR EACH ROW
+WHEN (NEW.group_id IS NOT NULL AND OLD.status IS DISTINCT FROM NEW.status)
+EXECUTE FUNCTION job_group_member_changed();
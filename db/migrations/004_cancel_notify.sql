@@ -0,0 +1,17 @@
+---- Push running-job cancel requests to workers: NOTIFY equeue_cancel, payload = job id.
+---- Delivered on commit; workers still poll (cancel_requested) in case a notification is missed.
+CREATE OR REPLACE FUNCTION notify_cancel_requested()
+RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('equeue_cancel', NEW.id::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_jobs_cancel_requested ON jobs;
+
+CREATE TRIGGER trg_jobs_cancel_requested
+AFTER UPDATE OF cancel_requested_at ON jobs
+FOR EACH ROW
+WHEN (OLD.cancel_requested_at IS NULL AND NEW.cancel_requested_at IS NOT NULL)
+EXECUTE FUNCTION notify_cancel_requested();
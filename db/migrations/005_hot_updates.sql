@@ -0,0 +1,20 @@
+-- equeue:no-transaction
+---- Let lease and cancel churn be HOT updates (heap-only: no new index entries).
+---- An UPDATE is HOT only if it changes no indexed column and the new row version fits
+---- on the same page. Heartbeats (locked_until) and cancel requests (cancel_requested_at,
+---- updated_at) qualify once neither column is indexed; status / run_at changes never do.
+
+---- Leave room on each page for the new row versions (applies to pages written from now on).
+ALTER TABLE jobs SET (fillfactor = 80);
+
+---- Every repo statement sets updated_at itself; the trigger only overwrote it with now().
+DROP TRIGGER IF EXISTS trg_jobs_update_at ON jobs;
+DROP FUNCTION IF EXISTS set_updated_at();
+
+---- Indexed updated_at (and locked_until below) made every heartbeat a non-HOT update.
+---- Nothing queries by (status, updated_at).
+DROP INDEX CONCURRENTLY IF EXISTS jobs_status_update_idx;
+
+---- The reaper finds expired leases through jobs_queue_status_idx (queue, status = 'running')
+---- and filters locked_until on the heap: the running set is bounded by worker concurrency.
+DROP INDEX CONCURRENTLY IF EXISTS jobs_expired_lease_idx;
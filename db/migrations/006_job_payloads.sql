@@ -0,0 +1,15 @@
+---- Out-of-line payloads: large bodies are stored once per content hash (sha256 of the
+---- canonical JSON) and jobs reference them; jobs.payload is then '{}'.
+---- Enabled per repo with SqlAlchemyJobRepo(payload_threshold=...).
+
+CREATE TABLE IF NOT EXISTS job_payloads(
+    hash        bytea PRIMARY KEY,
+    body        jsonb NOT NULL,
+    created_at  timestamptz NOT NULL DEFAULT now(),
+
+    CONSTRAINT hash_is_sha256 CHECK (length(hash) = 32)
+);
+
+---- Nullable, no default: a metadata-only change on jobs. Never updated after insert,
+---- so it does not affect HOT updates (see 005_hot_updates.sql).
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS payload_hash bytea REFERENCES job_payloads(hash);
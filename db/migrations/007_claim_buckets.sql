@@ -0,0 +1,27 @@
+-- equeue:no-transaction
+---- Claim partitions: every job gets a random claim_bucket in [0, 64) at insert, and
+---- workers running with WorkerConfig(partitions=...) claim from the buckets they own
+---- (equeue.worker.partitions) instead of all scanning the same head of the queue.
+
+---- Nullable with a volatile default: adding the column is a catalog-only change, and
+---- the default applies to rows inserted from now on (008 backfills queued rows).
+---- Never updated afterwards, so it costs no HOT eligibility.
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS claim_bucket smallint;
+ALTER TABLE jobs ALTER COLUMN claim_bucket SET DEFAULT floor(random() * 64)::smallint;
+
+---- jobs_runnable_idx with the bucket after the queue: a per-bucket claim reads its
+---- bucket's head in claim order, with no sort. A rerun after an interrupted build drops
+---- the INVALID index it left (IF NOT EXISTS would keep it) and builds it again.
+DROP INDEX CONCURRENTLY IF EXISTS jobs_bucket_runnable_idx;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS jobs_bucket_runnable_idx
+    ON jobs (queue, claim_bucket, run_at, priority DESC, created_at, id)
+    WHERE status = 'queued';
+
+---- Workers sharing a queue's buckets: one row each, heartbeated; rows older than the
+---- member ttl are dropped by whoever heartbeats next.
+CREATE TABLE IF NOT EXISTS claim_members (
+    queue           text NOT NULL,
+    worker_id       text NOT NULL,
+    heartbeat_at    timestamptz NOT NULL,
+    PRIMARY KEY (queue, worker_id)
+);
@@ -0,0 +1,13 @@
+---- Give queued jobs that predate 007 a bucket. Other rows can stay NULL: a NULL-bucket
+---- job is only ever claimed by the unpartitioned (steal) pass.
+-- equeue:backfill batch_size=5000 pause=0.05
+UPDATE jobs
+SET claim_bucket = floor(random() * 64)::smallint
+WHERE id IN (
+    SELECT id
+    FROM jobs
+    WHERE status = 'queued'
+        AND claim_bucket IS NULL
+    LIMIT $1
+    FOR UPDATE SKIP LOCKED
+)
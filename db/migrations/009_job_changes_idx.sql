@@ -0,0 +1,13 @@
+-- equeue:no-transaction
+---- Change feed (GET /v1/jobs/changes): one owner's jobs in (updated_at, id) order.
+----
+---- Indexing updated_at gives up HOT for the one frequent UPDATE that changed nothing
+---- else indexed: a cancel request on a running job (005_hot_updates.sql). Every other
+---- write that bumps updated_at also moves status or run_at, which was never HOT.
+---- Lease heartbeats do not touch updated_at and stay HOT.
+----
+---- A rerun after an interrupted build drops the INVALID index it left (IF NOT EXISTS
+---- would keep it) and builds it again.
+DROP INDEX CONCURRENTLY IF EXISTS jobs_owner_updated_idx;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS jobs_owner_updated_idx
+    ON jobs (created_by, updated_at, id);
@@ -0,0 +1,16 @@
+-- equeue:no-transaction
+---- Debounced / singleton jobs: while a job with a dedupe_key is queued, enqueues with the
+---- same (created_by, dedupe_key) merge into it (EnqueueJobRequest.dedupe_policy) instead
+---- of adding a row. Once it is claimed, the next enqueue starts a new job.
+----
+---- Nullable, no default: a catalog-only change.
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS dedupe_key text;
+
+---- The arbiter of INSERT ... ON CONFLICT for dedupe_key. Only queued rows are indexed, so
+---- rows leave it as they are claimed or cancelled and the index stays as small as the backlog.
+---- An interrupted build leaves an INVALID index that IF NOT EXISTS would keep (and that
+---- cannot arbitrate ON CONFLICT): a rerun drops it and builds it again.
+DROP INDEX CONCURRENTLY IF EXISTS jobs_dedupe_queued_uniq;
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS jobs_dedupe_queued_uniq
+    ON jobs (created_by, dedupe_key)
+    WHERE status = 'queued' AND dedupe_key IS NOT NULL;
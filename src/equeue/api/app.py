@@ -1,9 +1,11 @@
 from fastapi import FastAPI
 from equeue.api.routes.jobs import router as jobs_router
+from equeue.api.routes.metrics import router as metrics_router
 
 def create_app() -> FastAPI:
     app = FastAPI(title="eQueue")
     app.include_router(jobs_router)
+    app.include_router(metrics_router)
     return app
 
-app = create_app()
\ No newline at end of file
+app = create_app()
@@ -0,0 +1,114 @@
+#src/equeue/api/cache.py
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from time import monotonic
+from typing import Awaitable, Callable, Hashable
+from uuid import UUID
+
+import anyio
+
+from equeue.api.models.jobs import JobPublic, JobStatus
+from equeue.observability.metrics import JOB_CACHE_REQUESTS
+
+# terminal and final: dead is left out, dead-letter replay requeues it (from any process)
+TERMINAL_STATUSES = frozenset({JobStatus.succeeded, JobStatus.cancelled})
+
+_HIT = JOB_CACHE_REQUESTS.labels("hit")
+_MISS = JOB_CACHE_REQUESTS.labels("miss")
+_COALESCED = JOB_CACHE_REQUESTS.labels("coalesced")
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = anyio.Event()
+        self.result: JobPublic | None = None
+        self.error: BaseException | None = None
+
+
+class TerminalJobCache:
+    """
+    Bounded in-process LRU of terminal jobs (succeeded/cancelled never change; dead can
+    be replayed, so it is never cached), keyed by (created_by, job_id) so ownership
+    scoping is preserved.
+
+    get_or_load() also coalesces concurrent lookups of the same key into one load
+    (single-flight), whether or not the job turns out to be terminal.
+
+    `ttl` bounds how long an entry outlives its last put.
+    """
+
+    def __init__(self, *, maxsize: int = 10_000, ttl: float | None = 300.0, clock: Callable[[], float] = monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: OrderedDict[Hashable, tuple[JobPublic, float]] = OrderedDict()
+        self._flights: dict[Hashable, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, created_by: str, job_id: UUID) -> JobPublic | None:
+        key = (created_by, job_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        job, expires = entry
+        if expires <= self.clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return job
+
+    def put(self, created_by: str, job: JobPublic) -> None:
+        if job.status not in TERMINAL_STATUSES:
+            return
+        key = (created_by, job.id)
+        expires = self.clock() + self.ttl if self.ttl is not None else float("inf")
+        self._entries[key] = (job, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, created_by: str, job_id: UUID) -> None:
+        self._entries.pop((created_by, job_id), None)
+
+    async def get_or_load(
+        self, created_by: str, job_id: UUID, load: Callable[[], Awaitable[JobPublic | None]]
+    ) -> JobPublic | None:
+        job = self.get(created_by, job_id)
+        if job is not None:
+            _HIT.inc()
+            return job
+
+        key = (created_by, job_id)
+        flight = self._flights.get(key)
+        while flight is not None:
+            _COALESCED.inc()
+            await flight.done.wait()
+            if flight.error is None:
+                return flight.result
+            if not isinstance(flight.error, anyio.get_cancelled_exc_class()):
+                raise flight.error
+            # the leader was cancelled, not failed: lead (or join) a new flight
+            flight = self._flights.get(key)
+
+        _MISS.inc()
+        flight = self._flights[key] = _Flight()
+        try:
+            flight.result = await load()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            del self._flights[key]
+            flight.done.set()
+
+        if flight.result is not None:
+            self.put(created_by, flight.result)
+        return flight.result
@@ -7,7 +7,7 @@ from enum import Enum
 from typing import Any, Literal
 from uuid import UUID
 
-from pydantic import BaseModel, Field, ConfigDict, field_validator, ValidationError
+from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator, ValidationError
 
 
 # ----------- Shared types -----------
@@ -20,6 +20,15 @@ class JobStatus(str, Enum):
     cancelled = "cancelled"
 
 
+class DedupePolicy(str, Enum):
+    """
+    What an enqueue does when a queued job with its dedupe_key already exists.
+    """
+    keep_first = "keep_first"               # drop the new request
+    replace_payload = "replace_payload"     # the queued job takes the new payload
+    extend_run_at = "extend_run_at"         # the queued job waits until the later run_at (debounce)
+
+
 class JobError(BaseModel):
     """
     Stored in jobs.last_error (jsonb). Keeping it flexible for starter.
@@ -46,6 +55,10 @@ class EnqueueJobRequest(BaseModel):
 
     idempotency_key: str | None = Field(None, description="Optional; unique per (created_by, idempotency_key)")
 
+    # collapse duplicate work: at most one *queued* job per (created_by, dedupe_key)
+    dedupe_key: str | None = Field(None, min_length=1, description="Merge into the queued job with this key, if any")
+    dedupe_policy: DedupePolicy = Field(DedupePolicy.keep_first, description="How a duplicate merges (see DedupePolicy)")
+
     @field_validator("task_name", "queue")
     @classmethod
     def non_empty(cls, v: str) -> str:
@@ -53,8 +66,129 @@ class EnqueueJobRequest(BaseModel):
         if not v:
             raise ValueError("must be non-empty")
         return v
+
+    @model_validator(mode="after")
+    def one_kind_of_key(self) -> EnqueueJobRequest:
+        # idempotency_key dedupes forever, dedupe_key only while queued: a request is one or the other
+        if self.idempotency_key is not None and self.dedupe_key is not None:
+            raise ValueError("idempotency_key and dedupe_key are mutually exclusive")
+        return self
     
 
+class EnqueueJobGroupRequest(BaseModel):
+    """
+    Fan-in: `jobs` run independently; `callback` becomes runnable once every one of
+    them is terminal (succeeded, dead or cancelled).
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    jobs: list[EnqueueJobRequest] = Field(..., min_length=1, max_length=10_000)
+    callback: EnqueueJobRequest
+
+    @field_validator("jobs")
+    @classmethod
+    def no_member_idempotency(cls, v: list[EnqueueJobRequest]) -> list[EnqueueJobRequest]:
+        # a deduplicated member would be counted by two groups
+        if any(j.idempotency_key is not None for j in v):
+            raise ValueError("idempotency_key is not supported on group members")
+        if any(j.dedupe_key is not None for j in v):
+            raise ValueError("dedupe_key is not supported on group members")
+        return v
+
+    @field_validator("callback")
+    @classmethod
+    def no_callback_idempotency(cls, v: EnqueueJobRequest) -> EnqueueJobRequest:
+        if v.idempotency_key is not None:
+            raise ValueError("idempotency_key is not supported on a group callback")
+        if v.dedupe_key is not None:
+            raise ValueError("dedupe_key is not supported on a group callback")
+        return v
+
+
+class EnqueueJobBatchRequest(BaseModel):
+    """
+    Independent jobs enqueued in one round trip (unlike a group, nothing waits on them).
+    Duplicate idempotency keys within a batch resolve to the same job, and so do
+    duplicate dedupe keys (merged in order, so they must share a dedupe_policy).
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    jobs: list[EnqueueJobRequest] = Field(..., min_length=1, max_length=1_000)
+
+    @field_validator("jobs")
+    @classmethod
+    def one_policy_per_dedupe_key(cls, v: list[EnqueueJobRequest]) -> list[EnqueueJobRequest]:
+        policies: dict[str, DedupePolicy] = {}
+        for j in v:
+            if j.dedupe_key is not None and policies.setdefault(j.dedupe_key, j.dedupe_policy) != j.dedupe_policy:
+                raise ValueError(f"dedupe_key {j.dedupe_key!r} is used with more than one dedupe_policy")
+        return v
+
+
+class BulkCancelRequest(BaseModel):
+    """
+    Cancel many jobs at once: either explicit `job_ids`, or every job matching the filters.
+    Same semantics as a single cancel (queued -> cancelled, running -> cancel requested).
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    job_ids: list[UUID] | None = Field(None, min_length=1, max_length=100_000)
+
+    queue: str | None = None
+    task_name: str | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+    @field_validator("task_name", "queue")
+    @classmethod
+    def strip_optional(cls, v: str | None) -> str | None:
+        return v.strip() if v is not None else None
+
+    @model_validator(mode="after")
+    def ids_or_filters(self) -> BulkCancelRequest:
+        has_filter = any(v is not None for v in (self.queue, self.task_name, self.created_after, self.created_before))
+        if self.job_ids is not None and has_filter:
+            raise ValueError("pass either job_ids or filters, not both")
+        if self.job_ids is None and not has_filter:
+            # an empty filter would cancel everything the caller owns
+            raise ValueError("pass job_ids or at least one filter")
+        return self
+
+
+class ReplayDeadJobsRequest(BaseModel):
+    """
+    Requeue every dead job matching the filters, with attempts reset. New run_at values
+    are spread uniformly over `spread_seconds` from now, so the replay does not arrive
+    as one burst.
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    queue: str | None = None
+    task_name: str | None = None
+    error_type: str | None = Field(None, description="last_error.type, e.g. ConnectTimeout")
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+    died_after: datetime | None = Field(None, description="Moved to dead at or after this time")
+    died_before: datetime | None = None
+
+    spread_seconds: float = Field(0.0, ge=0, le=7 * 24 * 3600)
+
+    @field_validator("task_name", "queue", "error_type")
+    @classmethod
+    def strip_optional(cls, v: str | None) -> str | None:
+        return v.strip() if v is not None else None
+
+    @model_validator(mode="after")
+    def some_filter(self) -> ReplayDeadJobsRequest:
+        filters = (
+            self.queue, self.task_name, self.error_type,
+            self.created_after, self.created_before, self.died_after, self.died_before,
+        )
+        if all(v is None for v in filters):
+            raise ValueError("pass at least one filter")
+        return self
+
+
 class CancelJobResponse(BaseModel):
     """
     To signal 'accepted' when cancelling a running job.
@@ -67,6 +201,22 @@ class CancelJobResponse(BaseModel):
 
 # ---------------- Responses -------------------
 
+class BulkCancelResponse(BaseModel):
+    """
+    Counts only: a bulk cancel can touch hundreds of thousands of rows.
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    cancelled: int = Field(0, description="Queued jobs moved to cancelled")
+    cancel_requested: int = Field(0, description="Running jobs flagged for cancellation")
+
+
+class ReplayDeadJobsResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    replayed: int = Field(0, description="Dead jobs moved back to queued")
+
+
 class JobPublic(BaseModel):
     """
     What the API returns. Mirrors the jobs table but avoids leaking internal lock details unless expected.
@@ -96,10 +246,20 @@ class JobPublic(BaseModel):
     # debugging
     last_error: dict[str, Any] | JobError | None = None
 
+    # fan-in group membership (see JobGroupPublic)
+    group_id: UUID | None = None
+
     # when added 
     # results: dict[str, Any] | None = None
 
 
+class JobBatchPublic(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    # one per request job, in request order
+    jobs: list[JobPublic]
+
+
 class JobListPage(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -107,6 +267,39 @@ class JobListPage(BaseModel):
     next_cursor: str | None = None
 
 
+class JobChangesPage(BaseModel):
+    """
+    One page of the change feed: jobs whose updated_at moved past the `since` token,
+    oldest change first. Poll again with `next_token`; `has_more` means the page was
+    full and the next one is ready now.
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    items: list[JobPublic]
+    next_token: str | None = Field(None, description="Pass as `since`; None only while nothing has changed yet")
+    has_more: bool = False
+
+
+class JobGroupPublic(BaseModel):
+    """
+    Group progress: one row, so checking on a fan-in is O(1) regardless of its size.
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    id: UUID
+    created_by: str
+
+    total: int
+    remaining: int = Field(..., description="Members not yet in a terminal state")
+
+    callback_job_id: UUID
+    created_at: datetime
+    completed_at: datetime | None = None
+
+    # member ids in request order; only returned on creation
+    job_ids: list[UUID] | None = None
+
+
 # ------------- Query params model ----------
 
 class JobListQuery(BaseModel):
@@ -123,7 +316,51 @@ class JobListQuery(BaseModel):
     limit: int = Field(50, ge=1, le=200)
     cursor: str | None = None
 
+    fields: str | None = Field(None, description="Comma-separated JobPublic fields to return, e.g. id,status,updated_at")
+
     @field_validator("task_name", "queue")
     @classmethod
     def strip_optional(cls, v: str | None) -> str | None:
         return v.strip() if v is not None else None
+
+    @property
+    def field_names(self) -> tuple[str, ...] | None:
+        # checked by the route, not a validator: one raising inside Depends() surfaces as a 500
+        return parse_job_fields(self.fields)
+
+
+class JobChangesQuery(BaseModel):
+
+    model_config = ConfigDict(extra="forbid")
+
+    since: str | None = Field(None, description="next_token of the previous page; omit to start from the beginning")
+    limit: int = Field(100, ge=1, le=500)
+
+    fields: str | None = Field(None, description="Comma-separated JobPublic fields to return, e.g. id,status,updated_at")
+
+    @property
+    def field_names(self) -> tuple[str, ...] | None:
+        return parse_job_fields(self.fields)
+
+
+# ------------- Field projections (fields=) ----------
+
+def parse_job_fields(spec: str | None) -> tuple[str, ...] | None:
+    """
+    "status,updated_at" -> ("id", "status", "updated_at"); None means every field.
+    `id` is always included. Raises ValueError on unknown names.
+    """
+    if spec is None:
+        return None
+    names = [f.strip() for f in spec.split(",") if f.strip()]
+    unknown = sorted(set(names) - set(JobPublic.model_fields))
+    if unknown:
+        raise ValueError(f"unknown job fields: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(["id", *names]))
+
+
+def project_job(job: JobPublic, fields: tuple[str, ...]) -> JobPublic:
+    """
+    Unvalidated JobPublic holding only `fields`; serialize with exclude_unset=True.
+    """
+    return JobPublic.model_construct(**{f: getattr(job, f) for f in fields})
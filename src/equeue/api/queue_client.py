@@ -2,18 +2,35 @@
 
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from time import monotonic, perf_counter
 from typing import Protocol
 from uuid import UUID
 
+import anyio
+
+from equeue.api.cache import TerminalJobCache
 from equeue.api.models.jobs import (
+    BulkCancelRequest,
+    BulkCancelResponse,
+    EnqueueJobBatchRequest,
+    EnqueueJobGroupRequest,
     EnqueueJobRequest,
+    JobBatchPublic,
+    JobChangesPage,
+    JobChangesQuery,
+    JobGroupPublic,
     JobListPage,
     JobListQuery,
     JobPublic,
     JobStatus,
+    ReplayDeadJobsRequest,
+    ReplayDeadJobsResponse,
+    project_job,
 )
+from equeue.observability.metrics import ANY_QUEUE, REPLICA_READS, client_metrics
 
 def utcnow() -> datetime:
     return datetime.now(timezone.utc)
@@ -24,10 +41,36 @@ def utcnow() -> datetime:
 
 class JobRepo(Protocol):
     async def insert_job(self, *, created_by: str, req: EnqueueJobRequest, now: datetime) -> JobPublic: ...
-    async def get_job(self, *, created_by: str, job_id: UUID) -> JobPublic | None: ...
+    async def insert_jobs(self, *, created_by: str, reqs: list[EnqueueJobRequest], now: datetime) -> list[JobPublic]: ...
+    async def get_job(
+        self, *, created_by: str, job_id: UUID, fields: tuple[str, ...] | None = None
+    ) -> JobPublic | None: ...
     async def list_jobs(self, *, created_by: str, q: JobListQuery) -> JobListPage: ...
+    async def list_changes(self, *, created_by: str, q: JobChangesQuery, until: datetime) -> JobChangesPage: ...
     async def cancel_job(self, *, created_by: str, job_id: UUID, now: datetime) -> tuple[JobPublic | None, bool]: ...
     # returns: (job_or_none, accepted_running_cancel)
+    async def cancel_jobs(self, *, created_by: str, req: BulkCancelRequest, now: datetime) -> BulkCancelResponse: ...
+    async def replay_dead_jobs(
+        self, *, created_by: str, req: ReplayDeadJobsRequest, now: datetime
+    ) -> ReplayDeadJobsResponse: ...
+    async def insert_group(self, *, created_by: str, req: EnqueueJobGroupRequest, now: datetime) -> JobGroupPublic: ...
+    async def get_group(self, *, created_by: str, group_id: UUID) -> JobGroupPublic | None: ...
+
+
+class ConsistentRepo(Protocol):
+    """
+    Optional repo capability for replica routing (SqlAlchemyJobRepo implements it).
+    """
+    async def commit(self) -> None: ...
+    async def commit_token(self) -> str: ...
+    async def replayed(self, *, token: str) -> bool: ...
+
+
+# pg_lsn text form, e.g. "16/B374D848"
+_LSN_RE = re.compile(r"^[0-9A-Fa-f]{1,8}/[0-9A-Fa-f]{1,8}$")
+
+_SERVED_BY_REPLICA = REPLICA_READS.labels("replica")
+_SERVED_BY_PRIMARY = REPLICA_READS.labels("primary")
 
 # ------------------------------------------------------------------
 # Domain-ish errors (API layer maps these to HTTP later)
@@ -36,35 +79,227 @@ class JobNotFoundError(Exception):
     pass
 
 
+class JobGroupNotFoundError(Exception):
+    pass
+
+
 # ------------------------------------------------------------------
 # QueueClient
 # ------------------------------------------------------------------
 
 @dataclass(frozen=True)
 class QueueClient:
+    """
+    Writes go to `repo` (the primary). With a `replica`, get/list read from it instead;
+    a read carrying a consistency token from commit() waits up to
+    `replica_wait` seconds for the replica to replay that position, then falls back
+    to the primary, so callers always read their own writes.
+
+    With a `cache`, get() serves terminal jobs from memory and coalesces concurrent
+    identical lookups.
+    """
     repo: JobRepo
+    replica: JobRepo | None = None
+    replica_wait: float = 0.05
+    cache: TerminalJobCache | None = None   # terminal jobs for get(); shared across requests
+    changes_settle: float = 5.0             # seconds the change feed trails the clock (see changes())
 
     async def enqueue(self, *, created_by: str, req: EnqueueJobRequest) -> JobPublic:
-        # normalize run_at default here so repo stays dumb
-        now = utcnow()
-        if req.run_at is None:
-            req = req.model_copy(update={"run_at": now})
-        return await self.repo.insert_job(created_by=created_by, req=req, now=now)
+        m = client_metrics("enqueue", req.queue)
+        start = perf_counter()
+        try:
+            # normalize run_at default here so repo stays dumb
+            now = utcnow()
+            if req.run_at is None:
+                req = req.model_copy(update={"run_at": now})
+            return await self.repo.insert_job(created_by=created_by, req=req, now=now)
+        except Exception:
+            m.errors.inc()
+            raise
+        finally:
+            m.latency.observe(perf_counter() - start)
     
-    async def get(self, *, created_by: str, job_id: UUID) -> JobPublic:
-        job = await self.repo.get_job(created_by=created_by,job_id=job_id)
+    async def enqueue_many(self, *, created_by: str, req: EnqueueJobBatchRequest) -> JobBatchPublic:
+        queues = {j.queue for j in req.jobs}
+        m = client_metrics("enqueue_many", next(iter(queues)) if len(queues) == 1 else ANY_QUEUE)
+        start = perf_counter()
+        try:
+            jobs = await self.repo.insert_jobs(created_by=created_by, reqs=req.jobs, now=utcnow())
+            return JobBatchPublic(jobs=jobs)
+        except Exception:
+            m.errors.inc()
+            raise
+        finally:
+            m.latency.observe(perf_counter() - start)
+
+    async def commit(self) -> str | None:
+        """
+        Unit-of-work step after a write: commit this client's writes, then return a
+        read-your-writes token (primary WAL LSN) for get/list. None when the repo cannot
+        produce one (e.g. in-memory, sharded).
+        """
+        commit = getattr(self.repo, "commit", None)
+        if commit is not None:
+            await commit()
+        commit_token = getattr(self.repo, "commit_token", None)
+        if commit_token is None:
+            return None
+        return await commit_token()
+
+    async def _reader(self, consistency_token: str | None) -> JobRepo:
+        if self.replica is None:
+            return self.repo
+        if consistency_token is None:
+            _SERVED_BY_REPLICA.inc()
+            return self.replica
+        if _LSN_RE.match(consistency_token):  # malformed tokens are served by the primary
+            replica: ConsistentRepo = self.replica  # type: ignore[assignment]
+            deadline = monotonic() + self.replica_wait
+            while True:
+                if await replica.replayed(token=consistency_token):
+                    _SERVED_BY_REPLICA.inc()
+                    return self.replica
+                if monotonic() >= deadline:
+                    break
+                await anyio.sleep(0.005)
+        _SERVED_BY_PRIMARY.inc()
+        return self.repo
+
+    async def get(
+        self,
+        *,
+        created_by: str,
+        job_id: UUID,
+        consistency_token: str | None = None,
+        fields: tuple[str, ...] | None = None,
+    ) -> JobPublic:
+        """
+        `fields` (see parse_job_fields) returns a projection holding only those fields.
+        """
+        start = perf_counter()
+        try:
+            job = await self._get(created_by, job_id, consistency_token, fields)
+        except Exception:
+            client_metrics("get", ANY_QUEUE).errors.inc()
+            raise
+        client_metrics("get", getattr(job, "queue", None) or ANY_QUEUE).latency.observe(perf_counter() - start)
         # ownership enforecement: return 404 if mismatch (don't leak existence)
         if job is None:
             raise JobNotFoundError()
         return job
     
-    async def list(self, *, created_by: str, q: JobListQuery) -> JobListPage:
-        # list is always scoped to created_by
-        return await self.repo.list_jobs(created_by=created_by, q=q)
+    async def _get(
+        self, created_by: str, job_id: UUID, consistency_token: str | None, fields: tuple[str, ...] | None = None
+    ) -> JobPublic | None:
+        async def load() -> JobPublic | None:
+            reader = await self._reader(consistency_token)
+            return await reader.get_job(created_by=created_by, job_id=job_id, fields=fields)
+
+        if self.cache is None:
+            return await load()
+        if fields is not None:
+            # projections are served from cached full jobs, but never cached themselves
+            cached = self.cache.get(created_by, job_id)
+            return project_job(cached, fields) if cached is not None else await load()
+        if consistency_token is None:
+            return await self.cache.get_or_load(created_by, job_id, load)
+        # token reads must not join a flight that may be reading a lagging replica
+        job = self.cache.get(created_by, job_id)
+        if job is None:
+            job = await load()
+            if job is not None:
+                self.cache.put(created_by, job)
+        return job
+
+    async def list(self, *, created_by: str, q: JobListQuery, consistency_token: str | None = None) -> JobListPage:
+        m = client_metrics("list", q.queue or ANY_QUEUE)
+        start = perf_counter()
+        try:
+            reader = await self._reader(consistency_token)
+            # list is always scoped to created_by
+            return await reader.list_jobs(created_by=created_by, q=q)
+        except Exception:
+            m.errors.inc()
+            raise
+        finally:
+            m.latency.observe(perf_counter() - start)
     
+    async def changes(self, *, created_by: str, q: JobChangesQuery) -> JobChangesPage:
+        """
+        Jobs changed since `q.since`. Writes stamp updated_at before they commit, so the
+        feed stops `changes_settle` seconds short of now: a slower transaction (or a
+        host with a lagging clock) cannot commit a change behind a token already
+        returned. Always read from the primary, since a lagging replica could do the same.
+        """
+        m = client_metrics("changes", ANY_QUEUE)
+        start = perf_counter()
+        try:
+            until = utcnow() - timedelta(seconds=self.changes_settle)
+            return await self.repo.list_changes(created_by=created_by, q=q, until=until)
+        except Exception:
+            m.errors.inc()
+            raise
+        finally:
+            m.latency.observe(perf_counter() - start)
+
     async def cancel(self, *, created_by: str, job_id: UUID) -> tuple[JobPublic, bool]:
-        now = utcnow()
-        job, accepted = await self.repo.cancel_job(created_by=created_by, job_id=job_id, now=now)
+        start = perf_counter()
+        try:
+            now = utcnow()
+            job, accepted = await self.repo.cancel_job(created_by=created_by, job_id=job_id, now=now)
+        except Exception:
+            client_metrics("cancel", ANY_QUEUE).errors.inc()
+            raise
+        client_metrics("cancel", job.queue if job else ANY_QUEUE).latency.observe(perf_counter() - start)
         if job is None:
             raise JobNotFoundError()
-        return job, accepted
\ No newline at end of file
+        if self.cache is not None:
+            self.cache.put(created_by, job)  # queued -> cancelled is final
+        return job, accepted
+
+    async def cancel_many(self, *, created_by: str, req: BulkCancelRequest) -> BulkCancelResponse:
+        m = client_metrics("cancel_many", req.queue or ANY_QUEUE)
+        start = perf_counter()
+        try:
+            # cancelled jobs are terminal and only get cached once read: nothing to invalidate
+            return await self.repo.cancel_jobs(created_by=created_by, req=req, now=utcnow())
+        except Exception:
+            m.errors.inc()
+            raise
+        finally:
+            m.latency.observe(perf_counter() - start)
+
+    async def replay_dead(self, *, created_by: str, req: ReplayDeadJobsRequest) -> ReplayDeadJobsResponse:
+        m = client_metrics("replay_dead", req.queue or ANY_QUEUE)
+        start = perf_counter()
+        try:
+            return await self.repo.replay_dead_jobs(created_by=created_by, req=req, now=utcnow())
+        except Exception:
+            m.errors.inc()
+            raise
+        finally:
+            m.latency.observe(perf_counter() - start)
+
+    async def enqueue_group(self, *, created_by: str, req: EnqueueJobGroupRequest) -> JobGroupPublic:
+        m = client_metrics("enqueue_group", req.callback.queue)
+        start = perf_counter()
+        try:
+            return await self.repo.insert_group(created_by=created_by, req=req, now=utcnow())
+        except Exception:
+            m.errors.inc()
+            raise
+        finally:
+            m.latency.observe(perf_counter() - start)
+
+    async def get_group(self, *, created_by: str, group_id: UUID) -> JobGroupPublic:
+        m = client_metrics("get_group", ANY_QUEUE)
+        start = perf_counter()
+        try:
+            group = await self.repo.get_group(created_by=created_by, group_id=group_id)
+        except Exception:
+            m.errors.inc()
+            raise
+        m.latency.observe(perf_counter() - start)
+        if group is None:
+            raise JobGroupNotFoundError()
+        return group
@@ -1,15 +1,29 @@
 from __future__ import annotations
 
-from typing import Annotated
-from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+import zlib
+from typing import Annotated, Optional, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
 from uuid import UUID
 
 from equeue.api.models.jobs import (
+    BulkCancelRequest,
+    BulkCancelResponse,
+    EnqueueJobBatchRequest,
+    EnqueueJobGroupRequest,
     EnqueueJobRequest,
+    JobBatchPublic,
+    JobChangesPage,
+    JobChangesQuery,
+    JobGroupPublic,
     JobListPage,
     JobListQuery,
     JobPublic,
+    ReplayDeadJobsRequest,
+    ReplayDeadJobsResponse,
+    parse_job_fields,
 )
+from equeue.db.cursor import decode_change_token
 
 
 router = APIRouter(prefix="/v1/jobs", tags=["jobs"])
@@ -38,9 +52,23 @@ def get_auth_context(authorization: str | None = Header(default=None)) -> AuthCo
 
 class QueueClient:
     async def enqueue(self, *, created_by: str, req: EnqueueJobRequest) -> JobPublic: ...
-    async def get(self, *, created_by: str, job_id: UUID) -> JobPublic: ...
-    async def list(self, *, created_by: str, q: JobListQuery) -> JobListPage: ...
+    async def enqueue_many(self, *, created_by: str, req: EnqueueJobBatchRequest) -> JobBatchPublic: ...
+    async def get(
+        self,
+        *,
+        created_by: str,
+        job_id: UUID,
+        consistency_token: str | None = None,
+        fields: tuple[str, ...] | None = None,
+    ) -> JobPublic: ...
+    async def list(self, *, created_by: str, q: JobListQuery, consistency_token: str | None = None) -> JobListPage: ...
+    async def changes(self, *, created_by: str, q: JobChangesQuery) -> JobChangesPage: ...
     async def cancel(self, *, created_by: str, job_id: UUID) -> tuple[JobPublic, bool]: ...
+    async def cancel_many(self, *, created_by: str, req: BulkCancelRequest) -> BulkCancelResponse: ...
+    async def replay_dead(self, *, created_by: str, req: ReplayDeadJobsRequest) -> ReplayDeadJobsResponse: ...
+    async def enqueue_group(self, *, created_by: str, req: EnqueueJobGroupRequest) -> JobGroupPublic: ...
+    async def get_group(self, *, created_by: str, group_id: UUID) -> JobGroupPublic: ...
+    async def commit(self) -> str | None: ...
 
 def get_queue_client() -> QueueClient:
     """
@@ -55,28 +83,164 @@ def get_queue_client() -> QueueClient:
 AuthDep = Annotated[AuthContext, Depends(get_auth_context)]
 ClientDep = Annotated[QueueClient, Depends(get_queue_client)]
 
+# read-your-writes: writes return it, reads may send it back (see QueueClient.commit)
+CONSISTENCY_HEADER = "X-Consistency-Token"
+ConsistencyDep = Annotated[Optional[str], Header(alias=CONSISTENCY_HEADER)]
+
+
+async def _commit(response: Response, qc: QueueClient) -> None:
+    token = await qc.commit()
+    if token is not None:
+        response.headers[CONSISTENCY_HEADER] = token
+
+
+def job_etag(job: JobPublic, fields: tuple[str, ...] | None = None) -> str | None:
+    """
+    Strong ETag: every change to a job row bumps updated_at. A projection is a different
+    representation, so its tag also carries the field list; without updated_at there is none.
+    """
+    if fields is not None and "updated_at" not in fields:
+        return None
+    version = int(job.updated_at.timestamp() * 1_000_000)
+    if fields is None:
+        return f'"{job.id.hex}-{version:x}"'
+    return f'"{job.id.hex}-{version:x}-{zlib.crc32(",".join(fields).encode()):x}"'
+
+
+def _parse_fields(spec: str | None) -> tuple[str, ...] | None:
+    try:
+        return parse_job_fields(spec)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+# fields= projections: response documents hold only the requested fields
+FieldsDep = Annotated[
+    Optional[str],
+    Query(description="Comma-separated JobPublic fields to return, e.g. id,status,updated_at (id is always included)"),
+]
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # weak comparison, as RFC 9110 requires for If-None-Match
+    if if_none_match.strip() == "*":
+        return True
+    return any(t.strip().removeprefix("W/") == etag for t in if_none_match.split(","))
+
 
 # ---- Routes ----
 @router.post("/", response_model=JobPublic, status_code=status.HTTP_201_CREATED)
-async def enqueue_job(req: EnqueueJobRequest, auth: AuthDep, qc: ClientDep) -> JobPublic:
+async def enqueue_job(req: EnqueueJobRequest, response: Response, auth: AuthDep, qc: ClientDep) -> JobPublic:
     """
     Enqueue a job. Idempotency should be handled by QueueClient using (created_by, idempotency_key).
     """
-    return await qc.enqueue(created_by=auth.principal_id, req=req)
+    job = await qc.enqueue(created_by=auth.principal_id, req=req)
+    await _commit(response, qc)
+    return job
+
+@router.post(":batch", response_model=JobBatchPublic, status_code=status.HTTP_201_CREATED)
+async def enqueue_jobs(req: EnqueueJobBatchRequest, response: Response, auth: AuthDep, qc: ClientDep) -> JobBatchPublic:
+    """
+    Enqueue independent jobs in one round trip (what equeue.sdk.Producer batches into).
+    Returns one job per request, in request order.
+    """
+    batch = await qc.enqueue_many(created_by=auth.principal_id, req=req)
+    await _commit(response, qc)
+    return batch
 
-@router.get("/{job_id}", response_model=JobPublic)
-async def get_job(job_id: UUID, auth: AuthDep, qc: ClientDep) -> JobPublic:
+@router.post("/groups", response_model=JobGroupPublic, status_code=status.HTTP_201_CREATED)
+async def enqueue_group(req: EnqueueJobGroupRequest, response: Response, auth: AuthDep, qc: ClientDep) -> JobGroupPublic:
+    """
+    Enqueue a fan-in group: the callback job becomes runnable once every member is terminal.
+    """
+    group = await qc.enqueue_group(created_by=auth.principal_id, req=req)
+    await _commit(response, qc)
+    return group
+
+@router.post(":cancel", response_model=BulkCancelResponse)
+async def cancel_jobs(req: BulkCancelRequest, response: Response, auth: AuthDep, qc: ClientDep) -> BulkCancelResponse:
+    """
+    Bulk cancel by job_ids or by filters (queue, task_name, created range), with the
+    per-job cancel semantics. Returns counts, not rows.
+    """
+    result = await qc.cancel_many(created_by=auth.principal_id, req=req)
+    await _commit(response, qc)
+    return result
+
+@router.post(":replay", response_model=ReplayDeadJobsResponse)
+async def replay_dead_jobs(
+    req: ReplayDeadJobsRequest, response: Response, auth: AuthDep, qc: ClientDep
+) -> ReplayDeadJobsResponse:
+    """
+    Requeue dead jobs matching the filters, spreading their run_at over `spread_seconds`.
+    """
+    result = await qc.replay_dead(created_by=auth.principal_id, req=req)
+    await _commit(response, qc)
+    return result
+
+@router.get("/groups/{group_id}", response_model=JobGroupPublic)
+async def get_group(group_id: UUID, auth: AuthDep, qc: ClientDep) -> JobGroupPublic:
+    """
+    Group progress (remaining members) in one read, instead of polling every member.
+    """
+    return await qc.get_group(created_by=auth.principal_id, group_id=group_id)
+
+# registered before /{job_id}, which would otherwise match "changes"
+@router.get("/changes", response_model=JobChangesPage)
+async def list_changes(auth: AuthDep, qc: ClientDep, q: JobChangesQuery = Depends()) -> Union[JobChangesPage, Response]:
+    """
+    Change feed: jobs whose state changed since `since` (a previous next_token), oldest
+    first. Sync by polling with the returned next_token instead of re-listing jobs.
+    """
+    _parse_fields(q.fields)
+    if q.since is not None:
+        try:
+            decode_change_token(q.since)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc)) from exc
+    page = await qc.changes(created_by=auth.principal_id, q=q)
+    if q.fields is not None:
+        return JSONResponse(page.model_dump(mode="json", exclude_unset=True))
+    return page
+
+@router.get("/{job_id}", response_model=JobPublic, responses={304: {"description": "Not modified (If-None-Match)"}})
+async def get_job(
+    job_id: UUID,
+    response: Response,
+    auth: AuthDep,
+    qc: ClientDep,
+    token: ConsistencyDep = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    fields: FieldsDep = None,
+) -> Union[JobPublic, Response]:
     """
     Fetch a single job. Must enforce ownership in QueueClient (created_by).
+    Conditional: responds 304 when If-None-Match matches the job's ETag.
+    With `fields`, only those fields are returned (no ETag unless updated_at is one of them).
     """
-    return await qc.get(created_by=auth.principal_id, job_id=job_id)
+    names = _parse_fields(fields)
+    job = await qc.get(created_by=auth.principal_id, job_id=job_id, consistency_token=token, fields=names)
+    etag = job_etag(job, names)
+    if etag is not None and if_none_match is not None and etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    if names is not None:
+        headers = {"ETag": etag} if etag is not None else None
+        return JSONResponse(job.model_dump(mode="json", exclude_unset=True), headers=headers)
+    response.headers["ETag"] = etag
+    return job
 
 @router.get("/", response_model=JobListPage)
-async def list_jobs(auth: AuthDep, qc: ClientDep, q: JobListQuery = Depends()) -> JobListPage:
+async def list_jobs(
+    auth: AuthDep, qc: ClientDep, token: ConsistencyDep = None, q: JobListQuery = Depends()
+) -> Union[JobListPage, Response]:
     """
-    List jobs for the authenticated principal.
+    List jobs for the authenticated principal. `fields` trims every item to those fields.
     """
-    return await qc.list(created_by=auth.principal_id, q=q)
+    _parse_fields(q.fields)
+    page = await qc.list(created_by=auth.principal_id, q=q, consistency_token=token)
+    if q.fields is not None:
+        return JSONResponse(page.model_dump(mode="json", exclude_unset=True))
+    return page
 
 @router.post("/{job_id}/cancel", response_model=JobPublic)
 async def cancel_job(job_id: UUID, response: Response, auth: AuthDep, qc: ClientDep) -> JobPublic:
@@ -88,6 +252,7 @@ async def cancel_job(job_id: UUID, response: Response, auth: AuthDep, qc: Client
     We signal running-cancel with HTTP 202.
     """
     job, accepted = await qc.cancel(created_by=auth.principal_id, job_id=job_id)
+    await _commit(response, qc)
     if accepted and job.status.value == "running":
         response.status_code = status.HTTP_202_ACCEPTED
     return job
@@ -27,4 +27,26 @@ def decode_cursor(cursor: str) -> Cursor:
     return Cursor(
         created_at=datetime.fromisoformat(payload["created_at"]),
         id=UUID(payload["id"]),
-    )
\ No newline at end of file
+    )
+
+
+@dataclass(frozen=True)
+class ChangeToken:
+    updated_at: datetime
+    id: UUID
+
+
+def encode_change_token(updated_at: datetime, id: UUID) -> str:
+    payload = {"updated_at": updated_at.isoformat(), "id": str(id)}
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_change_token(token: str) -> ChangeToken:
+    """
+    Raises ValueError on anything encode_change_token did not produce.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8"))
+        return ChangeToken(updated_at=datetime.fromisoformat(payload["updated_at"]), id=UUID(payload["id"]))
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("invalid change token") from exc
@@ -0,0 +1,186 @@
+#src/equeue/db/hooks.py
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from contextlib import AbstractAsyncContextManager, AbstractContextManager
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, Callable, Mapping, Protocol
+
+from sqlalchemy import TextClause, bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger("equeue.db")
+
+
+@dataclass
+class StatementEvent:
+    """
+    One repo statement, as seen by hooks. Only built when the repo has hooks configured.
+    `operation` is the repo method name (insert_job, claim_jobs, ...), i.e. the job lifecycle step.
+    """
+    operation: str
+    sql: TextClause
+    params: Mapping[str, Any]
+    queue: str | None = None
+
+    elapsed: float = 0.0
+    rowcount: int = 0
+    error: BaseException | None = None
+
+
+class StatementHook(Protocol):
+    def before(self, event: StatementEvent) -> Any: ...
+    # returns an opaque token handed back to after() (e.g. a span)
+    def after(self, event: StatementEvent, token: Any) -> None: ...
+
+
+def param_shape(params: Mapping[str, Any]) -> dict[str, str]:
+    """
+    Describe parameters without logging their values (payloads may hold user data).
+    """
+    shape: dict[str, str] = {}
+    for k, v in params.items():
+        if v is None:
+            shape[k] = "null"
+        elif isinstance(v, (str, bytes, list, tuple, dict)):
+            shape[k] = f"{type(v).__name__}[{len(v)}]"
+        else:
+            shape[k] = type(v).__name__
+    return shape
+
+
+# ------------------------------------------------------------------
+# Slow-query log + sampled EXPLAIN
+# ------------------------------------------------------------------
+
+ConnectFactory = Callable[[], AbstractAsyncContextManager[AsyncConnection]]
+
+
+class SlowQueryHook:
+    """
+    Logs statements slower than `threshold` seconds and, when `connect` is given, captures
+    `EXPLAIN (ANALYZE, BUFFERS)` for them on a separate connection in a background task.
+
+    The EXPLAIN re-executes the statement, so it always runs in a transaction (or savepoint)
+    that is rolled back. It is sampled (`explain_sample_rate`) and rate-limited per operation
+    (`explain_min_interval`) so a regression does not turn into an EXPLAIN storm.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float,
+        connect: ConnectFactory | None = None,
+        explain_sample_rate: float = 1.0,
+        explain_min_interval: float = 60.0,
+        explain_timeout_ms: int = 30_000,
+        on_plan: Callable[[StatementEvent, str], None] | None = None,
+    ):
+        self.threshold = threshold
+        self.connect = connect
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_min_interval = explain_min_interval
+        self.explain_timeout_ms = explain_timeout_ms
+        self.on_plan = on_plan or self._log_plan
+
+        self._last_explain: dict[str, float] = {}
+        self._pending: set[asyncio.Task] = set()
+
+    def before(self, event: StatementEvent) -> None:
+        return None
+
+    def after(self, event: StatementEvent, token: Any) -> None:
+        if event.error is not None or event.elapsed < self.threshold:
+            return
+
+        logger.warning(
+            "slow statement operation=%s queue=%s elapsed_ms=%.1f rows=%d params=%s",
+            event.operation,
+            event.queue,
+            event.elapsed * 1000,
+            event.rowcount,
+            param_shape(event.params),
+        )
+        if self._should_explain(event.operation):
+            task = asyncio.get_running_loop().create_task(self._explain(event))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def wait(self) -> None:
+        """
+        Wait for in-flight EXPLAIN captures (shutdown/tests).
+        """
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def _should_explain(self, operation: str) -> bool:
+        if self.connect is None or random.random() >= self.explain_sample_rate:
+            return False
+        now = monotonic()
+        last = self._last_explain.get(operation)
+        if last is not None and now - last < self.explain_min_interval:
+            return False
+        self._last_explain[operation] = now
+        return True
+
+    async def _explain(self, event: StatementEvent) -> None:
+        sql = text(f"EXPLAIN (ANALYZE, BUFFERS) {event.sql.text}")
+        # keep jsonb params typed like the original statement
+        typed = [bindparam(k, type_=JSONB) for k, v in event.params.items() if isinstance(v, dict)]
+        if typed:
+            sql = sql.bindparams(*typed)
+
+        try:
+            async with self.connect() as conn:
+                tx = await (conn.begin_nested() if conn.in_transaction() else conn.begin())
+                try:
+                    await conn.execute(text(f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}"))
+                    res = await conn.execute(sql, dict(event.params))
+                    plan = "\n".join(r[0] for r in res.all())
+                finally:
+                    await tx.rollback()
+        except Exception:
+            logger.exception("EXPLAIN capture failed for operation=%s", event.operation)
+            return
+
+        self.on_plan(event, plan)
+
+    @staticmethod
+    def _log_plan(event: StatementEvent, plan: str) -> None:
+        logger.warning("plan for slow statement operation=%s:\n%s", event.operation, plan)
+
+
+# ------------------------------------------------------------------
+# Tracing
+# ------------------------------------------------------------------
+
+class TracingHook:
+    """
+    Opens one span per repo statement, named `equeue.<operation>`.
+
+    `start_span(name, attributes)` returns a context manager, e.g. with OpenTelemetry:
+        TracingHook(lambda name, attrs: tracer.start_as_current_span(name, attributes=attrs))
+    """
+
+    def __init__(self, start_span: Callable[[str, dict[str, Any]], AbstractContextManager[Any]]):
+        self.start_span = start_span
+
+    def before(self, event: StatementEvent) -> AbstractContextManager[Any]:
+        attrs = {"equeue.operation": event.operation}
+        if event.queue is not None:
+            attrs["equeue.queue"] = event.queue
+        cm = self.start_span(f"equeue.{event.operation}", attrs)
+        cm.__enter__()
+        return cm
+
+    def after(self, event: StatementEvent, token: AbstractContextManager[Any]) -> None:
+        err = event.error
+        if err is None:
+            token.__exit__(None, None, None)
+        else:
+            token.__exit__(type(err), err, err.__traceback__)
@@ -2,31 +2,61 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Any
-from uuid import UUID
+import json
+import logging
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from time import monotonic, perf_counter
+from typing import Any, Callable, Sequence
+from uuid import UUID, uuid4
 
-from sqlalchemy import text, bindparam
+from sqlalchemy import RowMapping, TextClause, text, bindparam
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from equeue.api.models.jobs import (
+    BulkCancelRequest,
+    BulkCancelResponse,
+    DedupePolicy,
+    EnqueueJobGroupRequest,
     EnqueueJobRequest,
+    JobChangesPage,
+    JobChangesQuery,
+    JobGroupPublic,
     JobListPage,
     JobListQuery,
     JobPublic,
     JobStatus,
+    ReplayDeadJobsRequest,
+    ReplayDeadJobsResponse,
 )
 
-from equeue.db.cursor import decode_cursor, encode_cursor
+from equeue.db.cursor import decode_change_token, decode_cursor, encode_change_token, encode_cursor
+from equeue.db.hooks import StatementEvent, StatementHook
+from equeue.db.payloads import PayloadCache, canonical_payload
+from equeue.db.records import JobRecord
+from equeue.db.sharding import sharded_job_id
+from equeue.observability.metrics import ANY_QUEUE, repo_metrics
 
 
+logger = logging.getLogger("equeue.db")
 
-def _row_to_job(row: Any) -> JobPublic:
+# run_at of a group callback still waiting for its members ('infinity' in Postgres)
+HELD_RUN_AT = datetime.max.replace(tzinfo=timezone.utc)
+
+# jobs.claim_bucket is in [0, CLAIM_BUCKETS) (db/migrations/007_claim_buckets.sql)
+CLAIM_BUCKETS = 64
+
+# token of a hook whose before() raised; its after() is skipped
+_HOOK_FAILED = object()
+
+
+def _row_to_job(row: Any, payload: dict[str, Any] | None = None) -> JobPublic:
     """
     SQLAlchemy row -> JobPublic
     Assumes row has columns matching jobs table.
+    `payload` overrides the row's (resolved out-of-line payload, see SqlAlchemyJobRepo._to_jobs).
     """
     # row may be RowMapping or similar
     r = dict(row)
@@ -39,9 +69,10 @@ def _row_to_job(row: Any) -> JobPublic:
         task_name=r["task_name"],
         status=JobStatus(r["status"]) if not isinstance(r["status"], JobStatus) else r["status"],
         queue=r["queue"],
-        payload=r["payload"] or {},
+        payload=payload if payload is not None else (r["payload"] or {}),
         priority=r["priority"],
-        run_at=r["run_at"],
+        # asyncpg decodes 'infinity' as a naive datetime.max
+        run_at=HELD_RUN_AT if r["run_at"] == datetime.max else r["run_at"],
         attempts=r["attempts"],
         max_attempts=r["max_attempts"],
         created_by=r["created_by"],
@@ -49,27 +80,304 @@ def _row_to_job(row: Any) -> JobPublic:
         updated_at=r["updated_at"],
         cancel_requested_at=r.get("cancel_requested_at"),
         last_error=last_error,  # can be dict; model will normalize if typed as JobError|None
+        group_id=r.get("group_id"),
     )
 
     return model
 
 
+# jobs columns of a JobRecord (alias j); the payload stays JSON text until a task reads it
+_RECORD_COLUMNS = """
+    j.id, j.task_name, j.status, j.queue, j.payload::text AS payload, j.payload_hash,
+    j.priority, j.run_at, j.attempts, j.max_attempts, j.created_by, j.created_at,
+    j.updated_at, j.cancel_requested_at, j.last_error, j.group_id
+"""
+
+
+def _row_to_record(row: Any, payload_json: str) -> JobRecord:
+    """
+    _RECORD_COLUMNS row -> JobRecord, unvalidated (the worker's claim/ack path).
+    """
+    return JobRecord(
+        id=row["id"],
+        task_name=row["task_name"],
+        status=JobStatus(row["status"]),
+        queue=row["queue"],
+        payload_json=payload_json,
+        priority=row["priority"],
+        run_at=row["run_at"],
+        attempts=row["attempts"],
+        max_attempts=row["max_attempts"],
+        created_by=row["created_by"],
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+        cancel_requested_at=row["cancel_requested_at"],
+        last_error=row["last_error"],
+        group_id=row["group_id"],
+    )
+
+
+def _row_to_partial_job(row: Any, fields: tuple[str, ...], payload: dict[str, Any] | None = None) -> JobPublic:
+    """
+    Projected row -> unvalidated JobPublic holding only `fields` (see parse_job_fields).
+    Skips validation on purpose: that is most of the cost a projection is meant to save.
+    """
+    values: dict[str, Any] = {}
+    for f in fields:
+        v = row[f]
+        if f == "status":
+            v = JobStatus(v)
+        elif f == "run_at" and v == datetime.max:
+            v = HELD_RUN_AT
+        elif f == "payload":
+            v = payload if payload is not None else (v or {})
+        values[f] = v
+    return JobPublic.model_construct(**values)
+
+
+def _select_columns(fields: tuple[str, ...] | None, *extra: str) -> str:
+    """
+    SELECT list for a projection. Names come from parse_job_fields (JobPublic fields = jobs columns).
+    """
+    if fields is None:
+        return "*"
+    columns = dict.fromkeys([*fields, *extra])
+    if "payload" in columns:
+        columns["payload_hash"] = None
+    return ", ".join(columns)
+
+
+def _row_to_group(row: Any, job_ids: list[UUID] | None = None) -> JobGroupPublic:
+    r = dict(row)
+    return JobGroupPublic(
+        id=r["id"],
+        created_by=r["created_by"],
+        total=r["total"],
+        remaining=r["remaining"],
+        callback_job_id=r["callback_job_id"],
+        created_at=r["created_at"],
+        completed_at=r["completed_at"],
+        job_ids=job_ids,
+    )
+
+
+def claim_order(job: JobPublic | JobRecord) -> tuple:
+    """
+    Sort key matching jobs_runnable_idx: (run_at, priority DESC, created_at, id).
+    """
+    return (job.run_at, -job.priority, job.created_at, job.id)
+
+
+@dataclass(frozen=True)
+class JobFailure:
+    """
+    One failed attempt, as handed to fail_jobs(). `run_at` is when a retry may run.
+    """
+    job_id: UUID
+    error: dict[str, Any]
+    retryable: bool
+    run_at: datetime
+
+
+def lease_expired_error(now: datetime) -> dict[str, Any]:
+    """
+    JobError-shaped last_error written when a lease is reaped.
+    """
+    return {
+        "type": "LeaseExpired",
+        "message": "worker lease expired before the job finished",
+        "retryable": True,
+        "happened_at": now.isoformat(),
+    }
+
+
+def _chunk_now(now: datetime, started: float) -> datetime:
+    """
+    Timestamp for one chunk of a chunked write: `now` advanced by the time spent since
+    `started` (monotonic), so each chunk carries roughly its own commit time.
+    """
+    return now + timedelta(seconds=monotonic() - started)
+
+
 @dataclass(frozen=True)
 class SqlAlchemyJobRepo:
     """
     Non-leaky repo: get/cancel are scoped by created_by in SQL.
+
+    Payloads of at least `payload_threshold` bytes (canonical JSON) are stored once per
+    content hash in job_payloads; jobs only reference them. Reads resolve them through
+    `payload_cache` (share one per process) and fetch misses in one statement.
+
+    The repo never commits `session`: whoever opened it does (e.g. session_scope()).
+    Chunked writes (cancel_jobs, replay_dead_jobs) commit each chunk in its own transaction on a session
+    from `chunk_sessions`; without one, every chunk runs in the caller's transaction.
     """
     session: AsyncSession
+    hooks: tuple[StatementHook, ...] = ()
+    payload_threshold: int | None = None    # None: always inline
+    payload_cache: PayloadCache | None = None
+    shard: int | None = None                # set under ShardedJobRepo: job ids encode it
+    # sessions for chunked writes, e.g. the async_sessionmaker `session` came from
+    chunk_sessions: Callable[[], AbstractAsyncContextManager[AsyncSession]] | None = None
+
+    def _new_id(self) -> UUID:
+        return uuid4() if self.shard is None else sharded_job_id(self.shard)
+
+    @asynccontextmanager
+    async def _chunk(self):
+        """
+        Repo for one chunk of a chunked write: a short transaction of its own, committed
+        on exit, when chunk_sessions is set; else this repo, in the caller's transaction.
+        """
+        if self.chunk_sessions is None:
+            yield self
+            return
+        async with self.chunk_sessions() as session:
+            async with session.begin():
+                yield replace(self, session=session)
+
+    async def _fetch(
+        self, operation: str, sql: TextClause, params: dict[str, Any], *, queue: str | None = None
+    ) -> Sequence[RowMapping]:
+        """
+        Single choke point for statement execution: every repo statement is timed and
+        counted here, labelled by operation and queue (from the arg, else the first row),
+        and passed through the configured hooks (slow-query log, tracing).
+        """
+        event = None
+        tokens: list[Any] = []
+        if self.hooks:
+            event = StatementEvent(operation=operation, sql=sql, params=params, queue=queue)
+            tokens = self._run_before_hooks(event)
+
+        start = perf_counter()
+        try:
+            res = await self.session.execute(sql, params)
+            rows = res.mappings().all()
+        except Exception as exc:
+            repo_metrics(operation, queue or ANY_QUEUE).errors.inc()
+            if event is not None:
+                event.elapsed = perf_counter() - start
+                event.error = exc
+                self._run_after_hooks(event, tokens)
+            raise
+        elapsed = perf_counter() - start
+
+        if queue is None:
+            queue = rows[0].get("queue", ANY_QUEUE) if rows else ANY_QUEUE
+        m = repo_metrics(operation, queue)
+        m.latency.observe(elapsed)
+        m.rows.inc(len(rows))
+
+        if event is not None:
+            event.queue = queue
+            event.elapsed = elapsed
+            event.rowcount = len(rows)
+            self._run_after_hooks(event, tokens)
+        return rows
+
+    def _run_before_hooks(self, event: StatementEvent) -> list[Any]:
+        # hooks are observability only: never let them fail the statement
+        tokens: list[Any] = []
+        for hook in self.hooks:
+            try:
+                tokens.append(hook.before(event))
+            except Exception:
+                logger.exception("statement hook %r failed", hook)
+                tokens.append(_HOOK_FAILED)
+        return tokens
+
+    def _run_after_hooks(self, event: StatementEvent, tokens: list[Any]) -> None:
+        for hook, token in zip(self.hooks, tokens):
+            if token is _HOOK_FAILED:
+                continue  # its before() raised: nothing to close
+            try:
+                hook.after(event, token)
+            except Exception:
+                logger.exception("statement hook %r failed", hook)
+
+    def _split_payload(self, payload: dict[str, Any]) -> tuple[dict[str, Any], bytes | None, str | None]:
+        """
+        (inline payload, hash, body): out of line once the body reaches payload_threshold.
+        """
+        if self.payload_threshold is None:
+            return payload, None, None
+        body, digest = canonical_payload(payload)
+        if len(body.encode()) < self.payload_threshold:
+            return payload, None, None
+        return {}, digest, body
+
+    async def _payload_bodies(self, rows: Sequence[RowMapping]) -> dict[bytes, str]:
+        """
+        JSON bodies of the rows' out-of-line payloads, by hash (cache first, then one SELECT).
+        """
+        digests = {r["payload_hash"] for r in rows if r.get("payload_hash") is not None}
+        if not digests:
+            return {}
+
+        bodies: dict[bytes, str] = {}
+        for digest in digests:
+            body = self.payload_cache.get(digest) if self.payload_cache is not None else None
+            if body is not None:
+                bodies[digest] = body
+
+        missing = [d for d in digests if d not in bodies]
+        if missing:
+            sql = text(
+                """
+                SELECT hash, body::text AS body
+                FROM job_payloads
+                WHERE hash = ANY(:hashes)
+                """
+            )
+            for r in await self._fetch("get_payloads", sql, {"hashes": missing}, queue=ANY_QUEUE):
+                digest = bytes(r["hash"])
+                bodies[digest] = r["body"]
+                if self.payload_cache is not None:
+                    self.payload_cache.put(digest, r["body"])
+        return bodies
+
+    async def _to_jobs(self, rows: Sequence[RowMapping], fields: tuple[str, ...] | None = None) -> list[JobPublic]:
+        """
+        Rows -> JobPublic (or projections of `fields`), resolving out-of-line payloads.
+        """
+        def convert(r: RowMapping, payload: dict[str, Any] | None = None) -> JobPublic:
+            return _row_to_job(r, payload) if fields is None else _row_to_partial_job(r, fields, payload)
+
+        bodies = await self._payload_bodies(rows)
+        return [
+            convert(r, json.loads(bodies[bytes(r["payload_hash"])]) if r.get("payload_hash") is not None else None)
+            for r in rows
+        ]
+
+    async def _to_records(self, rows: Sequence[RowMapping]) -> list[JobRecord]:
+        """
+        _RECORD_COLUMNS rows -> JobRecord, resolving out-of-line payloads without decoding them.
+        """
+        bodies = await self._payload_bodies(rows)
+        return [
+            _row_to_record(r, bodies[bytes(r["payload_hash"])] if r["payload_hash"] is not None else r["payload"])
+            for r in rows
+        ]
 
     async def insert_job(self, *, created_by: str, req: EnqueueJobRequest, now: datetime) -> JobPublic:
+        if req.dedupe_key is not None:
+            return (await self._insert_deduped(created_by=created_by, reqs=[req], now=now))[req.dedupe_key]
+
         sql = text(
             """
+            WITH stored AS (
+                INSERT INTO job_payloads (hash, body)
+                SELECT CAST(:payload_hash AS bytea), CAST(:payload_body AS jsonb)
+                WHERE CAST(:payload_hash AS bytea) IS NOT NULL
+                ON CONFLICT (hash) DO NOTHING
+            )
             INSERT INTO jobs (
-                task_name, status, queue, payload, priority, run_at, attempts, max_attempts,
+                id, task_name, status, queue, payload, payload_hash, priority, run_at, attempts, max_attempts,
                 last_error, created_by, cancel_requested_at, idempotency_key
             )
             VALUES (
-                :task_name, 'queued', :queue, :payload, :priority, :run_at,
+                :id, :task_name, 'queued', :queue, :payload, :payload_hash, :priority, :run_at,
                 0, :max_attempts, NULL, :created_by, NULL, :idempotency_key     
             )
             ON CONFLICT (created_by, idempotency_key)
@@ -79,10 +387,14 @@ class SqlAlchemyJobRepo:
             """
         ).bindparams(bindparam("payload", type_=JSONB))
 
+        payload, payload_hash, payload_body = self._split_payload(req.payload)
         params = {
+            "id": self._new_id(),
             "task_name": req.task_name,
             "queue": req.queue,
-            "payload": req.payload,
+            "payload": payload,
+            "payload_hash": payload_hash,
+            "payload_body": payload_body,
             "priority": req.priority,
             "run_at": req.run_at if req.run_at is not None else now,
             "max_attempts": 25,
@@ -90,23 +402,323 @@ class SqlAlchemyJobRepo:
             "idempotency_key": req.idempotency_key,
         }
 
-        res = await self.session.execute(sql, params)
-        row = res.mappings().one()
-        return _row_to_job(row)
+        rows = await self._fetch("insert_job", sql, params, queue=req.queue)
+        return (await self._to_jobs(rows))[0]
+
+    async def insert_jobs(self, *, created_by: str, reqs: list[EnqueueJobRequest], now: datetime) -> list[JobPublic]:
+        """
+        Many independent jobs in one statement; returns one job per request, in order.
+        Requests repeating an idempotency key (within the batch or from earlier) get the
+        existing job, as insert_job() does; so do requests sharing a dedupe key, once
+        merged (see _insert_deduped).
+        """
+        deduped: dict[str, JobPublic] = {}
+        if any(r.dedupe_key is not None for r in reqs):
+            deduped = await self._insert_deduped(
+                created_by=created_by, reqs=[r for r in reqs if r.dedupe_key is not None], now=now
+            )
+            plain = [r for r in reqs if r.dedupe_key is None]
+            inserted = iter(await self.insert_jobs(created_by=created_by, reqs=plain, now=now) if plain else [])
+            return [deduped[r.dedupe_key] if r.dedupe_key is not None else next(inserted) for r in reqs]
 
-    async def get_job(self, *, created_by: str, job_id: UUID) -> JobPublic | None:
+        sql = text(
+            """
+            WITH stored AS (
+                INSERT INTO job_payloads (hash, body)
+                SELECT s.hash, s.body::jsonb
+                FROM unnest(CAST(:store_hashes AS bytea[]), CAST(:store_bodies AS text[])) AS s(hash, body)
+                ON CONFLICT (hash) DO NOTHING
+            )
+            INSERT INTO jobs (
+                id, task_name, status, queue, payload, payload_hash, priority, run_at, attempts, max_attempts,
+                created_by, idempotency_key
+            )
+            SELECT
+                j.id, j.task_name, 'queued', j.queue, j.payload::jsonb, j.payload_hash, j.priority, j.run_at,
+                0, :max_attempts, :created_by, j.idempotency_key
+            FROM unnest(
+                CAST(:ids AS uuid[]),
+                CAST(:task_names AS text[]),
+                CAST(:queues AS text[]),
+                CAST(:payloads AS text[]),
+                CAST(:payload_hashes AS bytea[]),
+                CAST(:priorities AS integer[]),
+                CAST(:run_ats AS timestamptz[]),
+                CAST(:idempotency_keys AS text[])
+            ) AS j(id, task_name, queue, payload, payload_hash, priority, run_at, idempotency_key)
+            ON CONFLICT (created_by, idempotency_key)
+            WHERE idempotency_key is NOT NULL
+            DO UPDATE SET idempotency_key = EXCLUDED.idempotency_key
+            RETURNING *
+            """
+        )
+
+        # ON CONFLICT DO UPDATE cannot touch one row twice: send each key once
+        keys: set[str] = set()
+        unique: list[tuple[UUID, EnqueueJobRequest]] = []
+        ids = [self._new_id() for _ in reqs]
+        for job_id, r in zip(ids, reqs):
+            if r.idempotency_key is not None:
+                if r.idempotency_key in keys:
+                    continue
+                keys.add(r.idempotency_key)
+            unique.append((job_id, r))
+
+        split = [self._split_payload(r.payload) for _, r in unique]
+        store = {digest: body for _, digest, body in split if digest}
+        params = {
+            "created_by": created_by,
+            "max_attempts": 25,
+            "ids": [job_id for job_id, _ in unique],
+            "task_names": [r.task_name for _, r in unique],
+            "queues": [r.queue for _, r in unique],
+            "payloads": [json.dumps(payload) for payload, _, _ in split],
+            "payload_hashes": [digest for _, digest, _ in split],
+            "store_hashes": list(store),
+            "store_bodies": list(store.values()),
+            "priorities": [r.priority for _, r in unique],
+            "run_ats": [r.run_at if r.run_at is not None else now for _, r in unique],
+            "idempotency_keys": [r.idempotency_key for _, r in unique],
+        }
+
+        queues = {r.queue for r in reqs}
+        queue = next(iter(queues)) if len(queues) == 1 else ANY_QUEUE
+        rows = await self._fetch("insert_jobs", sql, params, queue=queue)
+        jobs = await self._to_jobs(rows)
+        by_id = {j.id: j for j in jobs}
+        by_key = {r["idempotency_key"]: j for r, j in zip(rows, jobs) if r["idempotency_key"] is not None}
+        return [by_key[r.idempotency_key] if r.idempotency_key is not None else by_id[i] for i, r in zip(ids, reqs)]
+
+    async def _insert_deduped(
+        self, *, created_by: str, reqs: list[EnqueueJobRequest], now: datetime
+    ) -> dict[str, JobPublic]:
+        """
+        Enqueue requests carrying a dedupe_key; returns the job each key resolved to.
+
+        Requests sharing a key are merged here first (ON CONFLICT DO UPDATE cannot touch
+        one row twice), then each key either inserts or merges into its queued job through
+        jobs_dedupe_queued_uniq: one statement per policy in the batch.
+        """
+        merged: dict[str, EnqueueJobRequest] = {}
+        for r in reqs:
+            if r.run_at is None:
+                r = r.model_copy(update={"run_at": now})
+            first = merged.get(r.dedupe_key)
+            if first is None:
+                merged[r.dedupe_key] = r
+            elif r.dedupe_policy == DedupePolicy.replace_payload:
+                merged[r.dedupe_key] = first.model_copy(update={"payload": r.payload})
+            elif r.dedupe_policy == DedupePolicy.extend_run_at:
+                merged[r.dedupe_key] = first.model_copy(update={"run_at": max(first.run_at, r.run_at)})
+
+        jobs: dict[str, JobPublic] = {}
+        for policy in DedupePolicy:
+            batch = [r for r in merged.values() if r.dedupe_policy == policy]
+            if batch:
+                jobs.update(await self._upsert_deduped(created_by=created_by, reqs=batch, policy=policy, now=now))
+        return jobs
+
+    async def _upsert_deduped(
+        self, *, created_by: str, reqs: list[EnqueueJobRequest], policy: DedupePolicy, now: datetime
+    ) -> dict[str, JobPublic]:
+        merge = {
+            # a no-op update still returns the row (DO NOTHING would not)
+            DedupePolicy.keep_first: "dedupe_key = EXCLUDED.dedupe_key",
+            DedupePolicy.replace_payload: (
+                "payload = EXCLUDED.payload, payload_hash = EXCLUDED.payload_hash, updated_at = :now"
+            ),
+            DedupePolicy.extend_run_at: "run_at = GREATEST(jobs.run_at, EXCLUDED.run_at), updated_at = :now",
+        }[policy]
+        sql = text(
+            f"""
+            WITH stored AS (
+                INSERT INTO job_payloads (hash, body)
+                SELECT s.hash, s.body::jsonb
+                FROM unnest(CAST(:store_hashes AS bytea[]), CAST(:store_bodies AS text[])) AS s(hash, body)
+                ON CONFLICT (hash) DO NOTHING
+            )
+            INSERT INTO jobs (
+                id, task_name, status, queue, payload, payload_hash, priority, run_at, attempts, max_attempts,
+                created_by, dedupe_key
+            )
+            SELECT
+                j.id, j.task_name, 'queued', j.queue, j.payload::jsonb, j.payload_hash, j.priority, j.run_at,
+                0, :max_attempts, :created_by, j.dedupe_key
+            FROM unnest(
+                CAST(:ids AS uuid[]),
+                CAST(:task_names AS text[]),
+                CAST(:queues AS text[]),
+                CAST(:payloads AS text[]),
+                CAST(:payload_hashes AS bytea[]),
+                CAST(:priorities AS integer[]),
+                CAST(:run_ats AS timestamptz[]),
+                CAST(:dedupe_keys AS text[])
+            ) AS j(id, task_name, queue, payload, payload_hash, priority, run_at, dedupe_key)
+            ON CONFLICT (created_by, dedupe_key)
+            WHERE status = 'queued' AND dedupe_key IS NOT NULL
+            DO UPDATE SET {merge}
+            RETURNING *
+            """
+        )
+
+        split = [self._split_payload(r.payload) for r in reqs]
+        store = {digest: body for _, digest, body in split if digest}
+        params = {
+            "created_by": created_by,
+            "max_attempts": 25,
+            "now": now,
+            "ids": [self._new_id() for _ in reqs],
+            "task_names": [r.task_name for r in reqs],
+            "queues": [r.queue for r in reqs],
+            "payloads": [json.dumps(payload) for payload, _, _ in split],
+            "payload_hashes": [digest for _, digest, _ in split],
+            "store_hashes": list(store),
+            "store_bodies": list(store.values()),
+            "priorities": [r.priority for r in reqs],
+            "run_ats": [r.run_at for r in reqs],
+            "dedupe_keys": [r.dedupe_key for r in reqs],
+        }
+
+        queues = {r.queue for r in reqs}
+        queue = next(iter(queues)) if len(queues) == 1 else ANY_QUEUE
+        rows = await self._fetch("insert_deduped", sql, params, queue=queue)
+        jobs = await self._to_jobs(rows)
+        return {r["dedupe_key"]: j for r, j in zip(rows, jobs)}
+
+    async def insert_group(self, *, created_by: str, req: EnqueueJobGroupRequest, now: datetime) -> JobGroupPublic:
+        """
+        Callback (held at run_at = 'infinity'), group row and all members in one statement.
+        The trg_jobs_group_member trigger counts members down and releases the callback.
+        """
+        sql = text(
+            """
+            WITH stored AS (
+                -- one row per distinct out-of-line body, however many members share it
+                INSERT INTO job_payloads (hash, body)
+                SELECT s.hash, s.body::jsonb
+                FROM unnest(CAST(:store_hashes AS bytea[]), CAST(:store_bodies AS text[])) AS s(hash, body)
+                ON CONFLICT (hash) DO NOTHING
+            ),
+            callback AS (
+                INSERT INTO jobs (
+                    id, task_name, status, queue, payload, payload_hash, priority, run_at, attempts, max_attempts,
+                    created_by
+                )
+                VALUES (
+                    :cb_id, :cb_task_name, 'queued', :cb_queue, :cb_payload, CAST(:cb_payload_hash AS bytea), :cb_priority,
+                    'infinity', 0, :max_attempts, :created_by
+                )
+                RETURNING id
+            ),
+            grp AS (
+                INSERT INTO job_groups (created_by, total, remaining, callback_job_id, callback_run_at, created_at)
+                SELECT :created_by, :total, :total, callback.id, :cb_run_at, :now
+                FROM callback
+                RETURNING *
+            ),
+            members AS (
+                INSERT INTO jobs (
+                    id, task_name, status, queue, payload, payload_hash, priority, run_at, attempts, max_attempts,
+                    created_by, group_id
+                )
+                SELECT
+                    m.id, m.task_name, 'queued', m.queue, m.payload::jsonb, m.payload_hash, m.priority, m.run_at,
+                    0, :max_attempts, :created_by, grp.id
+                FROM unnest(
+                    CAST(:ids AS uuid[]),
+                    CAST(:task_names AS text[]),
+                    CAST(:queues AS text[]),
+                    CAST(:payloads AS text[]),
+                    CAST(:payload_hashes AS bytea[]),
+                    CAST(:priorities AS integer[]),
+                    CAST(:run_ats AS timestamptz[])
+                ) AS m(id, task_name, queue, payload, payload_hash, priority, run_at)
+                CROSS JOIN grp
+                RETURNING 1
+            )
+            SELECT grp.*, (SELECT count(*) FROM members) AS inserted
+            FROM grp
+            """
+        ).bindparams(bindparam("cb_payload", type_=JSONB))
+
+        ids = [self._new_id() for _ in req.jobs]
+        cb = req.callback
+        cb_payload, cb_payload_hash, cb_body = self._split_payload(cb.payload)
+        members = [self._split_payload(j.payload) for j in req.jobs]
+        store = {digest: body for _, digest, body in [*members, (cb_payload, cb_payload_hash, cb_body)] if digest}
+        params = {
+            "created_by": created_by,
+            "now": now,
+            "max_attempts": 25,
+            "total": len(req.jobs),
+            "cb_id": self._new_id(),
+            "cb_task_name": cb.task_name,
+            "cb_queue": cb.queue,
+            "cb_payload": cb_payload,
+            "cb_payload_hash": cb_payload_hash,
+            "cb_priority": cb.priority,
+            "cb_run_at": cb.run_at if cb.run_at is not None else now,
+            "ids": ids,
+            "task_names": [j.task_name for j in req.jobs],
+            "queues": [j.queue for j in req.jobs],
+            "payloads": [json.dumps(payload) for payload, _, _ in members],
+            "payload_hashes": [digest for _, digest, _ in members],
+            "store_hashes": list(store),
+            "store_bodies": list(store.values()),
+            "priorities": [j.priority for j in req.jobs],
+            "run_ats": [j.run_at if j.run_at is not None else now for j in req.jobs],
+        }
+
+        rows = await self._fetch("insert_group", sql, params, queue=cb.queue)
+        return _row_to_group(rows[0], job_ids=ids)
+
+    async def get_group(self, *, created_by: str, group_id: UUID) -> JobGroupPublic | None:
         sql = text(
             """
             SELECT *
+            FROM job_groups
+            WHERE id = :group_id
+                AND created_by = :created_by
+            """
+        )
+
+        rows = await self._fetch("get_group", sql, {"group_id": group_id, "created_by": created_by}, queue=ANY_QUEUE)
+        return _row_to_group(rows[0]) if rows else None
+
+    async def get_job(
+        self, *, created_by: str, job_id: UUID, fields: tuple[str, ...] | None = None
+    ) -> JobPublic | None:
+        sql = text(
+            f"""
+            SELECT {_select_columns(fields)}
             FROM jobs
             WHERE id = :job_id
                 AND created_by = :created_by
             """
         )
 
-        res = await self.session.execute(sql, {"job_id": job_id, "created_by": created_by})
-        row = res.mappings().first()
-        return _row_to_job(row) if row else None
+        rows = await self._fetch("get_job", sql, {"job_id": job_id, "created_by": created_by})
+        return (await self._to_jobs(rows, fields))[0] if rows else None
+
+    async def get_jobs_by_idempotency_key(self, *, created_by: str, keys: list[str]) -> dict[str, JobPublic]:
+        """
+        Existing jobs for these idempotency keys, by key (jobs_idempotency_uniq).
+        Lets ShardedJobRepo find a key written on another shard before enqueueing.
+        """
+        if not keys:
+            return {}
+
+        sql = text(
+            """
+            SELECT *
+            FROM jobs
+            WHERE created_by = :created_by
+                AND idempotency_key = ANY(:keys)
+            """
+        )
+
+        rows = await self._fetch("get_jobs_by_idempotency_key", sql, {"created_by": created_by, "keys": list(keys)})
+        return {r["idempotency_key"]: j for r, j in zip(rows, await self._to_jobs(rows))}
     
     async def list_jobs(self, *, created_by: str, q: JobListQuery) -> JobListPage:
         cursor_created_at = None
@@ -119,9 +731,10 @@ class SqlAlchemyJobRepo:
         statuses = [s.value for s in q.status] if q.status else None
         limit_plus_one = q.limit + 1
 
+        fields = q.field_names
         sql = text(
-            """
-            SELECT *
+            f"""
+            SELECT {_select_columns(fields, "created_at", "id")}
             FROM jobs
             WHERE created_by = :created_by
             AND (:statuses_is_null OR status = ANY(CAST(:statuses AS job_status[])))
@@ -158,17 +771,55 @@ class SqlAlchemyJobRepo:
             "limit_plus_one": limit_plus_one,
         }
 
-        res = await self.session.execute(sql, params)
-        rows = res.mappings().all()
+        rows = await self._fetch("list_jobs", sql, params, queue=q.queue or ANY_QUEUE)
 
-        items = [_row_to_job(r) for r in rows[: q.limit]]
+        items = await self._to_jobs(rows[: q.limit], fields)
         next_cursor = None
         if len(rows) > q.limit:
-            last = items[-1]
-            next_cursor = encode_cursor(last.created_at, last.id)
+            last = rows[q.limit - 1]
+            next_cursor = encode_cursor(last["created_at"], last["id"])
         
         return JobListPage(items=items, next_cursor=next_cursor)
     
+    async def list_changes(self, *, created_by: str, q: JobChangesQuery, until: datetime) -> JobChangesPage:
+        """
+        Change feed: jobs with (updated_at, id) after the `since` token and updated_at <= `until`,
+        in that order (jobs_owner_updated_idx). `until` should trail the clock by more than
+        any write transaction lasts, so no commit can later land behind a token already handed out.
+        """
+        since = decode_change_token(q.since) if q.since else None
+        fields = q.field_names
+        # spelled out so the row comparison is always an index bound (see claim_jobs)
+        after = "AND (updated_at, id) > (:since_updated_at, :since_id)" if since is not None else ""
+        sql = text(
+            f"""
+            SELECT {_select_columns(fields, "updated_at", "id")}
+            FROM jobs
+            WHERE created_by = :created_by
+                AND updated_at <= :until
+                {after}
+            ORDER BY updated_at, id
+            LIMIT :limit_plus_one
+            """
+        )
+
+        params = {
+            "created_by": created_by,
+            "until": until,
+            "limit_plus_one": q.limit + 1,
+        }
+        if since is not None:
+            params.update(since_updated_at=since.updated_at, since_id=since.id)
+
+        rows = await self._fetch("list_changes", sql, params, queue=ANY_QUEUE)
+
+        items = await self._to_jobs(rows[: q.limit], fields)
+        next_token = q.since
+        if items:
+            last = rows[len(items) - 1]
+            next_token = encode_change_token(last["updated_at"], last["id"])
+        return JobChangesPage(items=items, next_token=next_token, has_more=len(rows) > q.limit)
+
     async def cancel_job(self, *, created_by: str, job_id: UUID, now: datetime) -> tuple[JobPublic | None, bool]:
         sql = text(
             """
@@ -189,12 +840,653 @@ class SqlAlchemyJobRepo:
             """
         )
 
-        res = await self.session.execute(sql, {"job_id": job_id, "created_by": created_by, "now": now})
-        row = res.mappings().first()
-        if not row:
+        rows = await self._fetch("cancel_job", sql, {"job_id": job_id, "created_by": created_by, "now": now})
+        if not rows:
             return None, False
         
-        job = _row_to_job(row)
+        job = (await self._to_jobs(rows))[0]
         accepted = (job.status == JobStatus.running) and (job.cancel_requested_at is not None)
         return job, accepted
     
+
+    async def cancel_jobs(
+        self, *, created_by: str, req: BulkCancelRequest, now: datetime, chunk_size: int = 1000
+    ) -> BulkCancelResponse:
+        """
+        Set-based cancel_job: one UPDATE per chunk of up to `chunk_size` rows, each
+        committed on its own (see _chunk()) so row locks and cancel NOTIFYs never pile up.
+        Filters walk (created_at, id) newest first on jobs_created_by_status_created_at_idx;
+        explicit ids are chunked client-side. Rerunning after a failure is safe.
+        Each chunk is stamped with `now` plus the time spent on earlier chunks, so a chunk
+        committing late cannot land behind a change-feed token (list_changes) issued meanwhile.
+        """
+        sql = text(
+            """
+            WITH batch AS (
+                SELECT id, created_at
+                FROM jobs
+                WHERE created_by = :created_by
+                    AND status IN ('queued', 'running')
+                    AND (:ids_is_null OR id = ANY(:ids))
+                    AND (:queue_is_null OR queue = :queue)
+                    AND (:task_is_null OR task_name = :task_name)
+                    AND (:created_after_is_null OR created_at >= :created_after)
+                    AND (:created_before_is_null OR created_at <= :created_before)
+                    AND (:after_is_null OR (created_at, id) < (:after_created_at, :after_id))
+                ORDER BY created_at DESC, id DESC
+                LIMIT :chunk_size
+            ),
+            updated AS (
+                UPDATE jobs j
+                SET
+                    status = CASE
+                        WHEN j.status = 'queued' THEN 'cancelled'::job_status
+                        ELSE j.status
+                    END,
+                    cancel_requested_at = CASE
+                        WHEN j.status = 'running' THEN :now
+                        ELSE j.cancel_requested_at
+                    END,
+                    updated_at = :now
+                FROM batch
+                WHERE j.id = batch.id
+                    -- re-checked against the current row if a worker got there first
+                    AND (j.status = 'queued' OR (j.status = 'running' AND j.cancel_requested_at IS NULL))
+                RETURNING j.status
+            ),
+            last AS (
+                SELECT created_at, id FROM batch ORDER BY created_at, id LIMIT 1
+            )
+            SELECT
+                (SELECT count(*) FROM batch) AS scanned,
+                (SELECT created_at FROM last) AS last_created_at,
+                (SELECT id FROM last) AS last_id,
+                (SELECT count(*) FROM updated WHERE status = 'cancelled') AS cancelled,
+                (SELECT count(*) FROM updated WHERE status = 'running') AS cancel_requested
+            """
+        )
+
+        params: dict[str, Any] = {
+            "created_by": created_by,
+            "queue_is_null": req.queue is None,
+            "queue": req.queue,
+            "task_is_null": req.task_name is None,
+            "task_name": req.task_name,
+            "created_after_is_null": req.created_after is None,
+            "created_after": req.created_after,
+            "created_before_is_null": req.created_before is None,
+            "created_before": req.created_before,
+            "now": now,
+            "chunk_size": chunk_size,
+        }
+
+        result = BulkCancelResponse()
+        started = monotonic()
+
+        async def run_chunk(ids: list[UUID] | None, after: tuple[datetime, UUID] | None) -> Any:
+            async with self._chunk() as repo:
+                rows = await repo._fetch(
+                    "cancel_jobs",
+                    sql,
+                    {
+                        **params,
+                        "now": _chunk_now(now, started),
+                        "ids_is_null": ids is None,
+                        "ids": ids if ids is not None else [],
+                        "after_is_null": after is None,
+                        "after_created_at": after[0] if after else None,
+                        "after_id": after[1] if after else None,
+                    },
+                    queue=req.queue or ANY_QUEUE,
+                )
+            row = rows[0]
+            result.cancelled += row["cancelled"]
+            result.cancel_requested += row["cancel_requested"]
+            return row
+
+        if req.job_ids is not None:
+            ids = list(dict.fromkeys(req.job_ids))
+            for i in range(0, len(ids), chunk_size):
+                await run_chunk(ids[i : i + chunk_size], None)
+            return result
+
+        after = None
+        while True:
+            row = await run_chunk(None, after)
+            if row["scanned"] < chunk_size:
+                return result
+            after = (row["last_created_at"], row["last_id"])
+
+    async def replay_dead_jobs(
+        self, *, created_by: str, req: ReplayDeadJobsRequest, now: datetime, chunk_size: int = 1000
+    ) -> ReplayDeadJobsResponse:
+        """
+        Dead -> queued with attempts reset, chunked and committed like cancel_jobs().
+        Each job's run_at is drawn uniformly from [now, now + spread_seconds]. last_error
+        is kept until the next attempt overwrites it. A group member going back to queued
+        is counted back into its group by trg_jobs_group_member. dedupe_key is dropped as
+        in fail_jobs(). Chunks are stamped as in cancel_jobs().
+        """
+        sql = text(
+            """
+            WITH batch AS (
+                SELECT id, created_at
+                FROM jobs
+                WHERE created_by = :created_by
+                    AND status = 'dead'
+                    AND (:queue_is_null OR queue = :queue)
+                    AND (:task_is_null OR task_name = :task_name)
+                    AND (:error_type_is_null OR last_error->>'type' = :error_type)
+                    AND (:created_after_is_null OR created_at >= :created_after)
+                    AND (:created_before_is_null OR created_at <= :created_before)
+                    AND (:died_after_is_null OR updated_at >= :died_after)
+                    AND (:died_before_is_null OR updated_at <= :died_before)
+                    AND (:after_is_null OR (created_at, id) < (:after_created_at, :after_id))
+                ORDER BY created_at DESC, id DESC
+                LIMIT :chunk_size
+            ),
+            updated AS (
+                UPDATE jobs j
+                SET
+                    status = 'queued',
+                    attempts = 0,
+                    run_at = CAST(:now AS timestamptz) + make_interval(secs => CAST(:spread_seconds AS float8) * random()),
+                    dedupe_key = NULL,
+                    updated_at = :now
+                FROM batch
+                WHERE j.id = batch.id
+                    AND j.status = 'dead'
+                RETURNING 1
+            ),
+            last AS (
+                SELECT created_at, id FROM batch ORDER BY created_at, id LIMIT 1
+            )
+            SELECT
+                (SELECT count(*) FROM batch) AS scanned,
+                (SELECT created_at FROM last) AS last_created_at,
+                (SELECT id FROM last) AS last_id,
+                (SELECT count(*) FROM updated) AS replayed
+            """
+        )
+
+        params: dict[str, Any] = {
+            "created_by": created_by,
+            "queue_is_null": req.queue is None,
+            "queue": req.queue,
+            "task_is_null": req.task_name is None,
+            "task_name": req.task_name,
+            "error_type_is_null": req.error_type is None,
+            "error_type": req.error_type,
+            "created_after_is_null": req.created_after is None,
+            "created_after": req.created_after,
+            "created_before_is_null": req.created_before is None,
+            "created_before": req.created_before,
+            "died_after_is_null": req.died_after is None,
+            "died_after": req.died_after,
+            "died_before_is_null": req.died_before is None,
+            "died_before": req.died_before,
+            "now": now,
+            "spread_seconds": req.spread_seconds,
+            "chunk_size": chunk_size,
+        }
+
+        result = ReplayDeadJobsResponse()
+        started = monotonic()
+        after = None
+        while True:
+            async with self._chunk() as repo:
+                rows = await repo._fetch(
+                    "replay_dead_jobs",
+                    sql,
+                    {
+                        **params,
+                        "now": _chunk_now(now, started),
+                        "after_is_null": after is None,
+                        "after_created_at": after[0] if after else None,
+                        "after_id": after[1] if after else None,
+                    },
+                    queue=req.queue or ANY_QUEUE,
+                )
+            row = rows[0]
+            result.replayed += row["replayed"]
+            if row["scanned"] < chunk_size:
+                return result
+            after = (row["last_created_at"], row["last_id"])
+
+    # ------------------------------------------------------------------
+    # Read-your-writes tokens (WAL positions)
+    # ------------------------------------------------------------------
+
+    async def commit(self) -> None:
+        """
+        Unit-of-work step for a session opened without begin() (e.g. one per request):
+        commit its writes. Inside session_scope() the scope commits instead.
+        """
+        await self.session.commit()
+
+    async def commit_token(self) -> str:
+        """
+        Primary side: a WAL position at or past every commit made so far. Read it after the
+        writes commit (commit(), or after the session_scope() block); a replica that has
+        replayed it sees those writes. Never commits.
+        """
+        sql = text("SELECT pg_current_wal_lsn()::text AS lsn")
+        rows = await self._fetch("commit_token", sql, {}, queue=ANY_QUEUE)
+        return rows[0]["lsn"]
+
+    async def replayed(self, *, token: str) -> bool:
+        """
+        Replica side: has WAL up to `token` been replayed here? Always False on a primary.
+        """
+        sql = text("SELECT COALESCE(pg_last_wal_replay_lsn() >= CAST(CAST(:token AS text) AS pg_lsn), false) AS ok")
+        rows = await self._fetch("replayed", sql, {"token": token}, queue=ANY_QUEUE)
+        return rows[0]["ok"]
+
+    # ------------------------------------------------------------------
+    # Worker side: claim / lease / complete
+    # ------------------------------------------------------------------
+
+    async def claim_jobs(
+        self,
+        *,
+        queue: str,
+        worker_id: str,
+        limit: int,
+        lease_seconds: float,
+        now: datetime,
+        task_names: list[str] | None = None,
+        exclude_task_names: list[str] | None = None,
+        bucket: int | None = None,
+    ) -> list[JobRecord]:
+        """
+        Atomically lease up to `limit` runnable jobs (queued, run_at <= now) in
+        jobs_runnable_idx order. Locked rows are skipped, never waited on.
+        `task_names` / `exclude_task_names` let the worker leave throttled tasks unclaimed.
+        `bucket` restricts the claim to one claim partition (jobs_bucket_runnable_idx).
+        Returns JobRecords: the worker holds these until ack, never JobPublic.
+        """
+        # spelled out rather than `:bucket IS NULL OR ...`, which a generic plan cannot index
+        in_bucket = "AND claim_bucket = :bucket" if bucket is not None else ""
+        sql = text(
+            f"""
+            WITH candidates AS (
+                SELECT id
+                FROM jobs
+                WHERE queue = :queue
+                    AND status = 'queued'
+                    AND run_at <= :now
+                    {in_bucket}
+                    AND (:task_names_is_null OR task_name = ANY(:task_names))
+                    AND NOT (task_name = ANY(:exclude_task_names))
+                ORDER BY run_at, priority DESC, created_at, id
+                LIMIT :limit
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE jobs AS j
+            SET
+                status = 'running',
+                locked_by = :worker_id,
+                locked_until = :locked_until,
+                attempts = j.attempts + 1,
+                updated_at = :now
+            FROM candidates AS c
+            WHERE j.id = c.id
+            RETURNING {_RECORD_COLUMNS}
+            """
+        )
+
+        params = {
+            "queue": queue,
+            "now": now,
+            "limit": limit,
+            "worker_id": worker_id,
+            "locked_until": now + timedelta(seconds=lease_seconds),
+            "task_names_is_null": task_names is None,
+            "task_names": task_names if task_names is not None else [],
+            "exclude_task_names": exclude_task_names or [],
+        }
+        if bucket is not None:
+            params["bucket"] = bucket
+
+        rows = await self._fetch("claim_jobs", sql, params, queue=queue)
+        # UPDATE ... RETURNING does not preserve the CTE order
+        return sorted(await self._to_records(rows), key=claim_order)
+
+    async def heartbeat_member(self, *, queue: str, worker_id: str, now: datetime, ttl: float) -> list[str]:
+        """
+        Claim-partition membership: record that `worker_id` is alive on `queue`, drop
+        members silent for `ttl` seconds, and return the live member ids (sorted).
+        """
+        sql = text(
+            """
+            WITH me AS (
+                INSERT INTO claim_members (queue, worker_id, heartbeat_at)
+                VALUES (:queue, :worker_id, :now)
+                ON CONFLICT (queue, worker_id) DO UPDATE SET heartbeat_at = EXCLUDED.heartbeat_at
+                RETURNING worker_id
+            ),
+            gone AS (
+                DELETE FROM claim_members
+                WHERE queue = :queue
+                    AND heartbeat_at < :expired_before
+            )
+            -- the statement's snapshot predates both CTEs: add self, filter the expired
+            SELECT worker_id FROM claim_members
+            WHERE queue = :queue
+                AND heartbeat_at >= :expired_before
+                AND worker_id <> :worker_id
+            UNION
+            SELECT worker_id FROM me
+            ORDER BY worker_id
+            """
+        )
+
+        params = {
+            "queue": queue,
+            "worker_id": worker_id,
+            "now": now,
+            "expired_before": now - timedelta(seconds=ttl),
+        }
+
+        rows = await self._fetch("heartbeat_member", sql, params, queue=queue)
+        return [r["worker_id"] for r in rows]
+
+    async def leave_members(self, *, queue: str, worker_id: str) -> None:
+        """
+        Graceful exit: the remaining members take over this worker's buckets on their
+        next heartbeat instead of after the ttl.
+        """
+        sql = text(
+            """
+            DELETE FROM claim_members
+            WHERE queue = :queue
+                AND worker_id = :worker_id
+            RETURNING worker_id
+            """
+        )
+
+        await self._fetch("leave_members", sql, {"queue": queue, "worker_id": worker_id}, queue=queue)
+
+    async def extend_leases(
+        self, *, job_ids: list[UUID], worker_id: str, lease_seconds: float, now: datetime
+    ) -> list[UUID]:
+        """
+        Heartbeat: push locked_until forward for jobs still leased by `worker_id`.
+        Returns the ids whose lease was extended (missing ids were lost/finalized).
+        """
+        sql = text(
+            """
+            UPDATE jobs
+            SET locked_until = :locked_until
+            WHERE id = ANY(:job_ids)
+                AND status = 'running'
+                AND locked_by = :worker_id
+            RETURNING id
+            """
+        )
+
+        params = {
+            "job_ids": list(job_ids),
+            "worker_id": worker_id,
+            "locked_until": now + timedelta(seconds=lease_seconds),
+        }
+
+        rows = await self._fetch("extend_leases", sql, params, queue=ANY_QUEUE)
+        return [r["id"] for r in rows]
+
+    async def complete_job(self, *, job_id: UUID, worker_id: str, now: datetime) -> JobRecord | None:
+        """
+        running -> succeeded. Returns None if the job is no longer leased by `worker_id`
+        (lease expired and was reaped/reclaimed).
+        """
+        sql = text(
+            f"""
+            UPDATE jobs AS j
+            SET
+                status = 'succeeded',
+                locked_by = NULL,
+                locked_until = NULL,
+                cancel_requested_at = NULL,
+                updated_at = :now
+            WHERE id = :job_id
+                AND status = 'running'
+                AND locked_by = :worker_id
+            RETURNING {_RECORD_COLUMNS}
+            """
+        )
+
+        rows = await self._fetch("complete_job", sql, {"job_id": job_id, "worker_id": worker_id, "now": now})
+        return (await self._to_records(rows))[0] if rows else None
+
+    async def fail_jobs(self, *, failures: list[JobFailure], worker_id: str, now: datetime) -> list[JobPublic]:
+        """
+        Finalize a batch of failed attempts in one statement:
+            - retryable and attempts < max_attempts -> queued with the failure's run_at (backoff)
+            - otherwise                             -> dead
+        Rows no longer leased by `worker_id` are skipped. A requeued job drops its
+        dedupe_key: a newer queued job may hold the key by now (jobs_dedupe_queued_uniq),
+        and the retry runs as itself rather than merging with it.
+        """
+        if not failures:
+            return []
+
+        sql = text(
+            """
+            UPDATE jobs AS j
+            SET
+                status = CASE
+                    WHEN f.retryable AND j.attempts < j.max_attempts THEN 'queued'::job_status
+                    ELSE 'dead'::job_status
+                END,
+                run_at = CASE
+                    WHEN f.retryable AND j.attempts < j.max_attempts THEN f.run_at
+                    ELSE j.run_at
+                END,
+                dedupe_key = CASE
+                    WHEN f.retryable AND j.attempts < j.max_attempts THEN NULL
+                    ELSE j.dedupe_key
+                END,
+                last_error = f.error::jsonb,
+                locked_by = NULL,
+                locked_until = NULL,
+                cancel_requested_at = NULL,
+                updated_at = :now
+            FROM unnest(
+                CAST(:job_ids AS uuid[]),
+                CAST(:run_ats AS timestamptz[]),
+                CAST(:errors AS text[]),
+                CAST(:retryables AS boolean[])
+            ) AS f(id, run_at, error, retryable)
+            WHERE j.id = f.id
+                AND j.status = 'running'
+                AND j.locked_by = :worker_id
+            RETURNING j.*
+            """
+        )
+
+        params = {
+            "job_ids": [f.job_id for f in failures],
+            "run_ats": [f.run_at for f in failures],
+            "errors": [json.dumps(f.error) for f in failures],
+            "retryables": [f.retryable for f in failures],
+            "worker_id": worker_id,
+            "now": now,
+        }
+
+        rows = await self._fetch("fail_jobs", sql, params, queue=ANY_QUEUE)
+        return await self._to_jobs(rows)
+
+    async def release_jobs(self, *, job_ids: list[UUID], worker_id: str, now: datetime) -> list[UUID]:
+        """
+        Hand claimed-but-unstarted jobs back in one statement (worker drain):
+        running -> queued with the lock cleared and the claim's attempt refunded.
+        run_at is kept, so released jobs keep their place in the claim order.
+        A job with a pending cancel request becomes cancelled instead. dedupe_key is
+        dropped as in fail_jobs().
+        """
+        if not job_ids:
+            return []
+
+        sql = text(
+            """
+            UPDATE jobs
+            SET
+                status = CASE
+                    WHEN cancel_requested_at IS NOT NULL THEN 'cancelled'::job_status
+                    ELSE 'queued'::job_status
+                END,
+                attempts = attempts - 1,
+                dedupe_key = NULL,
+                locked_by = NULL,
+                locked_until = NULL,
+                cancel_requested_at = NULL,
+                updated_at = :now
+            WHERE id = ANY(:job_ids)
+                AND status = 'running'
+                AND locked_by = :worker_id
+            RETURNING id
+            """
+        )
+
+        params = {"job_ids": list(job_ids), "worker_id": worker_id, "now": now}
+
+        rows = await self._fetch("release_jobs", sql, params, queue=ANY_QUEUE)
+        return [r["id"] for r in rows]
+
+    async def cancel_requested(self, *, job_ids: list[UUID], worker_id: str) -> list[UUID]:
+        """
+        Poll fallback for cancel notifications: which of these leased jobs have a cancel request.
+        """
+        if not job_ids:
+            return []
+
+        sql = text(
+            """
+            SELECT id
+            FROM jobs
+            WHERE id = ANY(:job_ids)
+                AND status = 'running'
+                AND locked_by = :worker_id
+                AND cancel_requested_at IS NOT NULL
+            """
+        )
+
+        params = {"job_ids": list(job_ids), "worker_id": worker_id}
+
+        rows = await self._fetch("cancel_requested", sql, params, queue=ANY_QUEUE)
+        return [r["id"] for r in rows]
+
+    async def finish_cancelled(self, *, job_ids: list[UUID], worker_id: str, now: datetime) -> list[JobPublic]:
+        """
+        running -> cancelled once the worker has stopped executing the job.
+        """
+        if not job_ids:
+            return []
+
+        sql = text(
+            """
+            UPDATE jobs
+            SET
+                status = 'cancelled',
+                locked_by = NULL,
+                locked_until = NULL,
+                cancel_requested_at = NULL,
+                updated_at = :now
+            WHERE id = ANY(:job_ids)
+                AND status = 'running'
+                AND locked_by = :worker_id
+            RETURNING *
+            """
+        )
+
+        params = {"job_ids": list(job_ids), "worker_id": worker_id, "now": now}
+
+        rows = await self._fetch("finish_cancelled", sql, params, queue=ANY_QUEUE)
+        return await self._to_jobs(rows)
+
+    async def count_running(self, *, task_names: list[str]) -> dict[str, int]:
+        """
+        Fleet-wide running jobs per task (for global_concurrency). Uses jobs_running_task_idx.
+        """
+        sql = text(
+            """
+            SELECT task_name, count(*) AS running
+            FROM jobs
+            WHERE status = 'running'
+                AND task_name = ANY(:task_names)
+            GROUP BY task_name
+            """
+        )
+
+        rows = await self._fetch("count_running", sql, {"task_names": list(task_names)}, queue=ANY_QUEUE)
+        return {r["task_name"]: r["running"] for r in rows}
+
+    async def reap_expired_leases(self, *, queue: str, now: datetime, limit: int = 100) -> list[JobPublic]:
+        """
+        Running jobs whose lease expired (worker crashed/stalled):
+            - cancel requested      -> cancelled
+            - no attempts left      -> dead
+            - otherwise             -> queued, runnable now (dedupe_key dropped as in fail_jobs())
+        """
+        sql = text(
+            """
+            WITH expired AS (
+                SELECT id
+                FROM jobs
+                WHERE queue = :queue
+                    AND status = 'running'
+                    AND locked_until < :now
+                ORDER BY locked_until, id
+                LIMIT :limit
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE jobs AS j
+            SET
+                status = CASE
+                    WHEN j.cancel_requested_at IS NOT NULL THEN 'cancelled'::job_status
+                    WHEN j.attempts >= j.max_attempts THEN 'dead'::job_status
+                    ELSE 'queued'::job_status
+                END,
+                run_at = CASE
+                    WHEN j.cancel_requested_at IS NULL AND j.attempts < j.max_attempts THEN :now
+                    ELSE j.run_at
+                END,
+                dedupe_key = CASE
+                    WHEN j.cancel_requested_at IS NULL AND j.attempts < j.max_attempts THEN NULL
+                    ELSE j.dedupe_key
+                END,
+                last_error = CASE
+                    WHEN j.cancel_requested_at IS NULL THEN :lease_error
+                    ELSE j.last_error
+                END,
+                locked_by = NULL,
+                locked_until = NULL,
+                cancel_requested_at = NULL,
+                updated_at = :now
+            FROM expired AS e
+            WHERE j.id = e.id
+            RETURNING j.*
+            """
+        ).bindparams(bindparam("lease_error", type_=JSONB))
+
+        params = {"queue": queue, "now": now, "limit": limit, "lease_error": lease_expired_error(now)}
+
+        rows = await self._fetch("reap_expired_leases", sql, params, queue=queue)
+        return await self._to_jobs(rows)
+
+
+def session_scope(
+    sessionmaker: async_sessionmaker[AsyncSession], **repo_kwargs: Any
+) -> Callable[[], AbstractAsyncContextManager[SqlAlchemyJobRepo]]:
+    """
+    Repo factory for long-running components (workers): each `async with scope() as repo`
+    is one short transaction on a fresh session, committed on exit. Chunked writes take
+    their own sessions from the same sessionmaker.
+    """
+    @asynccontextmanager
+    async def scope():
+        async with sessionmaker() as session:
+            async with session.begin():
+                yield SqlAlchemyJobRepo(session=session, chunk_sessions=sessionmaker, **repo_kwargs)
+
+    return scope
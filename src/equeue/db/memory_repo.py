@@ -0,0 +1,659 @@
+#src/equeue/db/memory_repo.py
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import random
+from bisect import bisect_left, insort
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable
+from uuid import UUID, uuid4
+
+from equeue.api.models.jobs import (
+    BulkCancelRequest,
+    BulkCancelResponse,
+    DedupePolicy,
+    EnqueueJobGroupRequest,
+    EnqueueJobRequest,
+    JobChangesPage,
+    JobChangesQuery,
+    JobGroupPublic,
+    JobListPage,
+    JobListQuery,
+    JobPublic,
+    JobStatus,
+    ReplayDeadJobsRequest,
+    ReplayDeadJobsResponse,
+    project_job,
+)
+from equeue.db.cursor import decode_change_token, decode_cursor, encode_change_token, encode_cursor
+from equeue.db.job_repo import CLAIM_BUCKETS, HELD_RUN_AT, JobFailure, lease_expired_error
+from equeue.db.records import JobRecord
+from equeue.db.sharding import sharded_job_id
+
+logger = logging.getLogger("equeue.db")
+
+
+class _Row:
+    """
+    Mutable in-memory equivalent of one `jobs` row (including lock columns).
+    """
+    __slots__ = (
+        "id", "task_name", "status", "queue", "payload", "priority", "run_at",
+        "attempts", "max_attempts", "locked_until", "locked_by", "last_error",
+        "created_by", "created_at", "updated_at", "cancel_requested_at", "idempotency_key",
+        "group_id", "claim_bucket", "dedupe_key",
+    )
+
+    def __init__(self, **kw: Any):
+        for k in self.__slots__:
+            setattr(self, k, kw.get(k))
+
+    def runnable_key(self) -> tuple:
+        # jobs_runnable_idx: (queue, run_at, priority DESC, created_at, id) WHERE status = 'queued'
+        return (self.run_at, -self.priority, self.created_at, self.id)
+
+    def to_public(self) -> JobPublic:
+        return JobPublic(
+            id=self.id,
+            task_name=self.task_name,
+            status=self.status,
+            queue=self.queue,
+            payload=self.payload,
+            priority=self.priority,
+            run_at=self.run_at,
+            attempts=self.attempts,
+            max_attempts=self.max_attempts,
+            created_by=self.created_by,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            cancel_requested_at=self.cancel_requested_at,
+            last_error=self.last_error,
+            group_id=self.group_id,
+        )
+
+    def to_record(self) -> JobRecord:
+        return JobRecord(
+            id=self.id,
+            task_name=self.task_name,
+            status=self.status,
+            queue=self.queue,
+            payload=dict(self.payload),
+            priority=self.priority,
+            run_at=self.run_at,
+            attempts=self.attempts,
+            max_attempts=self.max_attempts,
+            created_by=self.created_by,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            cancel_requested_at=self.cancel_requested_at,
+            last_error=self.last_error,
+            group_id=self.group_id,
+        )
+
+
+
+TERMINAL = frozenset({JobStatus.succeeded, JobStatus.dead, JobStatus.cancelled})
+
+
+class _Group:
+    """
+    In-memory equivalent of one `job_groups` row.
+    """
+    __slots__ = (
+        "id", "created_by", "total", "remaining", "callback_job_id", "callback_run_at",
+        "created_at", "completed_at",
+    )
+
+    def __init__(self, **kw: Any):
+        for k in self.__slots__:
+            setattr(self, k, kw.get(k))
+
+    def to_public(self, job_ids: list[UUID] | None = None) -> JobGroupPublic:
+        return JobGroupPublic(
+            id=self.id,
+            created_by=self.created_by,
+            total=self.total,
+            remaining=self.remaining,
+            callback_job_id=self.callback_job_id,
+            created_at=self.created_at,
+            completed_at=self.completed_at,
+            job_ids=job_ids,
+        )
+
+
+class InMemoryJobRepo:
+    """
+    JobRepo implemented in process memory, with the same claim/lease/cancel semantics
+    as SqlAlchemyJobRepo. For embedded single-process deployments and fast tests.
+
+    Indexes (mirroring the Postgres ones):
+        - runnable heap per queue, ordered like jobs_runnable_idx; entries are invalidated
+          lazily (an entry is live only while its row is queued with the same sort key)
+        - per-owner list sorted by (created_at, id) for keyset list_jobs
+        - (created_by, idempotency_key) -> id
+
+    Status changes go through _set_status(), which keeps fan-in group counters in step
+    (the Postgres side does this in the trg_jobs_group_member trigger).
+
+    Methods never await, so each one is atomic with respect to the event loop.
+    Not thread-safe: use from a single event loop.
+    """
+
+    def __init__(self, *, max_attempts: int = 25, shard: int | None = None):
+        self.max_attempts = max_attempts
+        self.shard = shard  # set under ShardedJobRepo: job ids encode it
+
+        self._rows: dict[UUID, _Row] = {}
+        self._runnable: dict[str, list[tuple]] = {}
+        self._by_owner: dict[str, list[tuple[datetime, UUID]]] = {}
+        self._idempotency: dict[tuple[str, str], UUID] = {}
+        self._running: dict[str, set[UUID]] = {}
+        self._groups: dict[UUID, _Group] = {}
+        self._cancel_listeners: list[Callable[[UUID], None]] = []
+        self._members: dict[str, dict[str, datetime]] = {}   # claim_members: queue -> worker -> heartbeat
+        self._dedupe: dict[tuple[str, str], UUID] = {}        # (created_by, dedupe_key) -> last job
+
+    @asynccontextmanager
+    async def scope(self) -> AsyncIterator[InMemoryJobRepo]:
+        """
+        Same shape as job_repo.session_scope(): there is no transaction to open.
+        """
+        yield self
+
+    # ------------------------------------------------------------------
+    # index maintenance
+    # ------------------------------------------------------------------
+
+    def _push_runnable(self, row: _Row) -> None:
+        heapq.heappush(self._runnable.setdefault(row.queue, []), row.runnable_key())
+
+    def _set_running(self, row: _Row, *, worker_id: str, locked_until: datetime) -> None:
+        row.status = JobStatus.running  # queued -> running: never moves a group counter
+        row.locked_by = worker_id
+        row.locked_until = locked_until
+        self._running.setdefault(row.queue, set()).add(row.id)
+
+    def _drop_dedupe_key(self, row: _Row) -> None:
+        # requeue paths clear dedupe_key: a newer queued job may hold the key by now
+        if row.dedupe_key is None:
+            return
+        key = (row.created_by, row.dedupe_key)
+        if self._dedupe.get(key) == row.id:
+            del self._dedupe[key]
+        row.dedupe_key = None
+
+    def _set_status(self, row: _Row, status: JobStatus, now: datetime) -> None:
+        was_terminal = row.status in TERMINAL
+        row.status = status
+        if row.group_id is None or was_terminal == (status in TERMINAL):
+            return
+
+        group = self._groups[row.group_id]
+        if was_terminal:
+            group.remaining += 1
+            return
+        group.remaining -= 1
+        if group.remaining == 0:
+            group.completed_at = group.completed_at or now
+            callback = self._rows[group.callback_job_id]
+            if callback.status == JobStatus.queued and callback.run_at == HELD_RUN_AT:
+                callback.run_at = max(now, group.callback_run_at)
+                callback.updated_at = now
+                self._push_runnable(callback)
+
+    def _clear_running(self, row: _Row) -> None:
+        row.locked_by = None
+        row.locked_until = None
+        row.cancel_requested_at = None
+        self._running.get(row.queue, set()).discard(row.id)
+
+    # ------------------------------------------------------------------
+    # API side
+    # ------------------------------------------------------------------
+
+    async def insert_job(self, *, created_by: str, req: EnqueueJobRequest, now: datetime) -> JobPublic:
+        return self._insert(created_by, req, now).to_public()
+
+    async def insert_jobs(self, *, created_by: str, reqs: list[EnqueueJobRequest], now: datetime) -> list[JobPublic]:
+        # merged duplicates report their job's final state, as the SQL statement does
+        rows = [self._insert(created_by, r, now) for r in reqs]
+        return [row.to_public() for row in rows]
+
+    def _insert(self, created_by: str, req: EnqueueJobRequest, now: datetime) -> _Row:
+        if req.idempotency_key is not None:
+            existing = self._idempotency.get((created_by, req.idempotency_key))
+            if existing is not None:
+                return self._rows[existing]
+
+        if req.dedupe_key is not None:
+            # jobs_dedupe_queued_uniq: entries go stale once their job leaves queued
+            existing = self._rows.get(self._dedupe.get((created_by, req.dedupe_key)))
+            if existing is not None and existing.status == JobStatus.queued:
+                return self._merge_duplicate(existing, req, now)
+
+        row = self._add_row(created_by=created_by, req=req, now=now)
+        if req.idempotency_key is not None:
+            self._idempotency[(created_by, req.idempotency_key)] = row.id
+        if req.dedupe_key is not None:
+            self._dedupe[(created_by, req.dedupe_key)] = row.id
+        return row
+
+    def _merge_duplicate(self, row: _Row, req: EnqueueJobRequest, now: datetime) -> _Row:
+        if req.dedupe_policy == DedupePolicy.replace_payload:
+            row.payload = dict(req.payload)
+            row.updated_at = now
+        elif req.dedupe_policy == DedupePolicy.extend_run_at:
+            run_at = req.run_at if req.run_at is not None else now
+            if run_at > row.run_at:
+                row.run_at = run_at
+                self._push_runnable(row)    # the old heap entry is now stale
+            row.updated_at = now
+        return row
+
+    def _add_row(
+        self, *, created_by: str, req: EnqueueJobRequest, now: datetime, run_at: datetime | None = None, **extra: Any
+    ) -> _Row:
+        row = _Row(
+            id=uuid4() if self.shard is None else sharded_job_id(self.shard),
+            task_name=req.task_name,
+            status=JobStatus.queued,
+            queue=req.queue,
+            payload=dict(req.payload),
+            priority=req.priority,
+            run_at=run_at or (req.run_at if req.run_at is not None else now),
+            attempts=0,
+            max_attempts=self.max_attempts,
+            created_by=created_by,
+            created_at=now,
+            updated_at=now,
+            idempotency_key=req.idempotency_key,
+            dedupe_key=req.dedupe_key,
+            claim_bucket=random.randrange(CLAIM_BUCKETS),
+            **extra,
+        )
+        self._rows[row.id] = row
+        insort(self._by_owner.setdefault(created_by, []), (row.created_at, row.id))
+        self._push_runnable(row)
+        return row
+
+    async def insert_group(self, *, created_by: str, req: EnqueueJobGroupRequest, now: datetime) -> JobGroupPublic:
+        cb = req.callback
+        callback = self._add_row(created_by=created_by, req=cb, now=now, run_at=HELD_RUN_AT)
+        group = _Group(
+            id=uuid4(),
+            created_by=created_by,
+            total=len(req.jobs),
+            remaining=len(req.jobs),
+            callback_job_id=callback.id,
+            callback_run_at=cb.run_at if cb.run_at is not None else now,
+            created_at=now,
+        )
+        self._groups[group.id] = group
+        ids = [self._add_row(created_by=created_by, req=j, now=now, group_id=group.id).id for j in req.jobs]
+        return group.to_public(job_ids=ids)
+
+    async def get_group(self, *, created_by: str, group_id: UUID) -> JobGroupPublic | None:
+        group = self._groups.get(group_id)
+        if group is None or group.created_by != created_by:
+            return None
+        return group.to_public()
+
+    async def get_job(
+        self, *, created_by: str, job_id: UUID, fields: tuple[str, ...] | None = None
+    ) -> JobPublic | None:
+        row = self._rows.get(job_id)
+        if row is None or row.created_by != created_by:
+            return None
+        job = row.to_public()
+        return job if fields is None else project_job(job, fields)
+
+    async def get_jobs_by_idempotency_key(self, *, created_by: str, keys: list[str]) -> dict[str, JobPublic]:
+        found = {k: self._idempotency.get((created_by, k)) for k in keys}
+        return {k: self._rows[job_id].to_public() for k, job_id in found.items() if job_id is not None}
+
+    async def list_jobs(self, *, created_by: str, q: JobListQuery) -> JobListPage:
+        index = self._by_owner.get(created_by, [])
+        statuses = set(q.status) if q.status else None
+
+        # newest first: walk the ascending index backwards from the cursor
+        pos = len(index)
+        if q.cursor:
+            c = decode_cursor(q.cursor)
+            pos = bisect_left(index, (c.created_at, c.id))
+
+        rows: list[_Row] = []
+        while pos > 0 and len(rows) <= q.limit:
+            pos -= 1
+            created_at, job_id = index[pos]
+            if q.created_after is not None and created_at < q.created_after:
+                break
+            if q.created_before is not None and created_at > q.created_before:
+                continue
+            row = self._rows[job_id]
+            if statuses is not None and row.status not in statuses:
+                continue
+            if q.queue is not None and row.queue != q.queue:
+                continue
+            if q.task_name is not None and row.task_name != q.task_name:
+                continue
+            rows.append(row)
+
+        fields = q.field_names
+        items = [r.to_public() for r in rows[: q.limit]]
+        next_cursor = None
+        if len(rows) > q.limit:
+            last = items[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+        if fields is not None:
+            items = [project_job(job, fields) for job in items]
+
+        return JobListPage(items=items, next_cursor=next_cursor)
+
+    async def list_changes(self, *, created_by: str, q: JobChangesQuery, until: datetime) -> JobChangesPage:
+        since = decode_change_token(q.since) if q.since else None
+        keys = []
+        for _, job_id in self._by_owner.get(created_by, []):
+            row = self._rows[job_id]
+            key = (row.updated_at, row.id)
+            if row.updated_at <= until and (since is None or key > (since.updated_at, since.id)):
+                keys.append(key)
+        keys.sort()
+
+        items = [self._rows[job_id].to_public() for _, job_id in keys[: q.limit]]
+        next_token = q.since
+        if items:
+            next_token = encode_change_token(items[-1].updated_at, items[-1].id)
+        fields = q.field_names
+        if fields is not None:
+            items = [project_job(job, fields) for job in items]
+        return JobChangesPage(items=items, next_token=next_token, has_more=len(keys) > q.limit)
+
+    async def cancel_job(self, *, created_by: str, job_id: UUID, now: datetime) -> tuple[JobPublic | None, bool]:
+        row = self._rows.get(job_id)
+        if row is None or row.created_by != created_by:
+            return None, False
+
+        if row.status == JobStatus.queued:
+            self._set_status(row, JobStatus.cancelled, now)  # heap entry goes stale
+        elif row.status == JobStatus.running and row.cancel_requested_at is None:
+            row.cancel_requested_at = now
+            self._notify_cancel(row.id)
+        row.updated_at = now
+
+        accepted = row.status == JobStatus.running and row.cancel_requested_at is not None
+        return row.to_public(), accepted
+
+    async def cancel_jobs(
+        self, *, created_by: str, req: BulkCancelRequest, now: datetime, chunk_size: int = 1000
+    ) -> BulkCancelResponse:
+        if req.job_ids is not None:
+            rows = [self._rows.get(job_id) for job_id in dict.fromkeys(req.job_ids)]
+        else:
+            rows = [
+                self._rows[job_id]
+                for created_at, job_id in self._by_owner.get(created_by, [])
+                if (req.created_after is None or created_at >= req.created_after)
+                and (req.created_before is None or created_at <= req.created_before)
+            ]
+
+        result = BulkCancelResponse()
+        for row in rows:
+            if row is None or row.created_by != created_by:
+                continue
+            if req.queue is not None and row.queue != req.queue:
+                continue
+            if req.task_name is not None and row.task_name != req.task_name:
+                continue
+            if row.status == JobStatus.queued:
+                self._set_status(row, JobStatus.cancelled, now)
+                result.cancelled += 1
+            elif row.status == JobStatus.running and row.cancel_requested_at is None:
+                row.cancel_requested_at = now
+                self._notify_cancel(row.id)
+                result.cancel_requested += 1
+            else:
+                continue
+            row.updated_at = now
+        return result
+
+    async def replay_dead_jobs(
+        self, *, created_by: str, req: ReplayDeadJobsRequest, now: datetime, chunk_size: int = 1000
+    ) -> ReplayDeadJobsResponse:
+        result = ReplayDeadJobsResponse()
+        for created_at, job_id in self._by_owner.get(created_by, []):
+            row = self._rows[job_id]
+            if row.status != JobStatus.dead:
+                continue
+            if req.queue is not None and row.queue != req.queue:
+                continue
+            if req.task_name is not None and row.task_name != req.task_name:
+                continue
+            if req.error_type is not None and (row.last_error or {}).get("type") != req.error_type:
+                continue
+            if (req.created_after is not None and created_at < req.created_after) or (
+                req.created_before is not None and created_at > req.created_before
+            ):
+                continue
+            if (req.died_after is not None and row.updated_at < req.died_after) or (
+                req.died_before is not None and row.updated_at > req.died_before
+            ):
+                continue
+
+            self._set_status(row, JobStatus.queued, now)
+            self._drop_dedupe_key(row)
+            row.attempts = 0
+            row.run_at = now + timedelta(seconds=req.spread_seconds * random.random())
+            row.updated_at = now
+            self._push_runnable(row)
+            result.replayed += 1
+        return result
+
+    async def listen_cancellations(self, on_cancel: Callable[[UUID], None]) -> None:
+        """
+        Worker cancel_listener (the in-memory NOTIFY equivalent); runs until cancelled.
+        """
+        self._cancel_listeners.append(on_cancel)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self._cancel_listeners.remove(on_cancel)
+
+    def _notify_cancel(self, job_id: UUID) -> None:
+        for on_cancel in list(self._cancel_listeners):
+            try:
+                on_cancel(job_id)
+            except Exception:
+                logger.exception("cancel listener %r failed", on_cancel)
+
+    # ------------------------------------------------------------------
+    # Worker side: claim / lease / complete
+    # ------------------------------------------------------------------
+
+    async def claim_jobs(
+        self,
+        *,
+        queue: str,
+        worker_id: str,
+        limit: int,
+        lease_seconds: float,
+        now: datetime,
+        task_names: list[str] | None = None,
+        exclude_task_names: list[str] | None = None,
+        bucket: int | None = None,
+    ) -> list[JobRecord]:
+        heap = self._runnable.get(queue)
+        claimed: list[JobRecord] = []
+        if not heap:
+            return claimed
+
+        include = set(task_names) if task_names is not None else None
+        exclude = set(exclude_task_names or ())
+        skipped: list[tuple] = []
+
+        locked_until = now + timedelta(seconds=lease_seconds)
+        while heap and len(claimed) < limit:
+            key = heap[0]
+            if key[0] > now:
+                break  # head not due yet; everything behind it is later
+            heapq.heappop(heap)
+            row = self._rows.get(key[3])
+            if row is None or row.status != JobStatus.queued or row.runnable_key() != key:
+                continue  # stale entry
+            if (
+                (include is not None and row.task_name not in include)
+                or row.task_name in exclude
+                or (bucket is not None and row.claim_bucket != bucket)
+            ):
+                skipped.append(key)  # filtered out, stays runnable
+                continue
+
+            self._set_running(row, worker_id=worker_id, locked_until=locked_until)
+            row.attempts += 1
+            row.updated_at = now
+            claimed.append(row.to_record())
+
+        for key in skipped:
+            heapq.heappush(heap, key)
+        return claimed
+
+    async def heartbeat_member(self, *, queue: str, worker_id: str, now: datetime, ttl: float) -> list[str]:
+        members = self._members.setdefault(queue, {})
+        members[worker_id] = now
+        expired_before = now - timedelta(seconds=ttl)
+        for member in [m for m, seen in members.items() if seen < expired_before]:
+            del members[member]
+        return sorted(members)
+
+    async def leave_members(self, *, queue: str, worker_id: str) -> None:
+        self._members.get(queue, {}).pop(worker_id, None)
+
+    async def extend_leases(
+        self, *, job_ids: list[UUID], worker_id: str, lease_seconds: float, now: datetime
+    ) -> list[UUID]:
+        locked_until = now + timedelta(seconds=lease_seconds)
+        extended: list[UUID] = []
+        for job_id in job_ids:
+            row = self._rows.get(job_id)
+            if row is not None and row.status == JobStatus.running and row.locked_by == worker_id:
+                row.locked_until = locked_until
+                extended.append(job_id)
+        return extended
+
+    async def complete_job(self, *, job_id: UUID, worker_id: str, now: datetime) -> JobRecord | None:
+        row = self._rows.get(job_id)
+        if row is None or row.status != JobStatus.running or row.locked_by != worker_id:
+            return None
+
+        self._clear_running(row)
+        self._set_status(row, JobStatus.succeeded, now)
+        row.updated_at = now
+        return row.to_record()
+
+    async def fail_jobs(self, *, failures: list[JobFailure], worker_id: str, now: datetime) -> list[JobPublic]:
+        failed: list[JobPublic] = []
+        for f in failures:
+            row = self._rows.get(f.job_id)
+            if row is None or row.status != JobStatus.running or row.locked_by != worker_id:
+                continue
+
+            self._clear_running(row)
+            row.last_error = f.error
+            if f.retryable and row.attempts < row.max_attempts:
+                row.status = JobStatus.queued
+                row.run_at = f.run_at
+                self._drop_dedupe_key(row)
+                self._push_runnable(row)
+            else:
+                self._set_status(row, JobStatus.dead, now)
+            row.updated_at = now
+            failed.append(row.to_public())
+        return failed
+
+    async def release_jobs(self, *, job_ids: list[UUID], worker_id: str, now: datetime) -> list[UUID]:
+        released: list[UUID] = []
+        for job_id in job_ids:
+            row = self._rows.get(job_id)
+            if row is None or row.status != JobStatus.running or row.locked_by != worker_id:
+                continue
+
+            cancel_requested = row.cancel_requested_at is not None
+            self._clear_running(row)
+            row.attempts -= 1
+            if cancel_requested:
+                self._set_status(row, JobStatus.cancelled, now)
+            else:
+                row.status = JobStatus.queued
+                self._drop_dedupe_key(row)
+                self._push_runnable(row)
+            row.updated_at = now
+            released.append(job_id)
+        return released
+
+    async def cancel_requested(self, *, job_ids: list[UUID], worker_id: str) -> list[UUID]:
+        requested: list[UUID] = []
+        for job_id in job_ids:
+            row = self._rows.get(job_id)
+            if (
+                row is not None
+                and row.status == JobStatus.running
+                and row.locked_by == worker_id
+                and row.cancel_requested_at is not None
+            ):
+                requested.append(job_id)
+        return requested
+
+    async def finish_cancelled(self, *, job_ids: list[UUID], worker_id: str, now: datetime) -> list[JobPublic]:
+        finished: list[JobPublic] = []
+        for job_id in job_ids:
+            row = self._rows.get(job_id)
+            if row is None or row.status != JobStatus.running or row.locked_by != worker_id:
+                continue
+            self._clear_running(row)
+            self._set_status(row, JobStatus.cancelled, now)
+            row.updated_at = now
+            finished.append(row.to_public())
+        return finished
+
+    async def count_running(self, *, task_names: list[str]) -> dict[str, int]:
+        wanted = set(task_names)
+        counts: dict[str, int] = {}
+        for ids in self._running.values():
+            for job_id in ids:
+                name = self._rows[job_id].task_name
+                if name in wanted:
+                    counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    async def reap_expired_leases(self, *, queue: str, now: datetime, limit: int = 100) -> list[JobPublic]:
+        running = self._running.get(queue)
+        if not running:
+            return []
+
+        expired = sorted(
+            (row for row in (self._rows[i] for i in running) if row.locked_until < now),
+            key=lambda r: (r.locked_until, r.id),
+        )[:limit]
+
+        reaped: list[JobPublic] = []
+        for row in expired:
+            cancel_requested = row.cancel_requested_at is not None
+            self._clear_running(row)
+            if cancel_requested:
+                self._set_status(row, JobStatus.cancelled, now)
+            elif row.attempts >= row.max_attempts:
+                self._set_status(row, JobStatus.dead, now)
+                row.last_error = lease_expired_error(now)
+            else:
+                row.status = JobStatus.queued
+                row.run_at = now
+                row.last_error = lease_expired_error(now)
+                self._drop_dedupe_key(row)
+                self._push_runnable(row)
+            row.updated_at = now
+            reaped.append(row.to_public())
+
+        return reaped
@@ -0,0 +1,320 @@
+#src/equeue/db/migrate.py
+
+"""
+Ordered SQL migration runner, tracked in `schema_migrations`.
+
+    python -m equeue.db.migrate postgresql://postgres@localhost:5432/equeue --dir db/migrations
+
+A migration is one `NNN_name.sql` file. By default it runs in a single transaction with a
+short `lock_timeout`, so DDL that cannot get its lock fails fast (and is retried) instead of
+queueing behind a long transaction while every claim and enqueue queues behind it.
+Leading directive comments change that:
+
+    -- equeue:no-transaction
+        Statements run one by one in autocommit, e.g. CREATE INDEX CONCURRENTLY.
+        The version is recorded only after every statement succeeded and no index on a
+        table the file indexed is left INVALID, so the file is rerun from the top after a
+        failure: write each statement to be idempotent.
+
+    -- equeue:backfill batch_size=5000 pause=0.05
+        One UPDATE/DELETE, with `$1` as the batch size, repeated (one transaction each,
+        `pause` seconds apart) until it affects no rows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger("equeue.db")
+
+# serializes concurrent runners (e.g. several app instances deploying at once)
+MIGRATION_LOCK_ID = 0x6571_7565_7565  # "equeue"
+
+_VERSION_RE = re.compile(r"^\d+_[\w-]+\.sql$")
+_DIRECTIVE_RE = re.compile(r"^--\s*equeue:([\w-]+)(.*)$")
+# tables (or, for REINDEX INDEX, indexes) whose indexes a statement builds
+_INDEXED_RE = re.compile(
+    r"\bCREATE\s+(?:UNIQUE\s+)?INDEX\b.*?\bON\s+(?:ONLY\s+)?([\w.\"]+)"
+    r"|\bREINDEX\s+(?:\(.*?\)\s*)?(TABLE|INDEX)\s+(?:CONCURRENTLY\s+)?([\w.\"]+)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+class MigrationError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: str            # file name, e.g. "001_create_jobs_table.sql"
+    sql: str
+    transactional: bool = True
+    backfill: dict[str, float] | None = None    # {"batch_size": ..., "pause": ...}
+    checksum: str = field(default="", compare=False)
+
+    @classmethod
+    def from_file(cls, path: Path) -> Migration:
+        sql = path.read_text()
+        transactional = True
+        backfill = None
+        for line in sql.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if not line.startswith("--"):
+                break
+            m = _DIRECTIVE_RE.match(line)
+            if m is None:
+                continue
+            name, args = m.group(1), m.group(2).split()
+            if name == "no-transaction":
+                transactional = False
+            elif name == "backfill":
+                transactional = False
+                backfill = {"batch_size": 1000.0, "pause": 0.0}
+                for arg in args:
+                    key, _, value = arg.partition("=")
+                    if key not in backfill:
+                        raise MigrationError(f"{path.name}: unknown backfill option {key!r}")
+                    backfill[key] = float(value)
+            else:
+                raise MigrationError(f"{path.name}: unknown directive equeue:{name}")
+
+        checksum = hashlib.sha256(sql.encode()).hexdigest()
+        return cls(version=path.name, sql=sql, transactional=transactional, backfill=backfill, checksum=checksum)
+
+
+def load_migrations(directory: Path) -> list[Migration]:
+    paths = sorted(p for p in Path(directory).glob("*.sql") if _VERSION_RE.match(p.name))
+    return [Migration.from_file(p) for p in paths]
+
+
+def split_statements(sql: str) -> list[str]:
+    """
+    Split a script on top-level `;`, ignoring ones inside quotes, dollar-quoted bodies
+    and comments. Needed for no-transaction files: a multi-statement simple query runs
+    as one implicit transaction, which CREATE INDEX CONCURRENTLY refuses.
+    """
+    statements: list[str] = []
+    start = i = 0
+    n = len(sql)
+    while i < n:
+        c = sql[i]
+        if sql.startswith("--", i):
+            i = _find(sql, "\n", i)
+        elif sql.startswith("/*", i):
+            i = _find(sql, "*/", i + 2) + 1
+        elif c == "'":
+            i = _find(sql, "'", i + 1)
+        elif c == '"':
+            i = _find(sql, '"', i + 1)
+        elif c == "$" and (m := re.match(r"\$[A-Za-z_]*\$", sql[i:])):
+            i = _find(sql, m.group(0), i + len(m.group(0))) + len(m.group(0)) - 1
+        elif c == ";":
+            statements.append(sql[start:i])
+            start = i + 1
+        i += 1
+    statements.append(sql[start:])
+    return [s.strip() for s in statements if _strip_comments(s).strip()]
+
+
+def _find(sql: str, token: str, start: int) -> int:
+    pos = sql.find(token, start)
+    return len(sql) if pos < 0 else pos
+
+
+def _strip_comments(sql: str) -> str:
+    return re.sub(r"--[^\n]*|/\*.*?\*/", "", sql, flags=re.DOTALL)
+
+
+@dataclass
+class MigrationRunner:
+    """
+    Applies pending migrations over one asyncpg connection (not inside a transaction).
+    """
+    conn: Any                       # asyncpg.Connection
+    lock_timeout: float = 5.0       # seconds a DDL statement may wait for its lock
+    lock_retries: int = 5
+    retry_delay: float = 1.0        # doubled after every lock timeout
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+
+    async def applied(self) -> dict[str, str]:
+        await self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version     text PRIMARY KEY,
+                checksum    text NOT NULL,
+                applied_at  timestamptz NOT NULL DEFAULT now()
+            )
+            """
+        )
+        rows = await self.conn.fetch("SELECT version, checksum FROM schema_migrations")
+        return {r["version"]: r["checksum"] for r in rows}
+
+    async def run(self, migrations: list[Migration]) -> list[str]:
+        """
+        Apply every migration not yet recorded, in order; returns the versions applied.
+        Refuses to run if an applied migration's file has changed since.
+        """
+        await self.conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+        try:
+            applied = await self.applied()
+            for m in migrations:
+                if m.version in applied and applied[m.version] != m.checksum:
+                    raise MigrationError(f"{m.version} was modified after being applied")
+
+            done = []
+            for m in migrations:
+                if m.version in applied:
+                    continue
+                logger.info("applying migration %s", m.version)
+                await self.apply(m)
+                done.append(m.version)
+            return done
+        finally:
+            await self.conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+
+    async def apply(self, m: Migration) -> None:
+        if m.transactional:
+            async def step() -> None:
+                async with self.conn.transaction():
+                    await self.conn.execute(f"SET LOCAL lock_timeout = {int(self.lock_timeout * 1000)}")
+                    await self.conn.execute(m.sql)
+                    await self._record(m)
+
+            await self._retry_on_lock_timeout(step)
+            return
+
+        if m.backfill is not None:
+            await self._backfill(m)
+        else:
+            statements = split_statements(m.sql)
+            for statement in statements:
+                await self._retry_on_lock_timeout(lambda s=statement: self._autocommit(s))
+            await self._check_indexes(m, statements)
+        await self._record(m)
+
+    async def _check_indexes(self, m: Migration, statements: list[str]) -> None:
+        """
+        A CONCURRENTLY build that fails leaves an INVALID index behind, which a rerun's
+        IF NOT EXISTS then keeps: refuse to record the file while any index on a table
+        it indexed is invalid.
+        """
+        tables, indexes = [], []
+        for statement in statements:
+            for match in _INDEXED_RE.finditer(_strip_comments(statement)):
+                if match.group(1):
+                    tables.append(match.group(1))
+                elif match.group(2).upper() == "TABLE":
+                    tables.append(match.group(3))
+                else:
+                    indexes.append(match.group(3))
+        if not tables and not indexes:
+            return
+        rows = await self.conn.fetch(
+            """
+            SELECT i.indexrelid::regclass::text AS name
+            FROM pg_index i
+            WHERE NOT i.indisvalid
+              AND i.indrelid IN (
+                  SELECT to_regclass(t) FROM unnest($1::text[]) AS t
+                  UNION
+                  SELECT x.indrelid FROM pg_index x WHERE x.indexrelid IN (
+                      SELECT to_regclass(n) FROM unnest($2::text[]) AS n
+                  )
+              )
+            ORDER BY 1
+            """,
+            tables,
+            indexes,
+        )
+        if rows:
+            names = ", ".join(r["name"] for r in rows)
+            raise MigrationError(f"{m.version} left invalid indexes: {names} (drop them and rerun)")
+
+    async def _autocommit(self, statement: str, *args: Any) -> Any:
+        # CONCURRENTLY waits on old transactions without blocking writers: never time it out
+        # (a timed-out CREATE INDEX CONCURRENTLY leaves an INVALID index behind)
+        timeout = 0 if re.search(r"\bCONCURRENTLY\b", statement, re.IGNORECASE) else int(self.lock_timeout * 1000)
+        await self.conn.execute(f"SET lock_timeout = {timeout}")
+        try:
+            return await self.conn.execute(statement, *args)
+        finally:
+            await self.conn.execute("RESET lock_timeout")
+
+    async def _backfill(self, m: Migration) -> None:
+        statements = split_statements(m.sql)
+        if len(statements) != 1:
+            raise MigrationError(f"{m.version}: a backfill must be exactly one statement")
+        batch_size = int(m.backfill["batch_size"])
+        pause = m.backfill["pause"]
+        total = 0
+        while True:
+            status = await self._retry_on_lock_timeout(lambda: self._autocommit(statements[0], batch_size))
+            count = int(status.rsplit(" ", 1)[-1])
+            total += count
+            if count == 0:
+                break
+            logger.info("%s: backfilled %d rows", m.version, total)
+            if pause:
+                await self.sleep(pause)
+
+    async def _record(self, m: Migration) -> None:
+        await self.conn.execute(
+            "INSERT INTO schema_migrations (version, checksum) VALUES ($1, $2)", m.version, m.checksum
+        )
+
+    async def _retry_on_lock_timeout(self, step: Callable[[], Awaitable[Any]]) -> Any:
+        import asyncpg
+
+        delay = self.retry_delay
+        for attempt in range(self.lock_retries + 1):
+            try:
+                return await step()
+            except asyncpg.exceptions.LockNotAvailableError:
+                if attempt == self.lock_retries:
+                    raise
+                logger.warning("migration step timed out waiting for a lock; retrying in %.1fs", delay)
+                await self.sleep(delay)
+                delay *= 2
+
+
+async def migrate(conn: Any, directory: Path, **kw: Any) -> list[str]:
+    """
+    Apply pending migrations from `directory` over an asyncpg connection.
+    """
+    return await MigrationRunner(conn, **kw).run(load_migrations(directory))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m equeue.db.migrate", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("dsn", help="postgresql://user@host:port/db")
+    parser.add_argument("--dir", type=Path, default=Path("db/migrations"))
+    parser.add_argument("--lock-timeout", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    async def run() -> list[str]:
+        import asyncpg
+
+        conn = await asyncpg.connect(args.dsn.replace("postgresql+asyncpg://", "postgresql://"))
+        try:
+            return await migrate(conn, args.dir, lock_timeout=args.lock_timeout)
+        finally:
+            await conn.close()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    done = asyncio.run(run())
+    print(f"applied {len(done)} migrations", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,52 @@
+#src/equeue/db/notify.py
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+from uuid import UUID
+
+from equeue.db.hooks import ConnectFactory
+
+logger = logging.getLogger("equeue.db")
+
+# see db/migrations/004_cancel_notify.sql
+CANCEL_CHANNEL = "equeue_cancel"
+
+
+def pg_cancel_listener(
+    connect: ConnectFactory, *, channel: str = CANCEL_CHANNEL
+) -> Callable[[Callable[[UUID], None]], Awaitable[None]]:
+    """
+    Worker cancel_listener backed by LISTEN on a dedicated connection, e.g.
+        Worker(..., cancel_listener=pg_cancel_listener(engine.connect))
+
+    The returned coroutine function calls `on_cancel(job_id)` for every notification and
+    runs until cancelled; it raises ConnectionError if the connection drops, so the
+    caller can reconnect (cancel requests in the meantime are caught by polling).
+    """
+
+    async def listen(on_cancel: Callable[[UUID], None]) -> None:
+        async with connect() as conn:
+            raw = (await conn.get_raw_connection()).driver_connection
+            lost = asyncio.Event()
+
+            def notified(_conn: Any, _pid: int, _channel: str, payload: str) -> None:
+                try:
+                    job_id = UUID(payload)
+                except ValueError:
+                    logger.warning("ignoring malformed %s payload %r", channel, payload)
+                    return
+                on_cancel(job_id)
+
+            raw.add_termination_listener(lambda _conn: lost.set())
+            await raw.add_listener(channel, notified)
+            try:
+                await lost.wait()
+            finally:
+                if not raw.is_closed():
+                    await raw.remove_listener(channel, notified)
+            raise ConnectionError(f"LISTEN {channel} connection lost")
+
+    return listen
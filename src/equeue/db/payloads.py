@@ -0,0 +1,58 @@
+#src/equeue/db/payloads.py
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any
+
+from equeue.observability.metrics import PAYLOAD_CACHE_REQUESTS
+
+_HIT = PAYLOAD_CACHE_REQUESTS.labels("hit")
+_MISS = PAYLOAD_CACHE_REQUESTS.labels("miss")
+
+
+def canonical_payload(payload: dict[str, Any]) -> tuple[str, bytes]:
+    """
+    (canonical JSON text, sha256 digest): equal payloads hash equally whatever their key order.
+    """
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return body, hashlib.sha256(body.encode()).digest()
+
+
+class PayloadCache:
+    """
+    Bounded LRU of out-of-line payload bodies (job_payloads), keyed by content hash.
+    Content-addressed entries never change, so there is nothing to invalidate.
+
+    Shared by every repo of a process, e.g. a worker's
+        session_scope(sessionmaker, payload_cache=PayloadCache())
+
+    Bodies are kept as JSON text and decoded per job: tasks get their own dict and
+    cannot mutate a payload shared with other jobs.
+    """
+
+    def __init__(self, *, maxsize: int = 1024):
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, str] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, digest: bytes) -> str | None:
+        body = self._entries.get(digest)
+        if body is None:
+            _MISS.inc()
+            return None
+        _HIT.inc()
+        self._entries.move_to_end(digest)
+        return body
+
+    def put(self, digest: bytes, body: str) -> None:
+        self._entries[digest] = body
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
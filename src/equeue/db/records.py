@@ -0,0 +1,94 @@
+#src/equeue/db/records.py
+
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from equeue.api.models.jobs import JobPublic, JobStatus
+
+
+class JobRecord:
+    """
+    A job as the worker holds it between claim and ack: a plain slotted object with
+    the JobPublic fields, built straight from a row without validation.
+
+    A worker may buffer thousands of these (prefetch), most of which it only ever
+    reads `id` and `task_name` from, so the payload stays JSON text until the task
+    runs and first reads `payload`. Convert with to_public() where a JobPublic is
+    needed (API responses); nothing in the claim -> execute -> ack path does.
+    """
+    __slots__ = (
+        "id", "task_name", "status", "queue", "priority", "run_at", "attempts",
+        "max_attempts", "created_by", "created_at", "updated_at", "cancel_requested_at",
+        "last_error", "group_id", "_payload", "_payload_json",
+    )
+
+    def __init__(
+        self,
+        *,
+        id: UUID,
+        task_name: str,
+        status: JobStatus,
+        queue: str,
+        priority: int,
+        run_at: datetime,
+        attempts: int,
+        max_attempts: int,
+        created_by: str,
+        created_at: datetime,
+        updated_at: datetime,
+        payload: dict[str, Any] | None = None,
+        payload_json: str | None = None,
+        cancel_requested_at: datetime | None = None,
+        last_error: dict[str, Any] | None = None,
+        group_id: UUID | None = None,
+    ):
+        self.id = id
+        self.task_name = task_name
+        self.status = status
+        self.queue = queue
+        self.priority = priority
+        self.run_at = run_at
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.created_by = created_by
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.cancel_requested_at = cancel_requested_at
+        self.last_error = last_error
+        self.group_id = group_id
+        # exactly one of the two is set until payload is first read
+        self._payload = payload
+        self._payload_json = payload_json
+
+    @property
+    def payload(self) -> dict[str, Any]:
+        if self._payload is None:
+            self._payload = json.loads(self._payload_json) if self._payload_json is not None else {}
+            self._payload_json = None
+        return self._payload
+
+    def to_public(self) -> JobPublic:
+        return JobPublic(
+            id=self.id,
+            task_name=self.task_name,
+            status=self.status,
+            queue=self.queue,
+            payload=self.payload,
+            priority=self.priority,
+            run_at=self.run_at,
+            attempts=self.attempts,
+            max_attempts=self.max_attempts,
+            created_by=self.created_by,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            cancel_requested_at=self.cancel_requested_at,
+            last_error=self.last_error,
+            group_id=self.group_id,
+        )
+
+    def __repr__(self) -> str:
+        return f"JobRecord(id={self.id!s}, task_name={self.task_name!r}, status={self.status.value})"
@@ -0,0 +1,327 @@
+#src/equeue/db/sharding.py
+
+"""
+Horizontal sharding: one deployment spread over several Postgres databases.
+
+Queues are placed on shards by consistent hashing (HashRing), so adding a shard moves
+only about 1/n of the queues. Every job id records the shard it was written to
+(sharded_job_id / job_shard), so get and cancel go straight to one database even after
+its queue has been placed elsewhere. Shards are identified by position: the list is
+append-only (never reorder or remove one).
+
+Workers claim from each shard's own repo, one set of workers per database; a queue
+that moved to another shard keeps draining on its old one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import os
+from bisect import bisect_right
+from datetime import datetime
+from itertools import islice
+from typing import Any, Awaitable, Callable, Sequence, TypeVar
+from uuid import UUID
+
+import anyio
+
+from equeue.api.models.jobs import (
+    BulkCancelRequest,
+    BulkCancelResponse,
+    EnqueueJobGroupRequest,
+    EnqueueJobRequest,
+    JobChangesPage,
+    JobChangesQuery,
+    JobGroupPublic,
+    JobListPage,
+    JobListQuery,
+    JobPublic,
+    ReplayDeadJobsRequest,
+    ReplayDeadJobsResponse,
+    project_job,
+)
+from equeue.db.cursor import encode_change_token, encode_cursor
+
+T = TypeVar("T")
+
+# the shard index takes the first 16 bits of a job id
+MAX_SHARDS = 1 << 16
+
+
+# ------------------------------------------------------------------
+# Shard-aware job ids
+# ------------------------------------------------------------------
+
+def sharded_job_id(shard: int) -> UUID:
+    """
+    Random UUIDv8 whose first two bytes are `shard` (122 -> 106 random bits).
+    """
+    if not 0 <= shard < MAX_SHARDS:
+        raise ValueError(f"shard must be in [0, {MAX_SHARDS})")
+    b = bytearray(os.urandom(16))
+    b[0:2] = shard.to_bytes(2, "big")
+    b[6] = (b[6] & 0x0F) | 0x80     # version 8 (custom)
+    b[8] = (b[8] & 0x3F) | 0x80     # RFC 9562 variant
+    return UUID(bytes=bytes(b))
+
+
+def job_shard(job_id: UUID) -> int | None:
+    """
+    Shard encoded in a sharded_job_id; None for ids minted without one (uuid4).
+    """
+    if job_id.version != 8:
+        return None
+    return int.from_bytes(job_id.bytes[:2], "big")
+
+
+# ------------------------------------------------------------------
+# Consistent hashing
+# ------------------------------------------------------------------
+
+def _point(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent-hash ring over shard indexes 0..shards-1, with `vnodes` points per shard
+    to even out the share each one gets.
+    """
+
+    def __init__(self, shards: int, *, vnodes: int = 128):
+        if not 1 <= shards <= MAX_SHARDS:
+            raise ValueError(f"shards must be in [1, {MAX_SHARDS}]")
+        points = sorted((_point(f"shard-{s}#{v}"), s) for s in range(shards) for v in range(vnodes))
+        self.shards = shards
+        self._points = [p for p, _ in points]
+        self._owners = [s for _, s in points]
+
+    def shard_for(self, key: str) -> int:
+        i = bisect_right(self._points, _point(key))
+        return self._owners[i % len(self._owners)]
+
+
+# ------------------------------------------------------------------
+# Sharded repo
+# ------------------------------------------------------------------
+
+class ShardedJobRepo:
+    """
+    JobRepo over one repo per shard; hand it to QueueClient like any other repo.
+
+    Shard `i`'s repo must mint ids for shard `i` (SqlAlchemyJobRepo(shard=i),
+    InMemoryJobRepo(shard=i)). Ids without a shard (jobs written before sharding) are
+    looked up on shard 0, the original database.
+
+    - enqueue: the queue's shard; a group goes whole to its callback's shard (the
+      fan-in counter is a per-database trigger). An idempotency key is first looked
+      up on every shard, so a retry finds its job wherever the key was first written
+    - get/cancel by id: the id's shard
+    - list, change feed, bulk cancel by filter, replay, get_group: every shard,
+      concurrently; list and change pages are merged by their keyset and keep the
+      usual cursor / token format
+    - commit: every shard, concurrently and not atomically; there is no consistency
+      token (a WAL position names one database), so use it without a replica
+    """
+
+    def __init__(self, shards: Sequence[Any], *, ring: HashRing | None = None):
+        if not shards:
+            raise ValueError("at least one shard is required")
+        self.shards = list(shards)
+        self.ring = ring if ring is not None else HashRing(len(self.shards))
+        if self.ring.shards != len(self.shards):
+            raise ValueError("ring and shard list disagree on the number of shards")
+
+    def shard_for_queue(self, queue: str) -> int:
+        return self.ring.shard_for(queue)
+
+    def shard_for_job(self, job_id: UUID) -> int:
+        shard = job_shard(job_id)
+        if shard is None:
+            return 0
+        if shard >= len(self.shards):
+            raise LookupError(f"job {job_id} belongs to unknown shard {shard}")
+        return shard
+
+    async def _each(self, calls: Sequence[Callable[[], Awaitable[T]]]) -> list[T]:
+        results: list[Any] = [None] * len(calls)
+
+        async def run(i: int) -> None:
+            results[i] = await calls[i]()
+
+        async with anyio.create_task_group() as tg:
+            for i in range(len(calls)):
+                tg.start_soon(run, i)
+        return results
+
+    async def commit(self) -> None:
+        """
+        Commit each shard's writes (shards whose repo has no commit() are skipped). A
+        shard that fails leaves the others committed; retry the write, as for bulk cancel.
+        """
+        await self._each([repo.commit for repo in self.shards if hasattr(repo, "commit")])
+
+    # ---- writes routed by queue ----
+
+    async def _find_keyed(self, created_by: str, keys: list[str]) -> dict[str, JobPublic]:
+        """
+        Jobs already written for these idempotency keys, on any shard. The key's queue
+        may differ from the request's, or its placement may have moved since.
+        """
+        if not keys:
+            return {}
+        found = await self._each([
+            lambda repo=repo: repo.get_jobs_by_idempotency_key(created_by=created_by, keys=keys)
+            for repo in self.shards
+        ])
+        return {k: job for by_key in found for k, job in by_key.items()}
+
+    async def insert_job(self, *, created_by: str, req: EnqueueJobRequest, now: datetime) -> JobPublic:
+        if req.idempotency_key is not None:
+            existing = await self._find_keyed(created_by, [req.idempotency_key])
+            if req.idempotency_key in existing:
+                return existing[req.idempotency_key]
+        repo = self.shards[self.shard_for_queue(req.queue)]
+        return await repo.insert_job(created_by=created_by, req=req, now=now)
+
+    async def insert_jobs(self, *, created_by: str, reqs: list[EnqueueJobRequest], now: datetime) -> list[JobPublic]:
+        existing = await self._find_keyed(
+            created_by, list(dict.fromkeys(r.idempotency_key for r in reqs if r.idempotency_key is not None))
+        )
+        jobs: list[Any] = [None] * len(reqs)
+        positions: dict[int, list[int]] = {}
+        key_shards: dict[str, int] = {}
+        for i, r in enumerate(reqs):
+            key = r.idempotency_key
+            if key in existing:
+                jobs[i] = existing[key]
+                continue
+            shard = self.shard_for_queue(r.queue)
+            if key is not None:
+                # a key repeated in the batch goes wherever its first request went
+                shard = key_shards.setdefault(key, shard)
+            positions.setdefault(shard, []).append(i)
+
+        shards = list(positions)
+        batches = await self._each([
+            lambda s=s: self.shards[s].insert_jobs(
+                created_by=created_by, reqs=[reqs[i] for i in positions[s]], now=now
+            )
+            for s in shards
+        ])
+        for s, batch in zip(shards, batches):
+            for i, job in zip(positions[s], batch):
+                jobs[i] = job
+        return jobs
+
+    async def insert_group(self, *, created_by: str, req: EnqueueJobGroupRequest, now: datetime) -> JobGroupPublic:
+        repo = self.shards[self.shard_for_queue(req.callback.queue)]
+        return await repo.insert_group(created_by=created_by, req=req, now=now)
+
+    # ---- by id ----
+
+    async def get_job(
+        self, *, created_by: str, job_id: UUID, fields: tuple[str, ...] | None = None
+    ) -> JobPublic | None:
+        try:
+            repo = self.shards[self.shard_for_job(job_id)]
+        except LookupError:
+            return None
+        return await repo.get_job(created_by=created_by, job_id=job_id, fields=fields)
+
+    async def cancel_job(self, *, created_by: str, job_id: UUID, now: datetime) -> tuple[JobPublic | None, bool]:
+        try:
+            repo = self.shards[self.shard_for_job(job_id)]
+        except LookupError:
+            return None, False
+        return await repo.cancel_job(created_by=created_by, job_id=job_id, now=now)
+
+    async def get_group(self, *, created_by: str, group_id: UUID) -> JobGroupPublic | None:
+        # group ids carry no shard; a group lookup is rare enough to ask everyone
+        found = await self._each([
+            lambda repo=repo: repo.get_group(created_by=created_by, group_id=group_id) for repo in self.shards
+        ])
+        return next((g for g in found if g is not None), None)
+
+    # ---- every shard ----
+
+    async def list_jobs(self, *, created_by: str, q: JobListQuery) -> JobListPage:
+        """
+        Each shard returns its own first `limit` rows after the cursor; the global page is
+        the first `limit` of their merge. The cursor stays a plain (created_at, id).
+        """
+        fields = q.field_names
+        shard_q = q
+        if fields is not None and "created_at" not in fields:
+            # the merge needs the keyset columns even when the caller did not ask for them
+            shard_q = q.model_copy(update={"fields": ",".join([*fields, "created_at"])})
+
+        pages = await self._each([
+            lambda repo=repo: repo.list_jobs(created_by=created_by, q=shard_q) for repo in self.shards
+        ])
+        merged = heapq.merge(*(p.items for p in pages), key=lambda j: (j.created_at, j.id), reverse=True)
+        items = list(islice(merged, q.limit + 1))
+
+        next_cursor = None
+        if len(items) > q.limit or any(p.next_cursor is not None for p in pages):
+            items = items[: q.limit]
+            if items:
+                next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+        if shard_q is not q:
+            items = [project_job(j, fields) for j in items]
+        return JobListPage(items=items, next_cursor=next_cursor)
+
+    async def list_changes(self, *, created_by: str, q: JobChangesQuery, until: datetime) -> JobChangesPage:
+        """
+        As list_jobs, merged ascending on (updated_at, id): the token stays a plain
+        (updated_at, id) and every shard resumes after it.
+        """
+        fields = q.field_names
+        shard_q = q
+        if fields is not None and "updated_at" not in fields:
+            shard_q = q.model_copy(update={"fields": ",".join([*fields, "updated_at"])})
+
+        pages = await self._each([
+            lambda repo=repo: repo.list_changes(created_by=created_by, q=shard_q, until=until) for repo in self.shards
+        ])
+        merged = heapq.merge(*(p.items for p in pages), key=lambda j: (j.updated_at, j.id))
+        items = list(islice(merged, q.limit + 1))
+
+        has_more = len(items) > q.limit or any(p.has_more for p in pages)
+        items = items[: q.limit]
+        next_token = encode_change_token(items[-1].updated_at, items[-1].id) if items else q.since
+        if shard_q is not q:
+            items = [project_job(j, fields) for j in items]
+        return JobChangesPage(items=items, next_token=next_token, has_more=has_more)
+
+    async def cancel_jobs(self, *, created_by: str, req: BulkCancelRequest, now: datetime) -> BulkCancelResponse:
+        if req.job_ids is not None:
+            by_shard: dict[int, list[UUID]] = {}
+            for job_id in req.job_ids:
+                try:
+                    by_shard.setdefault(self.shard_for_job(job_id), []).append(job_id)
+                except LookupError:
+                    continue
+            calls = [
+                lambda s=s, ids=ids: self.shards[s].cancel_jobs(
+                    created_by=created_by, req=BulkCancelRequest(job_ids=ids), now=now
+                )
+                for s, ids in by_shard.items()
+            ]
+        else:
+            calls = [lambda repo=repo: repo.cancel_jobs(created_by=created_by, req=req, now=now) for repo in self.shards]
+
+        result = BulkCancelResponse()
+        for r in await self._each(calls):
+            result.cancelled += r.cancelled
+            result.cancel_requested += r.cancel_requested
+        return result
+
+    async def replay_dead_jobs(
+        self, *, created_by: str, req: ReplayDeadJobsRequest, now: datetime
+    ) -> ReplayDeadJobsResponse:
+        results = await self._each([
+            lambda repo=repo: repo.replay_dead_jobs(created_by=created_by, req=req, now=now) for repo in self.shards
+        ])
+        return ReplayDeadJobsResponse(replayed=sum(r.replayed for r in results))
@@ -0,0 +1,3 @@
+from .metrics import REGISTRY, client_metrics, repo_metrics
+
+__all__ = ["REGISTRY", "client_metrics", "repo_metrics"]
@@ -0,0 +1,140 @@
+#src/equeue/observability/metrics.py
+
+from __future__ import annotations
+
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+# Dedicated registry so /metrics only exposes eQueue series (and tests can read it).
+REGISTRY = CollectorRegistry()
+
+# Label used when the queue is not known up front (get/cancel miss, unfiltered list).
+ANY_QUEUE = "*"
+# Label used once MAX_QUEUE_LABELS distinct queues were seen (queue names are user input).
+OTHER_QUEUE = "_other"
+MAX_QUEUE_LABELS = 200
+
+_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+CLIENT_LATENCY = Histogram(
+    "equeue_client_operation_seconds",
+    "QueueClient operation latency",
+    ["operation", "queue"],
+    buckets=_LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+CLIENT_ERRORS = Counter(
+    "equeue_client_operation_errors_total",
+    "QueueClient operations that raised",
+    ["operation", "queue"],
+    registry=REGISTRY,
+)
+
+REPO_LATENCY = Histogram(
+    "equeue_repo_statement_seconds",
+    "Repo SQL statement latency (execute + fetch)",
+    ["operation", "queue"],
+    buckets=_LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+REPO_ROWS = Counter(
+    "equeue_repo_statement_rows_total",
+    "Rows returned by repo SQL statements",
+    ["operation", "queue"],
+    registry=REGISTRY,
+)
+REPO_ERRORS = Counter(
+    "equeue_repo_statement_errors_total",
+    "Repo SQL statements that raised",
+    ["operation", "queue"],
+    registry=REGISTRY,
+)
+
+# get/list routing when QueueClient has a replica: "replica", or "primary" when a
+# consistency token was not replayed on the replica within replica_wait
+REPLICA_READS = Counter(
+    "equeue_client_replica_reads_total",
+    "QueueClient reads by the database that served them",
+    ["served_by"],
+    registry=REGISTRY,
+)
+
+# TerminalJobCache lookups: "hit", "miss" (loaded from the DB) or "coalesced" (waited on
+# an identical in-flight load)
+JOB_CACHE_REQUESTS = Counter(
+    "equeue_job_cache_requests_total",
+    "Terminal-job cache lookups by outcome",
+    ["result"],
+    registry=REGISTRY,
+)
+
+PAYLOAD_CACHE_REQUESTS = Counter(
+    "equeue_payload_cache_requests_total",
+    "Out-of-line payload lookups by outcome (hit: in-process cache, miss: read from job_payloads)",
+    ["result"],
+    registry=REGISTRY,
+)
+
+
+class OpMetrics:
+    """
+    Pre-bound label children for one (operation, queue) pair.
+    Resolving `.labels()` takes a lock and builds a tuple; doing it once per pair keeps
+    the per-call cost to a dict lookup plus the observe/inc itself.
+    """
+    __slots__ = ("latency", "errors", "rows")
+
+    def __init__(self, latency, errors, rows=None):
+        self.latency = latency
+        self.errors = errors
+        self.rows = rows
+
+
+_client_children: dict[tuple[str, str], OpMetrics] = {}
+_repo_children: dict[tuple[str, str], OpMetrics] = {}
+# distinct queue labels bound so far, per metric family (the cap is on queues, not pairs)
+_client_queues: set[str] = set()
+_repo_queues: set[str] = set()
+
+
+def _resolve(
+    children: dict[tuple[str, str], OpMetrics], queues: set[str], operation: str, queue: str, bind
+) -> OpMetrics:
+    m = children.get((operation, queue))
+    if m is not None:
+        return m
+    if queue != ANY_QUEUE and queue not in queues:
+        if len(queues) >= MAX_QUEUE_LABELS:
+            queue = OTHER_QUEUE
+            m = children.get((operation, queue))
+            if m is not None:
+                return m
+        else:
+            queues.add(queue)
+    m = bind(operation, queue)
+    children[(operation, queue)] = m
+    return m
+
+
+def _bind_client(operation: str, queue: str) -> OpMetrics:
+    return OpMetrics(
+        latency=CLIENT_LATENCY.labels(operation, queue),
+        errors=CLIENT_ERRORS.labels(operation, queue),
+    )
+
+
+def _bind_repo(operation: str, queue: str) -> OpMetrics:
+    return OpMetrics(
+        latency=REPO_LATENCY.labels(operation, queue),
+        errors=REPO_ERRORS.labels(operation, queue),
+        rows=REPO_ROWS.labels(operation, queue),
+    )
+
+
+def client_metrics(operation: str, queue: str) -> OpMetrics:
+    return _resolve(_client_children, _client_queues, operation, queue, _bind_client)
+
+
+def repo_metrics(operation: str, queue: str) -> OpMetrics:
+    return _resolve(_repo_children, _repo_queues, operation, queue, _bind_repo)
@@ -1,3 +1,21 @@
-from .registry import task, get_task
+from .registry import (
+    TaskOptions,
+    get_task,
+    get_task_options,
+    is_registered,
+    limited_tasks,
+    register_lazy,
+    task,
+    task_names,
+)
 
-__all__ = ["task", "get_task"]
\ No newline at end of file
+__all__ = [
+    "task",
+    "get_task",
+    "get_task_options",
+    "limited_tasks",
+    "register_lazy",
+    "is_registered",
+    "task_names",
+    "TaskOptions",
+]
@@ -0,0 +1,74 @@
+# src/equeue/registry/manifest.py
+
+"""
+Task manifest: the list of task names, their "module:function" references and options,
+generated once (at build/deploy time) so workers can validate task names and
+register tasks lazily without importing every task module at startup.
+
+    python -m equeue.registry.manifest myapp.tasks.emails myapp.tasks.puzzles -o tasks.manifest.json
+"""
+
+import argparse
+import importlib
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from . import registry
+
+MANIFEST_VERSION = 1
+
+def build_manifest(modules: Iterable[str]) -> Dict:
+    """
+    Import the given task modules and collect every registered task.
+    """
+    for module_name in modules:
+        importlib.import_module(module_name)
+
+    tasks: Dict[str, str] = {}
+    for name in registry.task_names():
+        lazy_ref = registry._LAZY_TASKS.get(name)
+        tasks[name] = lazy_ref if lazy_ref is not None else registry.task_ref(registry._TASK_REGISTRY[name])
+
+    options = {name: registry.get_task_options(name).to_dict() for name in tasks}
+    options = {name: opts for name, opts in options.items() if opts}
+
+    return {"version": MANIFEST_VERSION, "tasks": tasks, "options": options}
+
+def write_manifest(path: Path, modules: Iterable[str]) -> Dict:
+    manifest = build_manifest(modules)
+    path.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    return manifest
+
+def load_manifest(path: Path) -> List[str]:
+    """
+    Register every task in the manifest lazily. Tasks already registered under the
+    same reference are left alone. Returns the task names.
+    """
+    manifest = json.loads(Path(path).read_text())
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported task manifest version: {manifest.get('version')!r}")
+
+    options = manifest.get("options", {})
+    for name, ref in manifest["tasks"].items():
+        if name in registry._TASK_REGISTRY and registry.task_ref(registry._TASK_REGISTRY[name]) == ref:
+            continue
+        if registry._LAZY_TASKS.get(name) == ref:
+            continue
+        registry.register_lazy(name, ref, **options.get(name, {}))
+
+    return sorted(manifest["tasks"])
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m equeue.registry.manifest", description=__doc__.split("\n\n")[0])
+    parser.add_argument("modules", nargs="+", help="Task modules to import, e.g. myapp.tasks.emails")
+    parser.add_argument("-o", "--output", type=Path, default=Path("tasks.manifest.json"))
+    args = parser.parse_args(argv)
+
+    manifest = write_manifest(args.output, args.modules)
+    print(f"wrote {len(manifest['tasks'])} tasks to {args.output}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,34 +1,181 @@
 # src/equeue/registry/registry.py
 
-from typing import Callable, Dict
+import importlib
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+@dataclass(frozen=True)
+class TaskOptions:
+    """
+    Per-task execution metadata, enforced by the worker runtime.
+    """
+    max_concurrency: Optional[int] = None      # executing + prefetched, per worker
+    global_concurrency: Optional[int] = None   # running jobs across the fleet (best-effort)
+    rate_limit: Optional[float] = None         # executions started per second, per worker
+    timeout: Optional[float] = None            # seconds per attempt
+    retry_base_delay: Optional[float] = None   # seconds; backoff ceiling for the first retry
+    retry_max_delay: Optional[float] = None    # seconds; backoff ceiling cap
+
+    def __post_init__(self):
+        for field_name in ("max_concurrency", "global_concurrency"):
+            v = getattr(self, field_name)
+            if v is not None and (not isinstance(v, int) or v < 1):
+                raise ValueError(f"{field_name} must be a positive integer")
+        for field_name in ("rate_limit", "timeout", "retry_base_delay", "retry_max_delay"):
+            v = getattr(self, field_name)
+            if v is not None and v <= 0:
+                raise ValueError(f"{field_name} must be positive")
+        if (
+            self.retry_base_delay is not None
+            and self.retry_max_delay is not None
+            and self.retry_base_delay > self.retry_max_delay
+        ):
+            raise ValueError("retry_base_delay must not exceed retry_max_delay")
+
+    @property
+    def limits_claims(self) -> bool:
+        return (
+            self.max_concurrency is not None
+            or self.global_concurrency is not None
+            or self.rate_limit is not None
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+_DEFAULT_OPTIONS = TaskOptions()
 
 _TASK_REGISTRY: Dict[str, Callable] = {}
 
-def task(*, name: str):
+_TASK_OPTIONS: Dict[str, TaskOptions] = {}
+
+# name -> "module:qualname", imported on first get_task()
+_LAZY_TASKS: Dict[str, str] = {}
+
+def task(
+    *,
+    name: str,
+    max_concurrency: Optional[int] = None,
+    global_concurrency: Optional[int] = None,
+    rate_limit: Optional[float] = None,
+    timeout: Optional[float] = None,
+    retry_base_delay: Optional[float] = None,
+    retry_max_delay: Optional[float] = None,
+):
     """
     Decorator to register a task by explicit name.
     Registration happens at import time.
+    Optional limits are stored as TaskOptions and enforced by workers.
     
     :type name: str
     """
 
     if not name or not isinstance(name, str):
         raise ValueError("Task name must be a non-empty string")
+    options = TaskOptions(
+        max_concurrency=max_concurrency,
+        global_concurrency=global_concurrency,
+        rate_limit=rate_limit,
+        timeout=timeout,
+        retry_base_delay=retry_base_delay,
+        retry_max_delay=retry_max_delay,
+    )
     
     def decorator(fn: Callable) -> Callable:
         if name in _TASK_REGISTRY:
             raise ValueError(f"Task {name} is already registered")
         
+        lazy_ref = _LAZY_TASKS.get(name)
+        if lazy_ref is not None:
+            # the module behind a lazy reference is being imported: fine if it is the same function
+            if lazy_ref != task_ref(fn):
+                raise ValueError(f"Task {name} is already registered as {lazy_ref}")
+            del _LAZY_TASKS[name]
+
         _TASK_REGISTRY[name] = fn
+        _set_options(name, options)
         return fn
     return decorator
 
+def register_lazy(name: str, ref: str, **options: Any) -> None:
+    """
+    Register a task by "module:function" reference without importing it.
+    The module is imported the first time the task is resolved with get_task().
+    `options` are TaskOptions fields, so limits are known before the import.
+    """
+    if not name or not isinstance(name, str):
+        raise ValueError("Task name must be a non-empty string")
+    module_name, sep, attr = ref.partition(":")
+    if not sep or not module_name or not attr:
+        raise ValueError(f"Task reference must look like 'module:function', got {ref!r}")
+    if name in _TASK_REGISTRY or name in _LAZY_TASKS:
+        raise ValueError(f"Task {name} is already registered")
+
+    task_options = TaskOptions(**options)
+    _LAZY_TASKS[name] = ref
+    _set_options(name, task_options)
+
 def get_task(name: str) -> Callable:
     """
-    Resolve a task by name.
+    Resolve a task by name, importing it on first use if it was registered lazily.
     Raises KeyError if task is not registered.
     """
     try:
         return _TASK_REGISTRY[name]
     except KeyError:
+        pass
+
+    ref = _LAZY_TASKS.get(name)
+    if ref is None:
         raise KeyError(f"Task '{name}' is not registered")
+    return _import_lazy(name, ref)
+
+def get_task_options(name: str) -> TaskOptions:
+    return _TASK_OPTIONS.get(name, _DEFAULT_OPTIONS)
+
+def limited_tasks() -> Dict[str, TaskOptions]:
+    """
+    Tasks whose options restrict claiming (concurrency or rate limits).
+    """
+    return {name: opts for name, opts in _TASK_OPTIONS.items() if opts.limits_claims}
+
+def is_registered(name: str) -> bool:
+    """
+    True if `name` can be resolved, without importing lazily registered tasks.
+    """
+    return name in _TASK_REGISTRY or name in _LAZY_TASKS
+
+def task_names() -> List[str]:
+    return sorted(set(_TASK_REGISTRY) | set(_LAZY_TASKS))
+
+def task_ref(fn: Callable) -> str:
+    """
+    "module:qualname" reference for a module-level callable.
+    """
+    qualname = getattr(fn, "__qualname__", "")
+    if not qualname or "<locals>" in qualname:
+        raise ValueError(f"{fn!r} is not importable by reference (define it at module level)")
+    return f"{fn.__module__}:{qualname}"
+
+def _set_options(name: str, options: TaskOptions) -> None:
+    if options == _DEFAULT_OPTIONS:
+        _TASK_OPTIONS.pop(name, None)
+    else:
+        _TASK_OPTIONS[name] = options
+
+def _import_lazy(name: str, ref: str) -> Callable:
+    module_name, _, attr = ref.partition(":")
+    obj = importlib.import_module(module_name)
+
+    # importing may already have registered it through @task
+    fn = _TASK_REGISTRY.get(name)
+    if fn is None:
+        for part in attr.split("."):
+            obj = getattr(obj, part)
+        if not callable(obj):
+            raise TypeError(f"Task {name} reference {ref} is not callable")
+        fn = obj
+        _TASK_REGISTRY[name] = fn
+
+    _LAZY_TASKS.pop(name, None)
+    return fn
@@ -0,0 +1,139 @@
+#src/equeue/sdk/producer.py
+
+"""
+Async producer for the /v1/jobs API.
+
+    async with Producer("http://equeue.internal", token=token) as producer:
+        job = await producer.enqueue(EnqueueJobRequest(task_name="puzzles.extract", queue="default"))
+
+A Producer holds one pooled keep-alive connection pool. enqueue() calls made within
+`max_delay` seconds of each other (from any number of tasks) go out as one
+POST /v1/jobs:batch of up to `max_batch` jobs, and each caller gets back its own job,
+or the error that failed the batch.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import anyio
+import httpx
+
+from equeue.api.models.jobs import EnqueueJobBatchRequest, EnqueueJobRequest, JobBatchPublic, JobPublic
+
+# EnqueueJobBatchRequest.jobs max_length
+MAX_BATCH = 1_000
+
+
+class _Pending:
+    __slots__ = ("req", "done", "result", "error")
+
+    def __init__(self, req: EnqueueJobRequest):
+        self.req = req
+        self.done = anyio.Event()
+        self.result: JobPublic | None = None
+        self.error: BaseException | None = None
+
+
+class _Batch:
+    __slots__ = ("items", "full")
+
+    def __init__(self):
+        self.items: list[_Pending] = []
+        self.full = anyio.Event()
+
+
+class Producer:
+    """
+    Auto-batching enqueue client; use as an async context manager. Leaving it sends
+    whatever is still pending, waits for in-flight batches and closes the pool.
+
+    A batch is one request: it succeeds or fails as a whole. Cancelling a caller does
+    not withdraw its job from a batch that is already being sent.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        token: str,
+        max_batch: int = 500,
+        max_delay: float = 0.002,           # seconds the first job of a batch waits for company
+        max_connections: int = 10,
+        timeout: float = 10.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        if not 1 <= max_batch <= MAX_BATCH:
+            raise ValueError(f"max_batch must be between 1 and {MAX_BATCH}")
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+            transport=transport,
+        )
+        self._batch: _Batch | None = None
+        self._tg: Any = None    # anyio TaskGroup while open
+
+    async def __aenter__(self) -> Producer:
+        tg = anyio.create_task_group()
+        await tg.__aenter__()
+        self._tg = tg
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> bool | None:
+        try:
+            if self._batch is not None:
+                self._batch.full.set()  # no point waiting out max_delay
+            return await self._tg.__aexit__(*exc_info)
+        finally:
+            self._tg = None
+            await self._http.aclose()
+
+    async def enqueue(self, req: EnqueueJobRequest) -> JobPublic:
+        if self._tg is None:
+            raise RuntimeError("Producer is not open: use `async with Producer(...)`")
+        pending = _Pending(req)
+        batch = self._batch
+        if batch is None:
+            batch = self._batch = _Batch()
+            self._tg.start_soon(self._send_when_ready, batch)
+        batch.items.append(pending)
+        if len(batch.items) >= self.max_batch:
+            self._batch = None
+            batch.full.set()
+
+        await pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        assert pending.result is not None
+        return pending.result
+
+    async def _send_when_ready(self, batch: _Batch) -> None:
+        with anyio.move_on_after(self.max_delay):
+            await batch.full.wait()
+        if self._batch is batch:
+            self._batch = None
+
+        try:
+            jobs = await self._post_batch([p.req for p in batch.items])
+            if len(jobs) != len(batch.items):
+                raise RuntimeError(f"sent {len(batch.items)} jobs, got {len(jobs)} back")
+            for p, job in zip(batch.items, jobs):
+                p.result = job
+        except Exception as exc:
+            for p in batch.items:
+                p.error = exc
+        finally:
+            for p in batch.items:
+                if p.result is None and p.error is None:
+                    p.error = RuntimeError("Producer closed before the batch was sent")
+                p.done.set()
+
+    async def _post_batch(self, reqs: list[EnqueueJobRequest]) -> list[JobPublic]:
+        body = EnqueueJobBatchRequest(jobs=reqs).model_dump_json(exclude_unset=True)
+        resp = await self._http.post("/v1/jobs:batch", content=body)
+        resp.raise_for_status()
+        return JobBatchPublic.model_validate_json(resp.content).jobs
@@ -0,0 +1,3 @@
+from .worker import CancelListener, NonRetryableError, Worker, WorkerConfig, WorkerRepo
+
+__all__ = ["Worker", "WorkerConfig", "WorkerRepo", "CancelListener", "NonRetryableError"]
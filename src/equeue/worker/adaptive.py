@@ -0,0 +1,140 @@
+#src/equeue/worker/adaptive.py
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class AdaptiveConfig:
+    """
+    Bounds and targets for AdaptiveController. Enable with WorkerConfig(adaptive=AdaptiveConfig()).
+    """
+    min_concurrency: int = 1
+    max_concurrency: int = 100
+    min_batch: int = 1
+    max_batch: int = 100
+
+    increase: int = 1               # additive step per healthy window
+    decrease: float = 0.5           # multiplicative factor on overload
+
+    claim_latency_target: float = 0.05      # seconds per claim round
+    loop_lag_target: float = 0.05           # seconds of event-loop lag
+    task_latency_tolerance: float = 2.0     # overloaded when task latency > baseline * this
+    empty_claim_ratio: float = 0.5          # above this the queue is drained: do not grow
+
+    window: float = 1.0             # seconds between adjustments
+    smoothing: float = 0.3          # EWMA weight of the newest sample
+
+    def __post_init__(self):
+        if not (1 <= self.min_concurrency <= self.max_concurrency):
+            raise ValueError("need 1 <= min_concurrency <= max_concurrency")
+        if not (1 <= self.min_batch <= self.max_batch):
+            raise ValueError("need 1 <= min_batch <= max_batch")
+        if self.increase < 1 or not (0 < self.decrease < 1):
+            raise ValueError("need increase >= 1 and 0 < decrease < 1")
+        if not (0 < self.smoothing <= 1) or self.window <= 0:
+            raise ValueError("need 0 < smoothing <= 1 and window > 0")
+
+
+class _Ewma:
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.value: float | None = None
+
+    def add(self, sample: float) -> None:
+        self.value = sample if self.value is None else self.value + self.alpha * (sample - self.value)
+
+
+class AdaptiveController:
+    """
+    AIMD tuning of one worker's concurrency and claim batch size.
+
+    Signals (fed by the worker, smoothed per window):
+        - claim latency: time of a claim round; Postgres pushing back
+        - task latency: attempt duration vs. its best recent level; downstream pushing back
+        - event-loop lag: the worker process itself is saturated
+        - empty-claim ratio: share of claim rounds that found nothing
+
+    Each adjust():
+        - any overload signal        -> concurrency and batch *= decrease
+        - work waiting, no overload  -> concurrency += increase; batch += increase if claims came back full
+        - queue drained              -> hold (growing would only add idle slots)
+    """
+
+    def __init__(self, config: AdaptiveConfig, *, concurrency: int, batch: int):
+        self.config = config
+        self.concurrency = _clamp(concurrency, config.min_concurrency, config.max_concurrency)
+        self.batch = _clamp(batch, config.min_batch, config.max_batch)
+
+        self._claim_latency = _Ewma(config.smoothing)
+        self._task_latency = _Ewma(config.smoothing)
+        self._loop_lag = _Ewma(config.smoothing)
+        self._task_baseline: float | None = None
+        self._reset_window()
+
+    def _reset_window(self) -> None:
+        self._claims = 0
+        self._empty_claims = 0
+        self._full_claims = 0
+
+    # ---------------- signals ----------------
+
+    def observe_claim(self, latency: float, *, requested: int, claimed: int) -> None:
+        self._claim_latency.add(latency)
+        self._claims += 1
+        if claimed == 0:
+            self._empty_claims += 1
+        elif claimed >= requested:
+            self._full_claims += 1
+
+    def observe_task(self, latency: float) -> None:
+        self._task_latency.add(latency)
+
+    def observe_loop_lag(self, lag: float) -> None:
+        self._loop_lag.add(max(lag, 0.0))
+
+    # ---------------- control ----------------
+
+    def overloaded(self) -> bool:
+        cfg = self.config
+        claim = self._claim_latency.value
+        lag = self._loop_lag.value
+        task = self._task_latency.value
+        if claim is not None and claim > cfg.claim_latency_target:
+            return True
+        if lag is not None and lag > cfg.loop_lag_target:
+            return True
+        return task is not None and self._task_baseline is not None and task > self._task_baseline * cfg.task_latency_tolerance
+
+    def adjust(self) -> tuple[int, int]:
+        """
+        Close the current window; returns the new (concurrency, batch).
+        """
+        cfg = self.config
+        task = self._task_latency.value
+        if task is not None:
+            # best recent level; drifts up slowly so a permanently slower task becomes the norm
+            base = self._task_baseline
+            self._task_baseline = task if base is None else min(task, base * 1.05)
+
+        if self.overloaded():
+            self.concurrency = max(cfg.min_concurrency, math.floor(self.concurrency * cfg.decrease))
+            self.batch = max(cfg.min_batch, math.floor(self.batch * cfg.decrease))
+            # judge the next window on fresh samples, not the congestion we just reacted to
+            for ewma in (self._claim_latency, self._task_latency, self._loop_lag):
+                ewma.value = None
+        elif self._claims and self._empty_claims / self._claims < cfg.empty_claim_ratio:
+            self.concurrency = min(cfg.max_concurrency, self.concurrency + cfg.increase)
+            if self._full_claims:
+                self.batch = min(cfg.max_batch, self.batch + cfg.increase)
+
+        self._reset_window()
+        return self.concurrency, self.batch
+
+
+def _clamp(v: int, lo: int, hi: int) -> int:
+    return max(lo, min(hi, v))
@@ -0,0 +1,80 @@
+#src/equeue/worker/limits.py
+
+from __future__ import annotations
+
+from time import monotonic
+from typing import Callable
+
+from equeue.registry import TaskOptions
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens/second, bursts up to `capacity` (default: one second's worth).
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None, clock: Callable[[], float] = monotonic):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def available(self) -> int:
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return int(self._tokens)
+
+    def take(self, n: int) -> None:
+        self._tokens -= n
+
+
+class TaskLimiter:
+    """
+    Per-worker bookkeeping for TaskOptions limits.
+
+    `held` counts jobs this worker has claimed and not finished (prefetched + executing),
+    so a task at its max_concurrency is not claimed into the prefetch buffer either.
+    """
+
+    def __init__(self, clock: Callable[[], float] = monotonic):
+        self.clock = clock
+        self._held: dict[str, int] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def held(self, task_name: str) -> int:
+        return self._held.get(task_name, 0)
+
+    def acquire(self, task_name: str) -> None:
+        self._held[task_name] = self._held.get(task_name, 0) + 1
+
+    def release(self, task_name: str) -> None:
+        n = self._held.get(task_name, 0) - 1
+        if n > 0:
+            self._held[task_name] = n
+        else:
+            self._held.pop(task_name, None)
+
+    def budget(self, task_name: str, opts: TaskOptions, *, limit: int, fleet_running: int = 0) -> int:
+        """
+        How many more jobs of `task_name` may be claimed right now (<= limit).
+        """
+        budget = limit
+        if opts.max_concurrency is not None:
+            budget = min(budget, opts.max_concurrency - self.held(task_name))
+        if opts.global_concurrency is not None:
+            budget = min(budget, opts.global_concurrency - fleet_running)
+        if opts.rate_limit is not None:
+            budget = min(budget, self._bucket(task_name, opts.rate_limit).available())
+        return max(budget, 0)
+
+    def claimed(self, task_name: str, opts: TaskOptions, n: int) -> None:
+        if opts.rate_limit is not None and n:
+            self._bucket(task_name, opts.rate_limit).take(n)
+
+    def _bucket(self, task_name: str, rate: float) -> TokenBucket:
+        bucket = self._buckets.get(task_name)
+        if bucket is None or bucket.rate != rate:
+            bucket = self._buckets[task_name] = TokenBucket(rate, clock=self.clock)
+        return bucket
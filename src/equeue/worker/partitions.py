@@ -0,0 +1,73 @@
+#src/equeue/worker/partitions.py
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Iterable
+
+from equeue.db.job_repo import CLAIM_BUCKETS
+
+
+@dataclass(frozen=True)
+class PartitionConfig:
+    """
+    Claim partitions. Enable with WorkerConfig(partitions=PartitionConfig()).
+
+    Every job carries a random claim_bucket in [0, CLAIM_BUCKETS). Workers on a queue
+    announce themselves in claim_members and split the buckets between them by
+    rendezvous hashing, so each claims mostly from its own buckets rather than every
+    worker scanning (and skipping) the same locked rows at the head of the queue.
+    When its own buckets come up empty a worker claims from the whole queue, so
+    nothing is stranded by a slow rebalance or an uneven split.
+    """
+    heartbeat_interval: float = 5.0     # seconds between membership heartbeats
+    member_ttl: float = 20.0            # a member silent this long loses its buckets
+    buckets_per_claim: int = 4          # own buckets tried per claim round before stealing
+
+    def __post_init__(self):
+        if self.member_ttl <= self.heartbeat_interval:
+            raise ValueError("member_ttl must exceed heartbeat_interval")
+        if self.buckets_per_claim < 1:
+            raise ValueError("buckets_per_claim must be >= 1")
+
+
+def _weight(member: str, bucket: int) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{member}/{bucket}".encode(), digest_size=8).digest(), "big")
+
+
+def owned_buckets(members: Iterable[str], worker_id: str, *, buckets: int = CLAIM_BUCKETS) -> list[int]:
+    """
+    Buckets `worker_id` owns among `members` (rendezvous hashing: each bucket goes to
+    the member with the highest weight for it). Every member computes the same split
+    from the same member list, and a join or leave only moves the buckets it gains or
+    loses.
+    """
+    members = sorted(set(members) | {worker_id})
+    return [b for b in range(buckets) if max(members, key=lambda m: _weight(m, b)) == worker_id]
+
+
+class PartitionAssignment:
+    """
+    One worker's current buckets, handed out in rotation so successive claim rounds
+    start from different buckets.
+    """
+
+    def __init__(self, worker_id: str):
+        self.worker_id = worker_id
+        self.buckets: list[int] = []    # none until the first heartbeat: claim unpartitioned
+        self.members: list[str] = []
+        self._next = 0
+
+    def update(self, members: list[str]) -> None:
+        if members != self.members:
+            self.members = members
+            self.buckets = owned_buckets(members, self.worker_id)
+
+    def rotation(self, n: int) -> list[int]:
+        if not self.buckets:
+            return []
+        start = self._next % len(self.buckets)
+        self._next = start + 1
+        ordered = self.buckets[start:] + self.buckets[:start]
+        return ordered[:n]
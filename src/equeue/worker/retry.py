@@ -0,0 +1,53 @@
+#src/equeue/worker/retry.py
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+
+from equeue.registry import TaskOptions
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter:
+
+        delay = uniform(0, min(max_delay, base_delay * multiplier ** (attempt - 1)))
+
+    Full jitter spreads jobs that failed together (downstream outage) over the whole
+    window instead of retrying them in lockstep.
+    """
+    base_delay: float = 1.0
+    max_delay: float = 3600.0
+    multiplier: float = 2.0
+
+    def __post_init__(self):
+        if self.base_delay <= 0 or self.max_delay < self.base_delay or self.multiplier < 1:
+            raise ValueError("RetryPolicy needs 0 < base_delay <= max_delay and multiplier >= 1")
+
+    def ceiling(self, attempt: int) -> float:
+        try:
+            return min(self.max_delay, self.base_delay * self.multiplier ** max(attempt - 1, 0))
+        except OverflowError:
+            return self.max_delay
+
+    def delay(self, attempt: int, rand: Callable[[], float] = random.random) -> float:
+        return rand() * self.ceiling(attempt)
+
+    def next_run_at(self, attempt: int, now: datetime, rand: Callable[[], float] = random.random) -> datetime:
+        return now + timedelta(seconds=self.delay(attempt, rand))
+
+    def for_task(self, opts: TaskOptions) -> RetryPolicy:
+        """
+        This policy with the task's retry_base_delay / retry_max_delay overrides applied.
+        An inherited base_delay above the task's retry_max_delay is clamped to it.
+        """
+        if opts.retry_base_delay is None and opts.retry_max_delay is None:
+            return self
+        base = opts.retry_base_delay if opts.retry_base_delay is not None else self.base_delay
+        cap = opts.retry_max_delay if opts.retry_max_delay is not None else max(self.max_delay, base)
+        base = min(base, cap)
+        return RetryPolicy(base_delay=base, max_delay=cap, multiplier=self.multiplier)
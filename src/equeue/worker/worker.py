@@ -0,0 +1,673 @@
+#src/equeue/worker/worker.py
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import os
+import signal
+import socket
+import time
+from collections import deque
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Protocol
+from uuid import UUID, uuid4
+
+from equeue.api.models.jobs import JobPublic
+from equeue.api.queue_client import utcnow
+from equeue.db.job_repo import JobFailure
+from equeue.db.records import JobRecord
+from equeue.registry import get_task, get_task_options, limited_tasks
+from equeue.worker.adaptive import AdaptiveConfig, AdaptiveController
+from equeue.worker.limits import TaskLimiter
+from equeue.worker.partitions import PartitionAssignment, PartitionConfig
+from equeue.worker.retry import RetryPolicy
+
+logger = logging.getLogger("equeue.worker")
+
+
+# ------------------------------------------------------------------
+# Repo boundary (worker side)
+# ------------------------------------------------------------------
+
+class WorkerRepo(Protocol):
+    async def claim_jobs(
+        self,
+        *,
+        queue: str,
+        worker_id: str,
+        limit: int,
+        lease_seconds: float,
+        now: datetime,
+        task_names: list[str] | None = None,
+        exclude_task_names: list[str] | None = None,
+        bucket: int | None = None,
+    ) -> list[JobRecord]: ...
+    async def extend_leases(self, *, job_ids: list[UUID], worker_id: str, lease_seconds: float, now: datetime) -> list[UUID]: ...
+    async def complete_job(self, *, job_id: UUID, worker_id: str, now: datetime) -> JobRecord | None: ...
+    async def fail_jobs(self, *, failures: list[JobFailure], worker_id: str, now: datetime) -> list[JobPublic]: ...
+    async def release_jobs(self, *, job_ids: list[UUID], worker_id: str, now: datetime) -> list[UUID]: ...
+    async def cancel_requested(self, *, job_ids: list[UUID], worker_id: str) -> list[UUID]: ...
+    async def finish_cancelled(self, *, job_ids: list[UUID], worker_id: str, now: datetime) -> list[JobPublic]: ...
+    async def reap_expired_leases(self, *, queue: str, now: datetime, limit: int = 100) -> list[JobPublic]: ...
+    async def count_running(self, *, task_names: list[str]) -> dict[str, int]: ...
+    # claim partitions (WorkerConfig.partitions) only
+    async def heartbeat_member(self, *, queue: str, worker_id: str, now: datetime, ttl: float) -> list[str]: ...
+    async def leave_members(self, *, queue: str, worker_id: str) -> None: ...
+
+# one short transaction per use, e.g. job_repo.session_scope(sessionmaker) or InMemoryJobRepo().scope
+RepoScope = Callable[[], AbstractAsyncContextManager[WorkerRepo]]
+
+# push source of cancel requests: calls on_cancel(job_id) until cancelled,
+# e.g. db.notify.pg_cancel_listener(engine.connect) or InMemoryJobRepo().listen_cancellations
+CancelListener = Callable[[Callable[[UUID], None]], Awaitable[None]]
+
+
+class NonRetryableError(Exception):
+    """
+    Raise from a task to mark the job dead immediately, without further attempts.
+    """
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:6]}"
+
+
+def job_error(exc: BaseException, *, retryable: bool, now: datetime) -> dict[str, Any]:
+    """
+    JobError-shaped dict for jobs.last_error.
+    """
+    return {
+        "type": type(exc).__name__,
+        "message": str(exc),
+        "retryable": retryable,
+        "happened_at": now.isoformat(),
+    }
+
+
+def shutdown_error(now: datetime) -> dict[str, Any]:
+    """
+    JobError-shaped last_error for an attempt interrupted by a worker drain.
+    """
+    return {
+        "type": "WorkerShutdown",
+        "message": "attempt cancelled at the worker's drain deadline",
+        "retryable": True,
+        "happened_at": now.isoformat(),
+    }
+
+
+@dataclass(frozen=True)
+class WorkerConfig:
+    queue: str
+    worker_id: str = field(default_factory=default_worker_id)
+
+    concurrency: int = 10           # jobs executing at once
+    prefetch: int = 10              # claimed-but-not-started jobs buffered
+    claim_batch_size: int = 10      # max jobs per claim statement
+
+    lease_seconds: float = 60.0
+    heartbeat_interval: float = 15.0
+    poll_interval: float = 1.0      # idle wait after an empty claim
+    reap_interval: float = 30.0
+
+    # failed attempts are rescheduled in batches: flushed at retry_batch_size or after retry_flush_interval
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy)
+    retry_batch_size: int = 100
+    retry_flush_interval: float = 0.1
+
+    # graceful shutdown (SIGTERM): how long in-flight jobs get to finish
+    drain_timeout: float = 30.0
+
+    # cancel requests arrive via the cancel_listener; polling catches anything it misses
+    cancel_poll_interval: float = 5.0
+
+    # AIMD tuning of concurrency / claim_batch_size at runtime (they become starting points);
+    # claims stay capped by prefetch
+    adaptive: AdaptiveConfig | None = None
+
+    # split the queue's claim buckets with the other workers on it (hot queues, large fleets)
+    partitions: PartitionConfig | None = None
+
+
+# ------------------------------------------------------------------
+# Worker
+# ------------------------------------------------------------------
+
+class Worker:
+    """
+    Claims jobs from one queue into a bounded prefetch buffer and executes them
+    with bounded concurrency, honouring per-task TaskOptions:
+
+        - max_concurrency / global_concurrency / rate_limit: tasks at their limit are
+          excluded from the claim statement, so their jobs stay queued for other workers
+        - timeout: asyncio.wait_for around each attempt
+        - retry_base_delay / retry_max_delay: per-task backoff (full jitter), see RetryPolicy
+
+    Failed attempts are buffered and rescheduled with one UPDATE per batch.
+    Cancel requests for held jobs cancel the executing asyncio task (see request_cancel()).
+    See drain() for graceful shutdown.
+    """
+
+    def __init__(
+        self,
+        *,
+        repo_scope: RepoScope,
+        config: WorkerConfig,
+        clock: Callable[[], datetime] = utcnow,
+        cancel_listener: CancelListener | None = None,
+    ):
+        self.repo_scope = repo_scope
+        self.config = config
+        self.clock = clock
+        self.cancel_listener = cancel_listener
+
+        self.limiter = TaskLimiter()
+        # current limits: fixed from config unless config.adaptive is set
+        self.concurrency = config.concurrency
+        self.claim_batch_size = config.claim_batch_size
+        self.adaptive: AdaptiveController | None = None
+        if config.adaptive is not None:
+            self.adaptive = AdaptiveController(
+                config.adaptive, concurrency=config.concurrency, batch=config.claim_batch_size
+            )
+            self.concurrency, self.claim_batch_size = self.adaptive.concurrency, self.adaptive.batch
+        self.partitions: PartitionAssignment | None = None
+        if config.partitions is not None:
+            self.partitions = PartitionAssignment(config.worker_id)
+
+        self._buffer: deque[JobRecord] = deque()
+        self._inflight: dict[UUID, asyncio.Task] = {}
+        self._failures: list[JobFailure] = []
+        self._cancel_requested: set[UUID] = set()
+        self._invoking: set[UUID] = set()       # inside _invoke(): the only phase a cancel may interrupt
+        self._finalizing: set[UUID] = set()     # attempt over, its outcome being recorded
+        self._flush_timer: asyncio.Task | None = None
+
+        self._stopping = asyncio.Event()
+        self._draining = asyncio.Event()
+        self._claim_task: asyncio.Task | None = None
+        self._drain_task: asyncio.Task | None = None
+        self._room = asyncio.Event()     # set when the buffer drains below prefetch
+        self._idle = asyncio.Event()     # set when nothing is buffered or executing
+        self._idle.set()
+
+    # ---------------- lifecycle ----------------
+
+    async def run(self) -> None:
+        """
+        Run until stop() is called.
+        """
+        self._claim_task = asyncio.create_task(self._claim_loop(), name="equeue-claim")
+        loops = [
+            self._claim_task,
+            asyncio.create_task(self._heartbeat_loop(), name="equeue-heartbeat"),
+            asyncio.create_task(self._reap_loop(), name="equeue-reap"),
+            asyncio.create_task(self._cancel_poll_loop(), name="equeue-cancel-poll"),
+        ]
+        if self.adaptive is not None:
+            loops.append(asyncio.create_task(self._adapt_loop(), name="equeue-adapt"))
+        if self.partitions is not None:
+            loops.append(asyncio.create_task(self._membership_loop(), name="equeue-membership"))
+        if self.cancel_listener is not None:
+            loops.append(asyncio.create_task(self._listen_loop(), name="equeue-cancel-listen"))
+        try:
+            await self._stopping.wait()
+        finally:
+            for t in loops:
+                t.cancel()
+            await asyncio.gather(*loops, return_exceptions=True)
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def drain(self, timeout: float | None = None) -> None:
+        """
+        Graceful shutdown:
+            1. stop claiming (a claim round in progress completes)
+            2. release every prefetched-but-unstarted job in one UPDATE
+            3. let in-flight jobs finish for up to `timeout` (default: config.drain_timeout)
+            4. cancel the rest and reschedule them as retryable WorkerShutdown failures
+            5. stop()
+
+        Tasks run via to_thread cannot be interrupted; their jobs are requeued anyway,
+        so a sync task may still be running when its job is picked up elsewhere.
+        """
+        timeout = self.config.drain_timeout if timeout is None else timeout
+        self._draining.set()
+        self._room.set()
+        if self._claim_task is not None:
+            await asyncio.gather(self._claim_task, return_exceptions=True)
+
+        await self._release_buffered()
+
+        running = list(self._inflight.values())
+        if running:
+            _, pending = await asyncio.wait(running, timeout=timeout)
+            for t in pending:
+                t.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        await self.flush_failures()
+        self.stop()
+
+    def install_signal_handlers(self, signals: tuple[int, ...] = (signal.SIGTERM, signal.SIGINT)) -> None:
+        """
+        Drain on SIGTERM/SIGINT (call from inside the running loop, before run()).
+        """
+        loop = asyncio.get_running_loop()
+        for sig in signals:
+            loop.add_signal_handler(sig, self._on_signal, sig)
+
+    def _on_signal(self, sig: int) -> None:
+        if self._drain_task is None:
+            logger.info("received %s, draining", signal.Signals(sig).name)
+            self._drain_task = asyncio.create_task(self.drain(), name="equeue-drain")
+        else:
+            logger.warning("received %s again, stopping now", signal.Signals(sig).name)
+            self.stop()
+
+    async def _release_buffered(self) -> None:
+        if not self._buffer:
+            return
+        jobs = list(self._buffer)
+        self._buffer.clear()
+        for job in jobs:
+            self.limiter.release(job.task_name)
+        if not self._inflight:
+            self._idle.set()
+
+        try:
+            async with self.repo_scope() as repo:
+                released = await repo.release_jobs(
+                    job_ids=[j.id for j in jobs], worker_id=self.config.worker_id, now=self.clock()
+                )
+        except Exception:
+            # not fatal: the leases expire and the reaper requeues them
+            logger.exception("failed to release %d prefetched job(s)", len(jobs))
+            return
+        logger.info("released %d prefetched job(s)", len(released))
+
+    async def join(self) -> None:
+        """
+        Wait until every claimed job has finished and been finalized.
+        """
+        await self._idle.wait()
+        await self.flush_failures()
+
+    # ---------------- claiming ----------------
+
+    async def claim_once(self) -> int:
+        """
+        One claim round: fill free prefetch slots, leaving throttled tasks unclaimed.
+        Returns the number of jobs claimed.
+        """
+        cfg = self.config
+        limit = min(self.claim_batch_size, cfg.prefetch - len(self._buffer))
+        if limit <= 0:
+            return 0
+
+        started = time.perf_counter()
+        limited = limited_tasks()
+        now = self.clock()
+        claimed: list[JobRecord] = []
+
+        async with self.repo_scope() as repo:
+            fleet: dict[str, int] = {}
+            global_names = [n for n, o in limited.items() if o.global_concurrency is not None]
+            if global_names:
+                fleet = await repo.count_running(task_names=global_names)
+
+            # restricted tasks only up to their remaining budget
+            for name, opts in limited.items():
+                remaining = limit - len(claimed)
+                if remaining <= 0:
+                    break
+                budget = self.limiter.budget(name, opts, limit=remaining, fleet_running=fleet.get(name, 0))
+                if budget <= 0:
+                    continue
+                jobs = await repo.claim_jobs(
+                    queue=cfg.queue,
+                    worker_id=cfg.worker_id,
+                    limit=budget,
+                    lease_seconds=cfg.lease_seconds,
+                    now=now,
+                    task_names=[name],
+                )
+                self.limiter.claimed(name, opts, len(jobs))
+                claimed += jobs
+
+            # everything else: own claim buckets first (if partitioned), then the whole queue
+            buckets: list[int | None] = []
+            if self.partitions is not None:
+                buckets += self.partitions.rotation(cfg.partitions.buckets_per_claim)
+            for bucket in [*buckets, None]:
+                if len(claimed) >= limit:
+                    break
+                claimed += await repo.claim_jobs(
+                    queue=cfg.queue,
+                    worker_id=cfg.worker_id,
+                    limit=limit - len(claimed),
+                    lease_seconds=cfg.lease_seconds,
+                    now=now,
+                    exclude_task_names=list(limited),
+                    bucket=bucket,
+                )
+
+        if self.adaptive is not None:
+            self.adaptive.observe_claim(time.perf_counter() - started, requested=limit, claimed=len(claimed))
+
+        for job in claimed:
+            self.limiter.acquire(job.task_name)
+            self._buffer.append(job)
+        if claimed:
+            self._idle.clear()
+            self._dispatch()
+        return len(claimed)
+
+    async def _claim_loop(self) -> None:
+        while not (self._stopping.is_set() or self._draining.is_set()):
+            try:
+                n = await self.claim_once()
+            except Exception:
+                logger.exception("claim failed")
+                n = 0
+
+            if self._draining.is_set():
+                break
+            if len(self._buffer) >= self.config.prefetch:
+                self._room.clear()
+                await self._room.wait()
+            elif n == 0:
+                await self._sleep(self.config.poll_interval, self._draining)
+
+    # ---------------- execution ----------------
+
+    def _dispatch(self) -> None:
+        while self._buffer and len(self._inflight) < self.concurrency:
+            job = self._buffer.popleft()
+            self._inflight[job.id] = asyncio.create_task(self._execute(job), name=f"equeue-job-{job.id}")
+        if len(self._buffer) < self.config.prefetch:
+            self._room.set()
+
+    async def _execute(self, job: JobRecord) -> None:
+        try:
+            await self._run_and_finalize(job)
+        finally:
+            self._inflight.pop(job.id, None)
+            self._cancel_requested.discard(job.id)
+            self._finalizing.discard(job.id)
+            self.limiter.release(job.task_name)
+            self._dispatch()
+            if not self._inflight and not self._buffer:
+                self._idle.set()
+
+    async def _run_and_finalize(self, job: JobRecord) -> None:
+        try:
+            if job.id not in self._cancel_requested:  # cancelled while prefetched
+                started = time.perf_counter()
+                self._invoking.add(job.id)
+                try:
+                    await self._invoke(job)
+                finally:
+                    self._invoking.discard(job.id)
+                    self._finalizing.add(job.id)
+                    if self.adaptive is not None:
+                        self.adaptive.observe_task(time.perf_counter() - started)
+        except asyncio.CancelledError:
+            if job.id not in self._cancel_requested:
+                if self._draining.is_set():
+                    # interrupted at the drain deadline; drain() flushes this
+                    now = self.clock()
+                    self._failures.append(
+                        JobFailure(job_id=job.id, error=shutdown_error(now), retryable=True, run_at=now)
+                    )
+                raise
+            # cancelled by request_cancel(): finalize below
+        except Exception as exc:
+            logger.warning("job %s (%s) failed: %r", job.id, job.task_name, exc)
+            await _shielded(self._record_failure(job, exc))
+            return
+
+        await _shielded(self._finalize(job))
+
+    async def _finalize(self, job: JobRecord) -> None:
+        cfg = self.config
+        if job.id in self._cancel_requested:
+            async with self.repo_scope() as repo:
+                await repo.finish_cancelled(job_ids=[job.id], worker_id=cfg.worker_id, now=self.clock())
+            logger.info("job %s (%s) cancelled", job.id, job.task_name)
+            return
+
+        async with self.repo_scope() as repo:
+            done = await repo.complete_job(job_id=job.id, worker_id=cfg.worker_id, now=self.clock())
+        if done is None:
+            logger.warning("job %s finished after its lease was lost", job.id)
+
+    # ---------------- cancellation ----------------
+
+    def request_cancel(self, job_id: UUID) -> bool:
+        """
+        Stop a held job whose cancellation was requested: an executing job's task is
+        cancelled (task.cancel()), a prefetched one is finalized without running.
+        Returns False if this worker does not hold the job.
+
+        Sync tasks run in a thread, which cannot be interrupted: the job is finalized as
+        cancelled and its slot freed, but the thread runs to completion in the background.
+
+        A request that arrives after the attempt finished is ignored: the job is already
+        being recorded as succeeded or failed.
+        """
+        t = self._inflight.get(job_id)
+        if t is not None:
+            if job_id not in self._cancel_requested and job_id not in self._finalizing:
+                self._cancel_requested.add(job_id)
+                if job_id in self._invoking:
+                    t.cancel()
+            return True
+        if any(j.id == job_id for j in self._buffer):
+            self._cancel_requested.add(job_id)  # skipped when dispatched
+            return True
+        return False
+
+    async def _cancel_poll_loop(self) -> None:
+        cfg = self.config
+        while not self._stopping.is_set():
+            await self._sleep(cfg.cancel_poll_interval)
+            held = [j.id for j in self._buffer] + list(self._inflight)
+            if not held:
+                continue
+            try:
+                async with self.repo_scope() as repo:
+                    requested = await repo.cancel_requested(job_ids=held, worker_id=cfg.worker_id)
+            except Exception:
+                logger.exception("cancel poll failed")
+                continue
+            for job_id in requested:
+                self.request_cancel(job_id)
+
+    async def _listen_loop(self) -> None:
+        assert self.cancel_listener is not None
+        while not self._stopping.is_set():
+            try:
+                await self.cancel_listener(self.request_cancel)
+            except Exception:
+                logger.exception("cancel listener failed; relying on polling until it reconnects")
+            await self._sleep(self.config.cancel_poll_interval)
+
+    # ---------------- retries ----------------
+
+    async def _record_failure(self, job: JobRecord, exc: Exception) -> None:
+        cfg = self.config
+        retryable = not isinstance(exc, NonRetryableError)
+        now = self.clock()
+        policy = cfg.retry_policy.for_task(get_task_options(job.task_name))
+
+        self._failures.append(
+            JobFailure(
+                job_id=job.id,
+                error=job_error(exc, retryable=retryable, now=now),
+                retryable=retryable,
+                run_at=policy.next_run_at(job.attempts, now),
+            )
+        )
+        if len(self._failures) >= cfg.retry_batch_size:
+            await self.flush_failures()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.config.retry_flush_interval)
+        self._flush_timer = None
+        await self.flush_failures()
+
+    async def flush_failures(self) -> None:
+        """
+        Reschedule (or kill) all buffered failed attempts in one statement.
+        """
+        if not self._failures:
+            return
+        batch, self._failures = self._failures, []
+        try:
+            async with self.repo_scope() as repo:
+                await repo.fail_jobs(failures=batch, worker_id=self.config.worker_id, now=self.clock())
+        except Exception:
+            # leases are still ours until they expire; reaping requeues them if this keeps failing
+            logger.exception("failed to reschedule %d job(s)", len(batch))
+
+    async def _invoke(self, job: JobRecord) -> Any:
+        try:
+            fn = get_task(job.task_name)
+        except KeyError as exc:
+            # unknown task: configuration error, never retried
+            raise NonRetryableError(str(exc)) from exc
+
+        if inspect.iscoroutinefunction(fn):
+            call = fn(**job.payload)
+        else:
+            call = asyncio.to_thread(fn, **job.payload)
+
+        timeout = get_task_options(job.task_name).timeout
+        if timeout is None:
+            return await call
+        return await asyncio.wait_for(call, timeout)
+
+    # ---------------- adaptive limits ----------------
+
+    async def _adapt_loop(self) -> None:
+        assert self.adaptive is not None
+        window = self.adaptive.config.window
+        while not self._stopping.is_set():
+            # event-loop lag: how late a timer of `window` seconds fires
+            expected = time.monotonic() + window
+            await self._sleep(window)
+            self.adaptive.observe_loop_lag(time.monotonic() - expected)
+            self._apply_limits(*self.adaptive.adjust())
+
+    def _apply_limits(self, concurrency: int, batch: int) -> None:
+        if (concurrency, batch) != (self.concurrency, self.claim_batch_size):
+            logger.debug(
+                "adaptive limits: concurrency %d -> %d, claim batch %d -> %d",
+                self.concurrency, concurrency, self.claim_batch_size, batch,
+            )
+        grew = concurrency > self.concurrency
+        self.concurrency, self.claim_batch_size = concurrency, batch
+        if grew:
+            self._dispatch()
+
+    # ---------------- leases ----------------
+
+    async def _heartbeat_loop(self) -> None:
+        cfg = self.config
+        while not self._stopping.is_set():
+            await self._sleep(cfg.heartbeat_interval)
+            held = [j.id for j in self._buffer] + list(self._inflight)
+            if not held:
+                continue
+            try:
+                async with self.repo_scope() as repo:
+                    extended = await repo.extend_leases(
+                        job_ids=held, worker_id=cfg.worker_id, lease_seconds=cfg.lease_seconds, now=self.clock()
+                    )
+            except Exception:
+                logger.exception("lease heartbeat failed")
+                continue
+            lost = set(held) - set(extended)
+            if lost:
+                logger.warning("lost lease on %d job(s): %s", len(lost), sorted(map(str, lost)))
+
+    async def _membership_loop(self) -> None:
+        cfg = self.config
+        assert self.partitions is not None and cfg.partitions is not None
+        try:
+            while not self._stopping.is_set():
+                try:
+                    async with self.repo_scope() as repo:
+                        members = await repo.heartbeat_member(
+                            queue=cfg.queue, worker_id=cfg.worker_id, now=self.clock(), ttl=cfg.partitions.member_ttl
+                        )
+                except Exception:
+                    logger.exception("claim partition heartbeat failed")
+                else:
+                    before = self.partitions.buckets
+                    self.partitions.update(members)
+                    if self.partitions.buckets != before:
+                        logger.info(
+                            "claim partitions: %d member(s), own %d bucket(s)",
+                            len(members), len(self.partitions.buckets),
+                        )
+                await self._sleep(cfg.partitions.heartbeat_interval)
+        finally:
+            # hand the buckets over now rather than after member_ttl
+            try:
+                async with self.repo_scope() as repo:
+                    await repo.leave_members(queue=cfg.queue, worker_id=cfg.worker_id)
+            except Exception:
+                logger.exception("failed to leave claim partitions")
+
+    async def _reap_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                async with self.repo_scope() as repo:
+                    await repo.reap_expired_leases(queue=self.config.queue, now=self.clock())
+            except Exception:
+                logger.exception("lease reaping failed")
+            await self._sleep(self.config.reap_interval)
+
+    async def _sleep(self, seconds: float, wake: asyncio.Event | None = None) -> None:
+        # returns early on stop() (or when `wake` is set)
+        waits = [self._stopping.wait()] if wake is None else [self._stopping.wait(), wake.wait()]
+        try:
+            await asyncio.wait_for(_first(*waits), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _first(*aws: Any) -> None:
+    """
+    Wait until the first of `aws` completes; cancel the rest.
+    """
+    tasks = [asyncio.ensure_future(a) for a in aws]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for t in tasks:
+            t.cancel()
+
+
+
+async def _shielded(aw: Awaitable[None]) -> None:
+    """
+    Run `aw` to completion even if the caller is cancelled meanwhile (drain deadline),
+    then pass the cancellation on: a finished attempt's ack is never cut off halfway.
+    """
+    fut = asyncio.ensure_future(aw)
+    try:
+        await asyncio.shield(fut)
+    except asyncio.CancelledError:
+        if not fut.done():
+            await asyncio.wait([fut])
+        raise
@@ -0,0 +1,21 @@
+# tests/sample_tasks.py
+# Importable task module for registry tests (lazy references, manifest).
+
+from equeue.registry import task
+
+
+@task(name="sample.add")
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+@task(name="sample.echo")
+async def echo(**payload):
+    return payload
+
+
+@task(name="sample.slow", max_concurrency=1, timeout=5.0)
+async def slow(seconds: float = 0.0):
+    import asyncio
+
+    await asyncio.sleep(seconds)
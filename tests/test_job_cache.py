@@ -0,0 +1,125 @@
+# tests/test_job_cache.py
+
+from __future__ import annotations
+
+from uuid import uuid4
+
+import anyio
+import pytest
+
+from equeue.api.cache import TerminalJobCache
+from equeue.api.models.jobs import JobStatus
+from equeue.api.queue_client import QueueClient
+from tests.test_queue_client import FakeRepo
+from tests.utils import make_job
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_caches_terminal_jobs_only():
+    cache = TerminalJobCache()
+    done = make_job(status=JobStatus.succeeded)
+    running = make_job(status=JobStatus.running)
+    dead = make_job(status=JobStatus.dead)  # replay can requeue it
+
+    cache.put("user-1", done)
+    cache.put("user-1", running)
+    cache.put("user-1", dead)
+
+    assert cache.get("user-1", done.id) is done
+    assert cache.get("user-1", running.id) is None
+    assert cache.get("user-1", dead.id) is None
+    assert cache.get("user-2", done.id) is None  # keyed by owner
+
+
+def test_lru_eviction_and_ttl():
+    clock = Clock()
+    cache = TerminalJobCache(maxsize=2, ttl=10, clock=clock)
+    a, b, c = (make_job(status=JobStatus.succeeded) for _ in range(3))
+
+    cache.put("user-1", a)
+    cache.put("user-1", b)
+    cache.get("user-1", a.id)  # a becomes most recent
+    cache.put("user-1", c)
+    assert cache.get("user-1", b.id) is None
+    assert len(cache) == 2
+
+    clock.now = 10
+    assert cache.get("user-1", a.id) is None
+    assert cache.get("user-1", c.id) is None
+
+
+@pytest.mark.anyio
+async def test_concurrent_lookups_share_one_load():
+    cache = TerminalJobCache()
+    job = make_job(status=JobStatus.cancelled)
+    loads = 0
+    release = anyio.Event()
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await release.wait()
+        return job
+
+    results = []
+
+    async def lookup():
+        results.append(await cache.get_or_load("user-1", job.id, load))
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(5):
+            tg.start_soon(lookup)
+        await anyio.sleep(0.01)
+        release.set()
+
+    assert loads == 1
+    assert results == [job] * 5
+    assert await cache.get_or_load("user-1", job.id, load) is job  # cached now
+    assert loads == 1
+
+
+@pytest.mark.anyio
+async def test_failed_load_reaches_every_waiter_and_is_not_cached():
+    cache = TerminalJobCache()
+    job_id = uuid4()
+    release = anyio.Event()
+
+    async def load():
+        await release.wait()
+        raise RuntimeError("db down")
+
+    errors = []
+
+    async def lookup():
+        try:
+            await cache.get_or_load("user-1", job_id, load)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(3):
+            tg.start_soon(lookup)
+        await anyio.sleep(0.01)
+        release.set()
+
+    assert len(errors) == 3
+    assert len(cache) == 0
+
+
+@pytest.mark.anyio
+async def test_queue_client_serves_terminal_jobs_from_cache():
+    repo = FakeRepo()
+    job = make_job(status=JobStatus.succeeded)
+    repo.jobs[job.id] = job
+    qc = QueueClient(repo=repo, cache=TerminalJobCache())
+
+    assert (await qc.get(created_by="user-1", job_id=job.id)).id == job.id
+    del repo.jobs[job.id]
+    assert (await qc.get(created_by="user-1", job_id=job.id)).id == job.id
@@ -2,14 +2,28 @@
 
 from __future__ import annotations
 
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 
 import pytest
 
-from equeue.api.models.jobs import EnqueueJobRequest, JobListQuery, JobStatus
-from equeue.db.job_repo import SqlAlchemyJobRepo
+from equeue.api.models.jobs import (
+    BulkCancelRequest,
+    EnqueueJobGroupRequest,
+    EnqueueJobRequest,
+    JobChangesQuery,
+    JobListQuery,
+    JobStatus,
+    ReplayDeadJobsRequest,
+)
+from equeue.api.queue_client import QueueClient
+from equeue.db.job_repo import SqlAlchemyJobRepo, session_scope
+from equeue.db.payloads import PayloadCache
+from equeue.db.notify import CANCEL_CHANNEL, pg_cancel_listener
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 
 def utcnow() -> datetime:
@@ -118,4 +132,237 @@ async def test_list_cursor_pagination(session):
 
     page2 = await repo.list_jobs(created_by="user-1", q=JobListQuery(limit=2, cursor=page1.next_cursor))
     assert len(page2.items) == 1
-    assert page2.next_cursor is None
\ No newline at end of file
+    assert page2.next_cursor is None
+
+@pytest.mark.anyio
+async def test_statements_record_rows_and_latency(session):
+    from equeue.observability.metrics import REGISTRY
+
+    def sample(name: str) -> float:
+        return REGISTRY.get_sample_value(name, {"operation": "list_jobs", "queue": "metrics-q"}) or 0.0
+
+    repo = SqlAlchemyJobRepo(session=session)
+    for i in range(2):
+        req = EnqueueJobRequest(task_name="puzzles.extract_mate_tag", queue="metrics-q", payload={"i": i})
+        await repo.insert_job(created_by="user-1", req=req, now=utcnow())
+    await session.commit()
+
+    rows_before = sample("equeue_repo_statement_rows_total")
+    count_before = sample("equeue_repo_statement_seconds_count")
+    await repo.list_jobs(created_by="user-1", q=JobListQuery(queue="metrics-q"))
+
+    assert sample("equeue_repo_statement_rows_total") == rows_before + 2
+    assert sample("equeue_repo_statement_seconds_count") == count_before + 1
+
+
+async def _seed(sessions, n: int, *, status: str = "queued") -> None:
+    async with session_scope(sessions)() as repo:
+        for i in range(n):
+            req = EnqueueJobRequest(task_name="puzzles.extract_mate_tag", queue="default", payload={"i": i})
+            await repo.insert_job(created_by="user-1", req=req, now=utcnow())
+        if status != "queued":
+            await repo.session.execute(text("UPDATE jobs SET status = CAST(:s AS job_status)"), {"s": status})
+
+
+async def _statuses(sessions) -> list[JobStatus]:
+    async with session_scope(sessions)() as repo:
+        page = await repo.list_jobs(created_by="user-1", q=JobListQuery(limit=200))
+    return sorted(j.status.value for j in page.items)
+
+
+async def _chunked(repo, operation: str):
+    if operation == "cancel":
+        return await repo.cancel_jobs(created_by="user-1", req=BulkCancelRequest(queue="default"), now=utcnow(), chunk_size=2)
+    req = ReplayDeadJobsRequest(queue="default", spread_seconds=0)
+    return await repo.replay_dead_jobs(created_by="user-1", req=req, now=utcnow(), chunk_size=2)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("operation,before,after", [("cancel", "queued", "cancelled"), ("replay", "dead", "queued")])
+async def test_chunked_writes_commit_their_own_chunks_inside_session_scope(scratch_engine, operation, before, after):
+    sessions = async_sessionmaker(scratch_engine, class_=AsyncSession, expire_on_commit=False)
+    await _seed(sessions, 3, status=before)
+
+    with pytest.raises(RuntimeError):
+        async with session_scope(sessions)() as repo:
+            await _chunked(repo, operation)
+            raise RuntimeError("the caller's transaction rolls back")
+
+    # every chunk committed on its own session; the scope's rollback did not undo them
+    assert await _statuses(sessions) == [after] * 3
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("operation,before", [("cancel", "queued"), ("replay", "dead")])
+async def test_chunked_writes_never_commit_a_borrowed_session(scratch_engine, operation, before):
+    sessions = async_sessionmaker(scratch_engine, class_=AsyncSession, expire_on_commit=False)
+    await _seed(sessions, 3, status=before)
+
+    async with sessions() as session:
+        repo = SqlAlchemyJobRepo(session=session)
+        pending = EnqueueJobRequest(task_name="puzzles.extract_mate_tag", queue="other", payload={})
+        await repo.insert_job(created_by="user-1", req=pending, now=utcnow())
+        await _chunked(repo, operation)
+        await session.rollback()
+
+    # without chunk_sessions every chunk ran in the caller's transaction, and went with it
+    assert await _statuses(sessions) == [before] * 3
+
+
+@pytest.mark.anyio
+async def test_commit_token_reads_only_and_works_inside_session_scope(scratch_engine):
+    sessions = async_sessionmaker(scratch_engine, class_=AsyncSession, expire_on_commit=False)
+    req = EnqueueJobRequest(task_name="puzzles.extract_mate_tag", queue="default", payload={})
+
+    with pytest.raises(RuntimeError):
+        async with session_scope(sessions)() as repo:
+            await repo.insert_job(created_by="user-1", req=req, now=utcnow())
+            assert "/" in await repo.commit_token()
+            raise RuntimeError("the caller's transaction rolls back")
+    assert await _statuses(sessions) == []
+
+    # request-scoped session: QueueClient.commit() commits, then reads the token
+    async with sessions() as session:
+        qc = QueueClient(repo=SqlAlchemyJobRepo(session=session))
+        await qc.enqueue(created_by="user-1", req=req)
+        token = await qc.commit()
+        await session.rollback()
+    assert "/" in token
+    assert await _statuses(sessions) == ["queued"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("operation", ["cancel", "replay"])
+async def test_chunked_writes_never_land_behind_a_change_token(scratch_engine, monkeypatch, operation):
+    import equeue.db.job_repo as job_repo_module
+
+    sessions = async_sessionmaker(scratch_engine, class_=AsyncSession, expire_on_commit=False)
+    await _seed(sessions, 10, status="dead" if operation == "replay" else "queued")
+
+    # each chunk commits 10s after the one before; a reader polls the feed in between
+    ticks = iter(range(0, 100, 10))
+    monkeypatch.setattr(job_repo_module, "monotonic", lambda: float(next(ticks)))
+    now = utcnow()
+    seen: dict = {}
+    token = None
+
+    async def poll(until: datetime) -> None:
+        nonlocal token
+        async with session_scope(sessions)() as reader:
+            page = await reader.list_changes(created_by="user-1", q=JobChangesQuery(since=token, limit=500), until=until)
+        seen.update((j.id, j.status) for j in page.items)
+        token = page.next_token
+
+    @asynccontextmanager
+    async def poll_then_open():
+        await poll(now + timedelta(seconds=5))
+        async with sessions() as session:
+            yield session
+
+    async with sessions() as session:
+        repo = SqlAlchemyJobRepo(session=session, chunk_sessions=poll_then_open)
+        if operation == "cancel":
+            await repo.cancel_jobs(created_by="user-1", req=BulkCancelRequest(queue="default"), now=now, chunk_size=5)
+            expected = JobStatus.cancelled
+        else:
+            req = ReplayDeadJobsRequest(queue="default", spread_seconds=0)
+            await repo.replay_dead_jobs(created_by="user-1", req=req, now=now, chunk_size=5)
+            expected = JobStatus.queued
+    monkeypatch.undo()
+
+    await poll(now + timedelta(minutes=1))
+    assert len(seen) == 10
+    assert set(seen.values()) == {expected}
+
+
+@pytest.mark.anyio
+async def test_pg_cancel_listener_delivers_notifications(engine):
+    received: asyncio.Queue = asyncio.Queue()
+    listener = asyncio.create_task(pg_cancel_listener(engine.connect)(received.put_nowait))
+    job_id = uuid4()
+    try:
+        async with engine.connect() as conn:
+            # notifications sent before LISTEN is registered are lost: resend until one arrives
+            for _ in range(50):
+                await conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CANCEL_CHANNEL, "payload": str(job_id)})
+                await conn.execute(text("SELECT pg_notify(:channel, 'not-a-uuid')"), {"channel": CANCEL_CHANNEL})
+                await conn.commit()
+                try:
+                    assert await asyncio.wait_for(received.get(), 0.1) == job_id
+                    break
+                except asyncio.TimeoutError:
+                    continue
+            else:
+                pytest.fail("no notification received")
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+
+
+class _Operations:
+    def __init__(self):
+        self.seen: list[str] = []
+
+    def before(self, event):
+        self.seen.append(event.operation)
+
+    def after(self, event, token):
+        pass
+
+
+BIG = {"config": {"depth": 12, "tags": ["mate", "endgame"] * 20}, "engine": "stockfish"}
+
+
+@pytest.mark.anyio
+async def test_large_payloads_are_stored_once_out_of_line(session):
+    repo = SqlAlchemyJobRepo(session=session, payload_threshold=256)
+    reordered = {"engine": "stockfish", "config": BIG["config"]}
+
+    a = await repo.insert_job(created_by="user-1", req=EnqueueJobRequest(task_name="t", queue="default", payload=BIG), now=utcnow())
+    b = await repo.insert_job(created_by="user-1", req=EnqueueJobRequest(task_name="t", queue="default", payload=reordered), now=utcnow())
+    small = await repo.insert_job(created_by="user-1", req=EnqueueJobRequest(task_name="t", queue="default", payload={"i": 1}), now=utcnow())
+
+    assert a.payload == b.payload == BIG
+    assert (await repo.get_job(created_by="user-1", job_id=b.id)).payload == BIG
+    assert (await session.execute(text("SELECT count(*) FROM job_payloads"))).scalar() == 1
+
+    stored = (await session.execute(
+        text("SELECT id, payload, payload_hash IS NOT NULL AS out_of_line FROM jobs WHERE id = ANY(:ids)"),
+        {"ids": [a.id, small.id]},
+    )).mappings().all()
+    by_id = {r["id"]: r for r in stored}
+    assert by_id[a.id]["payload"] == {} and by_id[a.id]["out_of_line"]
+    assert by_id[small.id]["payload"] == {"i": 1} and not by_id[small.id]["out_of_line"]
+
+
+@pytest.mark.anyio
+async def test_batch_payloads_are_stored_once(session):
+    repo = SqlAlchemyJobRepo(session=session, payload_threshold=256)
+    reqs = [EnqueueJobRequest(task_name="t", queue="default", payload=p) for p in (BIG, {"i": 1}, BIG)]
+
+    jobs = await repo.insert_jobs(created_by="user-1", reqs=reqs, now=utcnow())
+
+    assert [j.payload for j in jobs] == [BIG, {"i": 1}, BIG]
+    assert (await session.execute(text("SELECT count(*) FROM job_payloads"))).scalar() == 1
+
+
+@pytest.mark.anyio
+async def test_group_payloads_are_deduplicated_and_cached_by_claimers(session):
+    ops = _Operations()
+    cache = PayloadCache()
+    producer = SqlAlchemyJobRepo(session=session, payload_threshold=256)
+    worker = SqlAlchemyJobRepo(session=session, hooks=(ops,), payload_cache=cache)
+    member = EnqueueJobRequest(task_name="t", queue="fanout", payload=BIG)
+    callback = EnqueueJobRequest(task_name="t", queue="fanout", payload=BIG)
+
+    await producer.insert_group(created_by="user-1", req=EnqueueJobGroupRequest(jobs=[member] * 4, callback=callback), now=utcnow())
+    assert (await session.execute(text("SELECT count(*) FROM job_payloads"))).scalar() == 1
+
+    for _ in range(2):
+        claimed = await worker.claim_jobs(queue="fanout", worker_id="w1", limit=2, lease_seconds=30, now=utcnow())
+        assert [j.payload for j in claimed] == [BIG, BIG]
+        claimed[0].payload["engine"] = "mutated"   # each job gets its own copy
+
+    assert ops.seen.count("get_payloads") == 1
+    assert len(cache) == 1
+
@@ -5,6 +5,9 @@ from uuid import uuid4
 from pydantic import ValidationError
 
 from equeue.api.models.jobs import (
+    DedupePolicy,
+    EnqueueJobBatchRequest,
+    EnqueueJobGroupRequest,
     EnqueueJobRequest,
     JobError,
     JobListQuery,
@@ -125,3 +128,17 @@ def test_job_public_rejects_extra_fields():
             # extra:
             locked_by="worker-1",
         )
+
+
+def test_dedupe_key_rules():
+    req = dict(task_name="t", queue="default")
+    assert EnqueueJobRequest(**req, dedupe_key="k").dedupe_policy == DedupePolicy.keep_first
+    with pytest.raises(ValidationError):
+        EnqueueJobRequest(**req, dedupe_key="k", idempotency_key="i")
+    with pytest.raises(ValidationError):
+        EnqueueJobGroupRequest(jobs=[EnqueueJobRequest(**req, dedupe_key="k")], callback=EnqueueJobRequest(**req))
+    with pytest.raises(ValidationError):
+        EnqueueJobBatchRequest(jobs=[
+            EnqueueJobRequest(**req, dedupe_key="k"),
+            EnqueueJobRequest(**req, dedupe_key="k", dedupe_policy=DedupePolicy.extend_run_at),
+        ])
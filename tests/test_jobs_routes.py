@@ -18,12 +18,24 @@ from equeue.api.routes.jobs import (
 )
 
 from equeue.api.models.jobs import (
+    BulkCancelRequest,
+    BulkCancelResponse,
+    EnqueueJobBatchRequest,
+    EnqueueJobGroupRequest,
     EnqueueJobRequest,
+    JobBatchPublic,
+    JobChangesPage,
+    JobChangesQuery,
+    JobGroupPublic,
     JobListPage,
     JobListQuery,
     JobPublic,
     JobStatus,
+    ReplayDeadJobsRequest,
+    ReplayDeadJobsResponse,
+    project_job,
 )
+from equeue.db.cursor import encode_change_token
 from tests.utils import make_job
 
 # ------------------------------------------------------------------
@@ -51,16 +63,56 @@ def fake_queue_client(job_factory):
     class FakeQueueClient(QueueClient):
         async def enqueue(self, *, created_by: str, req: EnqueueJobRequest) -> JobPublic:
             return job_factory(status=JobStatus.queued)
-        
-        async def get(self, *, created_by: str, job_id: UUID) -> JobPublic:
-            return job_factory(status=JobStatus.succeeded, job_id=job_id)
 
-        async def list(self, *, created_by: str, q: JobListQuery) -> JobListPage:
-            return JobListPage(items=[job_factory()], next_cursor=None)
+        async def enqueue_many(self, *, created_by: str, req: EnqueueJobBatchRequest) -> JobBatchPublic:
+            return JobBatchPublic(jobs=[job_factory(status=JobStatus.queued) for _ in req.jobs])
+        
+        async def get(
+            self, *, created_by: str, job_id: UUID, consistency_token: str | None = None, fields=None
+        ) -> JobPublic:
+            self.seen_token = consistency_token
+            job = job_factory(status=JobStatus.succeeded, job_id=job_id)
+            return job if fields is None else project_job(job, fields)
+
+        async def list(self, *, created_by: str, q: JobListQuery, consistency_token: str | None = None) -> JobListPage:
+            items = [job_factory()]
+            if q.field_names is not None:
+                items = [project_job(j, q.field_names) for j in items]
+            return JobListPage(items=items, next_cursor=None)
+
+        async def changes(self, *, created_by: str, q: JobChangesQuery) -> JobChangesPage:
+            self.seen_changes = q
+            job = job_factory(status=JobStatus.succeeded)
+            token = encode_change_token(job.updated_at, job.id)
+            items = [job if q.field_names is None else project_job(job, q.field_names)]
+            return JobChangesPage(items=items, next_token=token, has_more=False)
+
+        async def commit(self) -> str | None:
+            return "0/16B3748"
 
         async def cancel(self, *, created_by: str, job_id: UUID):
             return job_factory(status=JobStatus.running, job_id=job_id), True
 
+        async def cancel_many(self, *, created_by: str, req: BulkCancelRequest) -> BulkCancelResponse:
+            n = len(req.job_ids or [])
+            return BulkCancelResponse(cancelled=n, cancel_requested=0)
+
+        async def replay_dead(self, *, created_by: str, req: ReplayDeadJobsRequest) -> ReplayDeadJobsResponse:
+            self.seen_replay = req
+            return ReplayDeadJobsResponse(replayed=7)
+
+        async def enqueue_group(self, *, created_by: str, req: EnqueueJobGroupRequest) -> JobGroupPublic:
+            n = len(req.jobs)
+            return JobGroupPublic(
+                id=uuid4(),
+                created_by=created_by,
+                total=n,
+                remaining=n,
+                callback_job_id=uuid4(),
+                created_at=datetime.now(timezone.utc),
+                job_ids=[uuid4() for _ in range(n)],
+            )
+
     return FakeQueueClient()
 
 @pytest.fixture
@@ -133,3 +185,134 @@ def test_cancel_running_job_returns_202(client: TestClient, auth_headers):
     resp = client.post(f"/v1/jobs/{job_id}/cancel", headers=auth_headers)
     assert resp.status_code == 202
     assert resp.json()["status"] == "running"
+
+
+def test_enqueue_group_success(client: TestClient, auth_headers):
+    job = {"task_name": "puzzles.extract_mate_tag", "queue": "default", "payload": {}}
+    resp = client.post(
+        "/v1/jobs/groups",
+        headers=auth_headers,
+        json={"jobs": [job, job], "callback": {**job, "task_name": "puzzles.summarize"}},
+    )
+    assert resp.status_code == 201
+    body = resp.json()
+    assert body["total"] == body["remaining"] == 2
+    assert len(body["job_ids"]) == 2
+
+
+def test_enqueue_batch_returns_a_job_per_request(client: TestClient, auth_headers):
+    job = {"task_name": "puzzles.extract_mate_tag", "queue": "default"}
+    resp = client.post("/v1/jobs:batch", headers=auth_headers, json={"jobs": [job, job, job]})
+    assert resp.status_code == 201
+    assert len(resp.json()["jobs"]) == 3
+    assert resp.headers["X-Consistency-Token"] == "0/16B3748"
+
+    assert client.post("/v1/jobs:batch", headers=auth_headers, json={"jobs": []}).status_code == 422
+
+
+def test_enqueue_group_rejects_member_idempotency_keys(client: TestClient, auth_headers):
+    job = {"task_name": "puzzles.extract_mate_tag", "queue": "default", "idempotency_key": "k1"}
+    resp = client.post("/v1/jobs/groups", headers=auth_headers, json={"jobs": [job], "callback": job})
+    assert resp.status_code == 422
+
+
+def test_writes_return_and_reads_accept_consistency_token(client: TestClient, auth_headers, fake_queue_client):
+    resp = client.post(
+        "/v1/jobs/",
+        headers=auth_headers,
+        json={"task_name": "puzzles.extract_mate_tag", "queue": "default", "payload": {}},
+    )
+    token = resp.headers["X-Consistency-Token"]
+    assert token == "0/16B3748"
+
+    resp = client.get(f"/v1/jobs/{uuid4()}", headers={**auth_headers, "X-Consistency-Token": token})
+    assert resp.status_code == 200
+    assert fake_queue_client.seen_token == token
+
+
+def test_get_job_supports_conditional_requests(client: TestClient, auth_headers):
+    job_id = str(uuid4())
+    resp = client.get(f"/v1/jobs/{job_id}", headers=auth_headers)
+    etag = resp.headers["ETag"]
+
+    resp = client.get(f"/v1/jobs/{job_id}", headers={**auth_headers, "If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == etag
+    assert resp.content == b""
+
+    resp = client.get(f"/v1/jobs/{job_id}", headers={**auth_headers, "If-None-Match": f'"other", W/{etag}'})
+    assert resp.status_code == 304
+
+    resp = client.get(f"/v1/jobs/{job_id}", headers={**auth_headers, "If-None-Match": '"stale"'})
+    assert resp.status_code == 200
+
+
+def test_bulk_cancel_returns_counts(client: TestClient, auth_headers):
+    ids = [str(uuid4()) for _ in range(3)]
+    resp = client.post("/v1/jobs:cancel", json={"job_ids": ids}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.json() == {"cancelled": 3, "cancel_requested": 0}
+    assert "X-Consistency-Token" in resp.headers
+
+
+def test_replay_dead_jobs(client: TestClient, auth_headers, fake_queue_client):
+    body = {"error_type": "ConnectTimeout", "spread_seconds": 600}
+    resp = client.post("/v1/jobs:replay", json=body, headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.json() == {"replayed": 7}
+    assert fake_queue_client.seen_replay.spread_seconds == 600
+
+    assert client.post("/v1/jobs:replay", json={"spread_seconds": 60}, headers=auth_headers).status_code == 422
+    negative = {"queue": "default", "spread_seconds": -1}
+    assert client.post("/v1/jobs:replay", json=negative, headers=auth_headers).status_code == 422
+
+
+def test_bulk_cancel_requires_ids_or_filters(client: TestClient, auth_headers):
+    assert client.post("/v1/jobs:cancel", json={}, headers=auth_headers).status_code == 422
+    both = {"job_ids": [str(uuid4())], "queue": "default"}
+    assert client.post("/v1/jobs:cancel", json=both, headers=auth_headers).status_code == 422
+    assert client.post("/v1/jobs:cancel", json={"queue": "default"}, headers=auth_headers).status_code == 200
+
+
+def test_get_job_field_projection(client: TestClient, auth_headers):
+    job_id = str(uuid4())
+    full = client.get(f"/v1/jobs/{job_id}", headers=auth_headers)
+
+    resp = client.get(f"/v1/jobs/{job_id}", params={"fields": "status,updated_at"}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.json() == {"id": job_id, "status": "succeeded", "updated_at": full.json()["updated_at"]}
+    assert resp.headers["ETag"] != full.headers["ETag"]
+
+    slim = client.get(f"/v1/jobs/{job_id}", params={"fields": "status"}, headers=auth_headers)
+    assert set(slim.json()) == {"id", "status"}
+    assert "ETag" not in slim.headers
+
+    assert client.get(f"/v1/jobs/{job_id}", params={"fields": "status,secret"}, headers=auth_headers).status_code == 422
+
+
+def test_list_jobs_field_projection(client: TestClient, auth_headers):
+    resp = client.get("/v1/jobs/", params={"fields": "status"}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert [set(item) for item in resp.json()["items"]] == [{"id", "status"}]
+
+    assert client.get("/v1/jobs/", params={"fields": "payload,nope"}, headers=auth_headers).status_code == 422
+
+
+
+def test_change_feed_is_not_routed_as_a_job_id(client: TestClient, auth_headers, fake_queue_client):
+    resp = client.get("/v1/jobs/changes", headers=auth_headers)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [item["status"] for item in body["items"]] == ["succeeded"]
+    assert body["has_more"] is False
+
+    since = body["next_token"]
+    resp = client.get("/v1/jobs/changes", params={"since": since, "limit": 10, "fields": "status"}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert [set(item) for item in resp.json()["items"]] == [{"id", "status"}]
+    assert (fake_queue_client.seen_changes.since, fake_queue_client.seen_changes.limit) == (since, 10)
+
+
+def test_change_feed_rejects_bad_tokens(client: TestClient, auth_headers):
+    assert client.get("/v1/jobs/changes", params={"since": "nope"}, headers=auth_headers).status_code == 422
+    assert client.get("/v1/jobs/changes", params={"limit": 0}, headers=auth_headers).status_code == 422
@@ -0,0 +1,80 @@
+# tests/test_metrics.py
+
+from __future__ import annotations
+
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from equeue.api.app import create_app
+from equeue.api.models.jobs import EnqueueJobRequest, JobListQuery
+from equeue.api.queue_client import JobNotFoundError, QueueClient
+from equeue.observability import metrics
+from equeue.observability.metrics import REGISTRY, client_metrics
+from tests.test_queue_client import FakeRepo
+
+
+def _sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class BrokenRepo(FakeRepo):
+    async def list_jobs(self, *, created_by: str, q: JobListQuery):
+        raise RuntimeError("db down")
+
+
+@pytest.mark.anyio
+async def test_enqueue_records_latency_by_queue():
+    qc = QueueClient(repo=FakeRepo())
+    before = _sample("equeue_client_operation_seconds_count", operation="enqueue", queue="metrics-q")
+
+    req = EnqueueJobRequest(task_name="puzzles.extract_mate_tag", queue="metrics-q", payload={})
+    await qc.enqueue(created_by="user-1", req=req)
+
+    after = _sample("equeue_client_operation_seconds_count", operation="enqueue", queue="metrics-q")
+    assert after == before + 1
+
+
+@pytest.mark.anyio
+async def test_errors_are_counted_but_not_found_is_not():
+    qc = QueueClient(repo=BrokenRepo())
+    list_before = _sample("equeue_client_operation_errors_total", operation="list", queue="*")
+    get_before = _sample("equeue_client_operation_errors_total", operation="get", queue="*")
+
+    with pytest.raises(RuntimeError):
+        await qc.list(created_by="user-1", q=JobListQuery())
+    with pytest.raises(JobNotFoundError):
+        await qc.get(created_by="user-1", job_id=uuid4())
+
+    assert _sample("equeue_client_operation_errors_total", operation="list", queue="*") == list_before + 1
+    assert _sample("equeue_client_operation_errors_total", operation="get", queue="*") == get_before
+
+
+def test_label_children_are_prebound():
+    assert client_metrics("enqueue", "metrics-q") is client_metrics("enqueue", "metrics-q")
+
+
+def test_queue_label_cap_counts_distinct_queues(monkeypatch):
+    monkeypatch.setattr(metrics, "MAX_QUEUE_LABELS", 2)
+    monkeypatch.setattr(metrics, "_client_children", {})
+    monkeypatch.setattr(metrics, "_client_queues", set())
+
+    for operation in ("enqueue", "get", "cancel"):
+        for queue in ("cap-a", "cap-b"):
+            assert client_metrics(operation, queue) is metrics._client_children[(operation, queue)]
+    other = client_metrics("enqueue", "cap-c")
+
+    assert other is metrics._client_children[("enqueue", metrics.OTHER_QUEUE)]
+    assert client_metrics("enqueue", "*") is metrics._client_children[("enqueue", "*")]
+    assert metrics._client_queues == {"cap-a", "cap-b"}
+
+
+def test_metrics_route_exposes_prometheus_text():
+    client = TestClient(create_app())
+    client_metrics("enqueue", "metrics-q").latency.observe(0.001)
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert "equeue_client_operation_seconds_bucket" in resp.text
@@ -0,0 +1,163 @@
+# tests/test_migrate.py
+
+from __future__ import annotations
+
+import uuid
+
+import pytest
+
+from equeue.db.migrate import Migration, MigrationError, MigrationRunner, load_migrations, migrate, split_statements
+from tests.conftest import MIGRATIONS_DIR
+
+
+def test_split_statements_respects_quotes_bodies_and_comments():
+    sql = """
+    -- equeue:no-transaction
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS a_idx ON t (a);  -- trailing; comment
+    INSERT INTO t (s) VALUES ('x;y');
+    CREATE FUNCTION f() RETURNS int AS $body$ BEGIN RETURN 1; END; $body$ LANGUAGE plpgsql;
+    /* block; comment */
+    """
+    statements = split_statements(sql)
+
+    assert len(statements) == 3
+    assert statements[0].endswith("ON t (a)")
+    assert "'x;y'" in statements[1]
+    assert statements[2].endswith("LANGUAGE plpgsql")
+
+
+def test_directives(tmp_path):
+    (tmp_path / "001_plain.sql").write_text("CREATE TABLE t (a int);")
+    (tmp_path / "002_index.sql").write_text("-- equeue:no-transaction\nCREATE INDEX CONCURRENTLY i ON t (a);")
+    (tmp_path / "003_fill.sql").write_text("---- fill a\n-- equeue:backfill batch_size=10 pause=0.5\nUPDATE t SET a = 1;")
+    (tmp_path / "notes.sql").write_text("ignored: not NNN_name.sql")
+
+    plain, index, fill = load_migrations(tmp_path)
+
+    assert (plain.version, plain.transactional) == ("001_plain.sql", True)
+    assert index.transactional is False and index.backfill is None
+    assert fill.transactional is False and fill.backfill == {"batch_size": 10, "pause": 0.5}
+
+    (tmp_path / "004_bad.sql").write_text("-- equeue:sometimes\nSELECT 1;")
+    with pytest.raises(MigrationError):
+        load_migrations(tmp_path)
+
+
+def test_repo_migrations_load():
+    versions = [m.version for m in load_migrations(MIGRATIONS_DIR)]
+    assert versions == sorted(versions)
+    assert versions[0] == "001_create_jobs_table.sql"
+
+
+@pytest.fixture
+async def scratch_conn(migrated_db_url):
+    """
+    Raw asyncpg connection whose search_path is a throwaway schema.
+    """
+    import asyncpg
+
+    schema = f"migrate_test_{uuid.uuid4().hex[:12]}"
+    dsn = migrated_db_url.replace("postgresql+asyncpg://", "postgresql://")
+    admin = await asyncpg.connect(dsn)
+    await admin.execute(f"CREATE SCHEMA {schema}")
+    conn = await asyncpg.connect(dsn, server_settings={"search_path": schema})
+    try:
+        yield conn
+    finally:
+        await conn.close()
+        await admin.execute(f"DROP SCHEMA {schema} CASCADE")
+        await admin.close()
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_runner_applies_pending_migrations_once(scratch_conn, tmp_path):
+    (tmp_path / "001_table.sql").write_text(
+        "CREATE TABLE t (id int PRIMARY KEY, a int);\nINSERT INTO t SELECT g, NULL FROM generate_series(1, 25) g;"
+    )
+    (tmp_path / "002_index.sql").write_text(
+        "-- equeue:no-transaction\n"
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS t_a_idx ON t (a);\n"
+        "ALTER TABLE t ADD COLUMN IF NOT EXISTS b int;\n"
+    )
+    (tmp_path / "003_fill.sql").write_text(
+        "-- equeue:backfill batch_size=10\n"
+        "UPDATE t SET a = id WHERE id IN (SELECT id FROM t WHERE a IS NULL LIMIT $1 FOR UPDATE SKIP LOCKED);"
+    )
+
+    assert await migrate(scratch_conn, tmp_path) == ["001_table.sql", "002_index.sql", "003_fill.sql"]
+    assert await scratch_conn.fetchval("SELECT count(*) FROM t WHERE a = id") == 25
+    assert await scratch_conn.fetchval("SELECT indisvalid FROM pg_index WHERE indexrelid = 't_a_idx'::regclass")
+
+    assert await migrate(scratch_conn, tmp_path) == []
+
+    (tmp_path / "002_index.sql").write_text("-- equeue:no-transaction\nSELECT 1;")
+    with pytest.raises(MigrationError, match="modified"):
+        await migrate(scratch_conn, tmp_path)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_failed_transactional_migration_is_rolled_back_and_not_recorded(scratch_conn, tmp_path):
+    (tmp_path / "001_broken.sql").write_text("CREATE TABLE t (a int);\nSELECT missing_column FROM t;")
+
+    with pytest.raises(Exception):
+        await migrate(scratch_conn, tmp_path)
+
+    assert await scratch_conn.fetchval("SELECT to_regclass('t')") is None
+    assert await scratch_conn.fetchval("SELECT count(*) FROM schema_migrations") == 0
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_lock_timeouts_are_retried(scratch_conn, migrated_db_url):
+    import asyncpg
+
+    await scratch_conn.execute("CREATE TABLE t (a int)")
+    schema = await scratch_conn.fetchval("SELECT current_schema()")
+    blocker = await asyncpg.connect(migrated_db_url.replace("postgresql+asyncpg://", "postgresql://"))
+    tx = blocker.transaction()
+    await tx.start()
+    await blocker.execute(f"LOCK TABLE {schema}.t IN ACCESS SHARE MODE")
+
+    sleeps = []
+
+    async def release_after_first_timeout(delay: float) -> None:
+        sleeps.append(delay)
+        if tx is not None:
+            await tx.rollback()
+
+    runner = MigrationRunner(scratch_conn, lock_timeout=0.05, retry_delay=0.01, sleep=release_after_first_timeout)
+    try:
+        await runner.run([Migration(version="001_col.sql", sql="ALTER TABLE t ADD COLUMN b int;")])
+    finally:
+        await blocker.close()
+
+    assert sleeps == [0.01]
+    assert await scratch_conn.fetchval("SELECT count(*) FROM schema_migrations") == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_no_transaction_migration_is_not_recorded_while_an_index_is_invalid(scratch_conn, tmp_path):
+    import asyncpg
+
+    # an interrupted earlier run: the unique build failed and left u_idx INVALID
+    await scratch_conn.execute("CREATE TABLE t (a int); INSERT INTO t VALUES (1), (1);")
+    with pytest.raises(asyncpg.exceptions.UniqueViolationError):
+        await scratch_conn.execute("CREATE UNIQUE INDEX CONCURRENTLY u_idx ON t (a)")
+
+    (tmp_path / "001_index.sql").write_text(
+        "-- equeue:no-transaction\nCREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS u_idx ON t (a);"
+    )
+    with pytest.raises(MigrationError, match="u_idx"):
+        await migrate(scratch_conn, tmp_path)
+    assert await scratch_conn.fetchval("SELECT count(*) FROM schema_migrations") == 0
+
+    await scratch_conn.execute("DELETE FROM t WHERE ctid = (SELECT max(ctid) FROM t)")
+    (tmp_path / "001_index.sql").write_text(
+        "-- equeue:no-transaction\n"
+        "DROP INDEX CONCURRENTLY IF EXISTS u_idx;\n"
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS u_idx ON t (a);"
+    )
+    assert await migrate(scratch_conn, tmp_path) == ["001_index.sql"]
@@ -0,0 +1,122 @@
+# tests/test_producer.py
+
+from __future__ import annotations
+
+import anyio
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from equeue.api.models.jobs import EnqueueJobRequest
+from equeue.api.queue_client import QueueClient
+from equeue.api.routes.jobs import AuthContext, get_auth_context, get_queue_client, router
+from equeue.db.memory_repo import InMemoryJobRepo
+from equeue.sdk import Producer
+
+
+class CountingRepo(InMemoryJobRepo):
+    def __init__(self):
+        super().__init__()
+        self.batches: list[int] = []
+
+    async def insert_jobs(self, *, created_by, reqs, now):
+        self.batches.append(len(reqs))
+        return await super().insert_jobs(created_by=created_by, reqs=reqs, now=now)
+
+
+@pytest.fixture
+def repo() -> CountingRepo:
+    return CountingRepo()
+
+
+@pytest.fixture
+def transport(repo) -> httpx.ASGITransport:
+    # async overrides: sync ones would run in a worker thread
+    async def queue_client() -> QueueClient:
+        return QueueClient(repo=repo)
+
+    async def auth() -> AuthContext:
+        return AuthContext(principal_id="user-1")
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_queue_client] = queue_client
+    app.dependency_overrides[get_auth_context] = auth
+    return httpx.ASGITransport(app=app)
+
+
+def _req(i: int) -> EnqueueJobRequest:
+    return EnqueueJobRequest(task_name="puzzles.extract_mate_tag", queue="default", payload={"i": i})
+
+
+async def _enqueue_concurrently(producer: Producer, n: int) -> dict[int, object]:
+    results: dict[int, object] = {}
+
+    async def one(i: int) -> None:
+        results[i] = await producer.enqueue(_req(i))
+
+    async with anyio.create_task_group() as tg:
+        for i in range(n):
+            tg.start_soon(one, i)
+    return results
+
+
+@pytest.mark.anyio
+async def test_concurrent_enqueues_share_one_request(repo, transport):
+    async with Producer("http://equeue", token="t", max_delay=0.05, transport=transport) as producer:
+        results = await _enqueue_concurrently(producer, 50)
+
+    assert repo.batches == [50]
+    assert {i: job.payload["i"] for i, job in results.items()} == {i: i for i in range(50)}
+    assert len({job.id for job in results.values()}) == 50
+
+
+@pytest.mark.anyio
+async def test_full_batches_are_sent_without_waiting(repo, transport):
+    with anyio.fail_after(5):
+        async with Producer("http://equeue", token="t", max_batch=10, max_delay=60, transport=transport) as producer:
+            await _enqueue_concurrently(producer, 20)
+            assert repo.batches == [10, 10]
+
+
+@pytest.mark.anyio
+async def test_pending_jobs_are_sent_on_exit(repo, transport):
+    results = []
+    with anyio.fail_after(5):
+        async with anyio.create_task_group() as tg:
+            async with Producer("http://equeue", token="t", max_delay=60, transport=transport) as producer:
+                for i in range(3):
+                    tg.start_soon(lambda i=i: _append(results, producer.enqueue(_req(i))))
+                await anyio.wait_all_tasks_blocked()
+
+    assert repo.batches == [3]
+    assert len(results) == 3
+
+
+async def _append(results: list, aw) -> None:
+    results.append(await aw)
+
+
+@pytest.mark.anyio
+async def test_a_failed_batch_fails_every_caller():
+    transport = httpx.MockTransport(lambda request: httpx.Response(503))
+    errors = []
+
+    async def one(producer: Producer, i: int) -> None:
+        try:
+            await producer.enqueue(_req(i))
+        except httpx.HTTPStatusError as exc:
+            errors.append(exc.response.status_code)
+
+    async with Producer("http://equeue", token="t", transport=transport) as producer:
+        async with anyio.create_task_group() as tg:
+            for i in range(3):
+                tg.start_soon(one, producer, i)
+
+    assert errors == [503, 503, 503]
+
+
+@pytest.mark.anyio
+async def test_enqueue_requires_an_open_producer():
+    with pytest.raises(RuntimeError):
+        await Producer("http://equeue", token="t").enqueue(_req(0))
@@ -6,6 +6,7 @@ from datetime import datetime
 from uuid import UUID, uuid4
 
 import pytest
+from sqlalchemy import text
 
 from equeue.api.models.jobs import (
     EnqueueJobRequest,
@@ -13,9 +14,12 @@ from equeue.api.models.jobs import (
     JobListQuery,
     JobPublic,
     JobStatus,
+    project_job,
 )
 
 from equeue.api.queue_client import QueueClient, JobNotFoundError
+from equeue.db.job_repo import SqlAlchemyJobRepo
+from equeue.observability.metrics import REGISTRY
 from tests.utils import make_job, utcnow
 
 
@@ -48,11 +52,11 @@ class FakeRepo:
         self.jobs[job.id] = job
         return job
 
-    async def get_job(self, *, created_by: str, job_id: UUID) -> JobPublic | None:
+    async def get_job(self, *, created_by: str, job_id: UUID, fields: tuple[str, ...] | None = None) -> JobPublic | None:
         job = self.jobs.get(job_id)
         if job is None or job.created_by != created_by:
             return None
-        return job
+        return job if fields is None else project_job(job, fields)
 
     async def list_jobs(self, *, created_by: str, q: JobListQuery) -> JobListPage:
         # minimal fake: return all jobs for created_by, ignore filters for now
@@ -166,3 +170,107 @@ async def test_cancel_not_found_raises():
 
     with pytest.raises(JobNotFoundError):
         await qc.cancel(created_by="user-1", job_id=uuid4())
+
+
+# ------------------------------------------------------------------
+# Replica routing
+# ------------------------------------------------------------------
+
+class FakeReplica(FakeRepo):
+    def __init__(self, primary: FakeRepo, *, replayed: bool):
+        super().__init__()
+        self.jobs = primary.jobs
+        self.is_replayed = replayed
+        self.replay_checks = 0
+        self.reads = 0
+
+    async def replayed(self, *, token: str) -> bool:
+        self.replay_checks += 1
+        return self.is_replayed
+
+    async def get_job(self, *, created_by: str, job_id: UUID, fields: tuple[str, ...] | None = None) -> JobPublic | None:
+        self.reads += 1
+        return await super().get_job(created_by=created_by, job_id=job_id, fields=fields)
+
+
+def served_by(target: str) -> float:
+    return REGISTRY.get_sample_value("equeue_client_replica_reads_total", {"served_by": target}) or 0.0
+
+
+@pytest.mark.anyio
+async def test_reads_without_token_go_to_replica():
+    primary = FakeRepo()
+    job = make_job(created_by="user-1")
+    primary.jobs[job.id] = job
+    replica = FakeReplica(primary, replayed=False)
+
+    qc = QueueClient(repo=primary, replica=replica)
+    assert (await qc.get(created_by="user-1", job_id=job.id)).id == job.id
+    assert replica.reads == 1
+    assert replica.replay_checks == 0
+
+
+@pytest.mark.anyio
+async def test_token_read_uses_replica_once_replayed():
+    primary = FakeRepo()
+    job = make_job(created_by="user-1")
+    primary.jobs[job.id] = job
+    replica = FakeReplica(primary, replayed=True)
+
+    qc = QueueClient(repo=primary, replica=replica)
+    await qc.get(created_by="user-1", job_id=job.id, consistency_token="0/16B3748")
+    assert replica.reads == 1
+
+
+@pytest.mark.anyio
+async def test_token_read_falls_back_to_primary_when_replica_lags():
+    primary = FakeRepo()
+    job = make_job(created_by="user-1")
+    primary.jobs[job.id] = job
+    replica = FakeReplica(primary, replayed=False)
+
+    before = served_by("primary")
+    qc = QueueClient(repo=primary, replica=replica, replica_wait=0.02)
+    assert (await qc.get(created_by="user-1", job_id=job.id, consistency_token="0/16B3748")).id == job.id
+    assert replica.reads == 0
+    assert replica.replay_checks >= 2  # waited before giving up
+    assert served_by("primary") == before + 1
+
+    # malformed tokens never reach the replica
+    await qc.get(created_by="user-1", job_id=job.id, consistency_token="garbage")
+    assert replica.reads == 0
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_read_your_writes_against_streaming_replica(replica_engines):
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    primary_engine, replica_engine = replica_engines
+    primary_sessions = async_sessionmaker(primary_engine, class_=AsyncSession, expire_on_commit=False)
+    replica_sessions = async_sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+    req = EnqueueJobRequest(task_name="puzzles.extract_mate_tag", queue="default", payload={})
+
+    async with primary_sessions() as p, replica_sessions() as r:
+        qc = QueueClient(repo=SqlAlchemyJobRepo(session=p), replica=SqlAlchemyJobRepo(session=r), replica_wait=5)
+
+        job = await qc.enqueue(created_by="user-1", req=req)
+        token = await qc.commit()
+        before = served_by("replica")
+        assert (await qc.get(created_by="user-1", job_id=job.id, consistency_token=token)).id == job.id
+        assert served_by("replica") == before + 1
+
+        # paused replay: the read falls back to the primary instead of missing the write
+        await r.execute(text("SELECT pg_wal_replay_pause()"))
+        await r.commit()
+        try:
+            lagging = QueueClient(repo=qc.repo, replica=qc.replica, replica_wait=0.05)
+            job2 = await lagging.enqueue(created_by="user-1", req=req)
+            token2 = await lagging.commit()
+            before = served_by("primary")
+            assert (await lagging.get(created_by="user-1", job_id=job2.id, consistency_token=token2)).id == job2.id
+            assert served_by("primary") == before + 1
+        finally:
+            await r.execute(text("SELECT pg_wal_replay_resume()"))
+            await r.commit()
+
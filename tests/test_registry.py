@@ -24,3 +24,116 @@ def test_duplicate_task_name_raises():
 def test_unknown_task_raises():
     with pytest.raises(KeyError):
         get_task("does.not.exist")
+
+
+# ------------------------------------------------------------------
+# Lazy registration / manifest
+# ------------------------------------------------------------------
+
+import sys
+
+from equeue.registry import is_registered, register_lazy, registry as registry_module
+from equeue.registry.manifest import build_manifest, load_manifest, main as manifest_main
+
+SAMPLE = "tests.sample_tasks"
+
+
+def test_lazy_task_is_imported_on_first_use(clean_registry):
+    register_lazy("sample.add", f"{SAMPLE}:add")
+
+    assert is_registered("sample.add")
+    assert SAMPLE not in sys.modules
+
+    fn = get_task("sample.add")
+    assert SAMPLE in sys.modules
+    assert fn(1, 2) == 3
+    # importing the module registered its other task eagerly
+    assert get_task("sample.echo") is sys.modules[SAMPLE].echo
+
+
+def test_lazy_reference_without_decorator(clean_registry):
+    register_lazy("json.dumps", "json:dumps")
+    assert get_task("json.dumps")({"a": 1}) == '{"a": 1}'
+
+
+@pytest.mark.parametrize("ref", ["json.dumps", "json:", ":dumps"])
+def test_lazy_rejects_malformed_reference(clean_registry, ref):
+    with pytest.raises(ValueError):
+        register_lazy("bad.ref", ref)
+
+
+def test_lazy_rejects_duplicate_name(clean_registry):
+    @task(name="dup.lazy")
+    def eager():
+        pass
+
+    with pytest.raises(ValueError):
+        register_lazy("dup.lazy", "json:dumps")
+
+
+def test_manifest_round_trip_avoids_imports(clean_registry, tmp_path):
+    path = tmp_path / "tasks.manifest.json"
+    assert manifest_main([SAMPLE, "-o", str(path)]) == 0
+
+    # fresh worker process: nothing imported yet
+    registry_module._TASK_REGISTRY.clear()
+    del sys.modules[SAMPLE]
+
+    names = load_manifest(path)
+    assert names == ["sample.add", "sample.echo", "sample.slow"]
+    assert SAMPLE not in sys.modules
+    assert is_registered("sample.echo")
+    assert not is_registered("sample.missing")
+
+    assert get_task("sample.add")(2, 3) == 5
+
+
+def test_manifest_lists_references(clean_registry):
+    manifest = build_manifest([SAMPLE])
+    assert manifest["tasks"] == {
+        "sample.add": f"{SAMPLE}:add",
+        "sample.echo": f"{SAMPLE}:echo",
+        "sample.slow": f"{SAMPLE}:slow",
+    }
+    assert manifest["options"] == {"sample.slow": {"max_concurrency": 1, "timeout": 5.0}}
+
+
+def test_task_options_are_stored_and_exported_in_manifest(clean_registry):
+    from equeue.registry import get_task_options, limited_tasks
+
+    @task(name="opts.limited", max_concurrency=2, rate_limit=5.0, timeout=30)
+    def limited():
+        pass
+
+    @task(name="opts.plain")
+    def plain():
+        pass
+
+    assert get_task_options("opts.limited").max_concurrency == 2
+    assert get_task_options("opts.plain").timeout is None
+    assert set(limited_tasks()) == {"opts.limited"}
+
+
+def test_task_options_reject_nonsense(clean_registry):
+    with pytest.raises(ValueError):
+        @task(name="opts.bad", max_concurrency=0)
+        def bad():
+            pass
+    with pytest.raises(ValueError):
+        @task(name="opts.bad_retry", retry_base_delay=10, retry_max_delay=1)
+        def bad_retry():
+            pass
+
+
+def test_manifest_carries_options_to_lazy_tasks(clean_registry, tmp_path):
+    from equeue.registry import get_task_options
+
+    path = tmp_path / "tasks.manifest.json"
+    manifest_main([SAMPLE, "-o", str(path)])
+    registry_module._TASK_REGISTRY.clear()
+    registry_module._TASK_OPTIONS.clear()
+    del sys.modules[SAMPLE]
+
+    load_manifest(path)
+    assert get_task_options("sample.slow").max_concurrency == 1
+    assert SAMPLE not in sys.modules
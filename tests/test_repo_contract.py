@@ -0,0 +1,672 @@
+# tests/test_repo_contract.py
+
+"""
+Behaviour shared by every JobRepo backend. Each test runs against Postgres
+(SqlAlchemyJobRepo) and the in-memory backend (InMemoryJobRepo).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from equeue.api.models.jobs import (
+    BulkCancelRequest,
+    DedupePolicy,
+    EnqueueJobGroupRequest,
+    EnqueueJobRequest,
+    JobChangesQuery,
+    JobListQuery,
+    JobStatus,
+    ReplayDeadJobsRequest,
+)
+from equeue.db.job_repo import CLAIM_BUCKETS, JobFailure, SqlAlchemyJobRepo
+from equeue.db.memory_repo import InMemoryJobRepo
+
+
+T0 = datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(params=["postgres", "memory"])
+def repo(request):
+    if request.param == "memory":
+        return InMemoryJobRepo()
+    return SqlAlchemyJobRepo(session=request.getfixturevalue("session"))
+
+
+def _req(*, queue: str = "default", run_at: datetime = T0, priority: int = 0, **kw) -> EnqueueJobRequest:
+    return EnqueueJobRequest(
+        task_name=kw.pop("task_name", "puzzles.extract_mate_tag"),
+        queue=queue,
+        payload=kw.pop("payload", {}),
+        priority=priority,
+        run_at=run_at,
+        **kw,
+    )
+
+
+async def _claim(repo, *, worker_id: str = "w1", limit: int = 10, lease_seconds: float = 30, now: datetime = T0):
+    return await repo.claim_jobs(
+        queue="default", worker_id=worker_id, limit=limit, lease_seconds=lease_seconds, now=now
+    )
+
+
+@pytest.mark.anyio
+async def test_get_is_scoped_to_owner(repo):
+    job = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+
+    assert (await repo.get_job(created_by="user-1", job_id=job.id)).id == job.id
+    assert await repo.get_job(created_by="user-2", job_id=job.id) is None
+    assert await repo.get_job(created_by="user-1", job_id=uuid4()) is None
+
+
+@pytest.mark.anyio
+async def test_idempotency_key_returns_existing_job(repo):
+    job1 = await repo.insert_job(created_by="user-1", req=_req(idempotency_key="k1"), now=T0)
+    job2 = await repo.insert_job(created_by="user-1", req=_req(idempotency_key="k1", payload={"x": 1}), now=T0)
+    job3 = await repo.insert_job(created_by="user-2", req=_req(idempotency_key="k1"), now=T0)
+
+    assert job2.id == job1.id
+    assert job2.payload == {}
+    assert job3.id != job1.id
+
+
+@pytest.mark.anyio
+async def test_insert_jobs_returns_one_job_per_request_in_order(repo):
+    existing = await repo.insert_job(created_by="user-1", req=_req(idempotency_key="old"), now=T0)
+    reqs = [
+        _req(payload={"i": 0}),
+        _req(payload={"i": 1}, idempotency_key="new"),
+        _req(payload={"i": 2}, idempotency_key="old"),
+        _req(payload={"i": 3}, idempotency_key="new"),
+        _req(payload={"i": 4}, queue="other"),
+    ]
+
+    jobs = await repo.insert_jobs(created_by="user-1", reqs=reqs, now=T0)
+
+    assert [j.payload for j in jobs] == [{"i": 0}, {"i": 1}, {}, {"i": 1}, {"i": 4}]
+    assert jobs[2].id == existing.id
+    assert jobs[3].id == jobs[1].id
+    assert jobs[4].queue == "other"
+    page = await repo.list_jobs(created_by="user-1", q=JobListQuery(limit=50))
+    assert len(page.items) == 4
+
+
+@pytest.mark.anyio
+async def test_dedupe_key_merges_into_the_queued_job(repo):
+    first = await repo.insert_job(created_by="user-1", req=_req(dedupe_key="k", payload={"v": 1}), now=T0)
+    kept = await repo.insert_job(created_by="user-1", req=_req(dedupe_key="k", payload={"v": 2}), now=T0)
+    assert (kept.id, kept.payload) == (first.id, {"v": 1})
+
+    replace = DedupePolicy.replace_payload
+    replaced = await repo.insert_job(
+        created_by="user-1", req=_req(dedupe_key="k", dedupe_policy=replace, payload={"v": 3}), now=T0
+    )
+    assert (replaced.id, replaced.payload) == (first.id, {"v": 3})
+
+    extend = DedupePolicy.extend_run_at
+    later = T0 + timedelta(seconds=30)
+    extended = await repo.insert_job(created_by="user-1", req=_req(dedupe_key="k", dedupe_policy=extend, run_at=later), now=T0)
+    not_earlier = await repo.insert_job(created_by="user-1", req=_req(dedupe_key="k", dedupe_policy=extend), now=T0)
+    assert (extended.id, extended.run_at) == (first.id, later)
+    assert not_earlier.run_at == later
+
+    other_owner = await repo.insert_job(created_by="user-2", req=_req(dedupe_key="k", queue="other"), now=T0)
+    assert other_owner.id != first.id
+
+    # once claimed, the key is free for the next job
+    assert await _claim(repo, now=T0 + timedelta(seconds=1)) == []
+    (claimed,) = await _claim(repo, now=later)
+    assert claimed.id == first.id
+    after = await repo.insert_job(created_by="user-1", req=_req(dedupe_key="k"), now=later)
+    assert after.id != first.id
+    assert (await repo.insert_job(created_by="user-1", req=_req(dedupe_key="k"), now=later)).id == after.id
+
+
+async def _requeue(repo, job_id, how: str, *, now: datetime) -> None:
+    error = {"type": "Boom", "message": "x"}
+    if how == "retry":
+        failure = JobFailure(job_id=job_id, error=error, retryable=True, run_at=now)
+        (failed,) = await repo.fail_jobs(failures=[failure], worker_id="w1", now=now)
+        assert failed.status == JobStatus.queued
+    elif how == "release":
+        assert await repo.release_jobs(job_ids=[job_id], worker_id="w1", now=now) == [job_id]
+    elif how == "reap":
+        (reaped,) = await repo.reap_expired_leases(queue="default", now=now + timedelta(seconds=60))
+        assert reaped.status == JobStatus.queued
+    else:
+        failure = JobFailure(job_id=job_id, error=error, retryable=False, run_at=now)
+        await repo.fail_jobs(failures=[failure], worker_id="w1", now=now)
+        req = ReplayDeadJobsRequest(queue="default", spread_seconds=0)
+        assert (await repo.replay_dead_jobs(created_by="user-1", req=req, now=now)).replayed == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("how", ["retry", "release", "reap", "replay"])
+async def test_requeued_deduped_job_drops_its_key(repo, how):
+    await repo.insert_job(created_by="user-1", req=_req(dedupe_key="k"), now=T0)
+    (first,) = await _claim(repo, now=T0)
+    newer = await repo.insert_job(created_by="user-1", req=_req(dedupe_key="k"), now=T0)
+    assert newer.id != first.id
+
+    # the newer queued job holds the key; the requeued one runs again as itself
+    await _requeue(repo, first.id, how, now=T0)
+    merged = await repo.insert_job(created_by="user-1", req=_req(dedupe_key="k"), now=T0)
+    assert merged.id == newer.id
+    page = await repo.list_jobs(created_by="user-1", q=JobListQuery(status=[JobStatus.queued], limit=50))
+    assert {j.id for j in page.items} == {first.id, newer.id}
+
+
+@pytest.mark.anyio
+async def test_insert_jobs_merges_duplicate_dedupe_keys(repo):
+    replace = DedupePolicy.replace_payload
+    reqs = [
+        _req(payload={"i": 0}, dedupe_key="a", dedupe_policy=replace),
+        _req(payload={"i": 1}),
+        _req(payload={"i": 2}, dedupe_key="a", dedupe_policy=replace),
+        _req(payload={"i": 3}, dedupe_key="b"),
+        _req(payload={"i": 4}, dedupe_key="b"),
+    ]
+
+    jobs = await repo.insert_jobs(created_by="user-1", reqs=reqs, now=T0)
+
+    assert [j.payload for j in jobs] == [{"i": 2}, {"i": 1}, {"i": 2}, {"i": 3}, {"i": 3}]
+    assert jobs[0].id == jobs[2].id and jobs[3].id == jobs[4].id
+    page = await repo.list_jobs(created_by="user-1", q=JobListQuery(limit=50))
+    assert len(page.items) == 3
+
+
+@pytest.mark.anyio
+async def test_list_keyset_pagination_and_filters(repo):
+    for i in range(5):
+        await repo.insert_job(created_by="user-1", req=_req(queue="a" if i % 2 else "b", payload={"i": i}), now=T0)
+    await repo.insert_job(created_by="user-2", req=_req(queue="a"), now=T0)
+
+    seen = []
+    cursor = None
+    while True:
+        page = await repo.list_jobs(created_by="user-1", q=JobListQuery(limit=2, cursor=cursor))
+        seen.extend(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert len(seen) == 5
+    assert len({j.id for j in seen}) == 5
+    keys = [(j.created_at, j.id) for j in seen]
+    assert keys == sorted(keys, reverse=True)
+
+    only_a = await repo.list_jobs(created_by="user-1", q=JobListQuery(queue="a"))
+    assert {j.payload["i"] for j in only_a.items} == {1, 3}
+
+
+@pytest.mark.anyio
+async def test_change_feed_returns_each_change_once_in_order(repo):
+    # Postgres stamps inserts with its own now(): keep every timestamp near the real clock
+    now = datetime.now(timezone.utc)
+    jobs = [await repo.insert_job(created_by="user-1", req=_req(), now=now + timedelta(seconds=i)) for i in range(5)]
+    await repo.insert_job(created_by="user-2", req=_req(), now=now)
+    until = now + timedelta(minutes=1)
+
+    first = await repo.list_changes(created_by="user-1", q=JobChangesQuery(limit=3, fields="status"), until=until)
+    assert first.has_more is True
+    assert first.items[0].model_dump(exclude_unset=True).keys() == {"id", "status"}
+    second = await repo.list_changes(created_by="user-1", q=JobChangesQuery(since=first.next_token), until=until)
+    assert second.has_more is False
+    seen = first.items + second.items
+    assert sorted(j.id for j in seen) == sorted(j.id for j in jobs)
+    assert [(j.updated_at, j.id) for j in second.items] == sorted((j.updated_at, j.id) for j in second.items)
+
+    # a change newer than `until` waits for a later poll; the token stays put
+    await repo.cancel_job(created_by="user-1", job_id=jobs[1].id, now=now + timedelta(seconds=30))
+    early = await repo.list_changes(
+        created_by="user-1", q=JobChangesQuery(since=second.next_token), until=now + timedelta(seconds=20)
+    )
+    assert (early.items, early.next_token) == ([], second.next_token)
+
+    # then only the job that changed comes back, with its new state
+    third = await repo.list_changes(created_by="user-1", q=JobChangesQuery(since=second.next_token), until=until)
+    assert [(j.id, j.status) for j in third.items] == [(jobs[1].id, JobStatus.cancelled)]
+    idle = await repo.list_changes(created_by="user-1", q=JobChangesQuery(since=third.next_token), until=until)
+    assert idle.items == []
+
+
+@pytest.mark.anyio
+async def test_field_projections(repo):
+    for i in range(3):
+        await repo.insert_job(created_by="user-1", req=_req(payload={"i": i}), now=T0 + timedelta(seconds=i))
+    job = await repo.insert_job(created_by="user-1", req=_req(payload={"big": "x" * 100}), now=T0)
+
+    got = await repo.get_job(created_by="user-1", job_id=job.id, fields=("id", "status", "payload"))
+    assert got.model_dump(exclude_unset=True) == {"id": job.id, "status": JobStatus.queued, "payload": {"big": "x" * 100}}
+
+    seen = []
+    cursor = None
+    while True:
+        page = await repo.list_jobs(created_by="user-1", q=JobListQuery(limit=3, cursor=cursor, fields="status"))
+        seen.extend(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert len({j.id for j in seen}) == 4
+    assert all(j.model_fields_set == {"id", "status"} for j in seen)
+
+
+@pytest.mark.anyio
+async def test_claim_order_matches_runnable_index(repo):
+    late = await repo.insert_job(created_by="user-1", req=_req(run_at=T0 - timedelta(seconds=1)), now=T0)
+    low = await repo.insert_job(created_by="user-1", req=_req(run_at=T0 - timedelta(seconds=2), priority=0), now=T0)
+    high = await repo.insert_job(created_by="user-1", req=_req(run_at=T0 - timedelta(seconds=2), priority=5), now=T0)
+    await repo.insert_job(created_by="user-1", req=_req(run_at=T0 + timedelta(minutes=5)), now=T0)
+    await repo.insert_job(created_by="user-1", req=_req(queue="other", run_at=T0), now=T0)
+
+    claimed = await _claim(repo)
+
+    assert [j.id for j in claimed] == [high.id, low.id, late.id]
+    assert all(j.status == JobStatus.running and j.attempts == 1 for j in claimed)
+
+
+@pytest.mark.anyio
+async def test_claim_respects_limit_and_never_double_claims(repo):
+    for _ in range(3):
+        await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+
+    first = await _claim(repo, worker_id="w1", limit=2)
+    second = await _claim(repo, worker_id="w2", limit=2)
+    third = await _claim(repo, worker_id="w3", limit=2)
+
+    assert len(first) == 2
+    assert len(second) == 1
+    assert third == []
+    assert not {j.id for j in first} & {j.id for j in second}
+
+
+@pytest.mark.anyio
+async def test_cancelled_queued_job_is_not_claimable(repo):
+    job = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+
+    cancelled, accepted = await repo.cancel_job(created_by="user-1", job_id=job.id, now=T0)
+
+    assert cancelled.status == JobStatus.cancelled
+    assert accepted is False
+    assert await _claim(repo) == []
+
+
+@pytest.mark.anyio
+async def test_bulk_cancel_by_filter_walks_every_chunk(repo):
+    ids = [
+        (await repo.insert_job(created_by="user-1", req=_req(), now=T0 + timedelta(seconds=i % 3))).id
+        for i in range(7)
+    ]
+    await _claim(repo, limit=2)
+    other_queue = await repo.insert_job(created_by="user-1", req=_req(queue="other"), now=T0)
+    other_owner = await repo.insert_job(created_by="user-2", req=_req(), now=T0)
+
+    result = await repo.cancel_jobs(
+        created_by="user-1", req=BulkCancelRequest(queue="default"), now=T0, chunk_size=2
+    )
+    assert (result.cancelled, result.cancel_requested) == (5, 2)
+
+    statuses = [(await repo.get_job(created_by="user-1", job_id=i)).status for i in ids]
+    assert statuses.count(JobStatus.cancelled) == 5
+    assert statuses.count(JobStatus.running) == 2
+    assert (await repo.get_job(created_by="user-1", job_id=other_queue.id)).status == JobStatus.queued
+    assert (await repo.get_job(created_by="user-2", job_id=other_owner.id)).status == JobStatus.queued
+
+    # already-flagged and terminal jobs are not counted again
+    again = await repo.cancel_jobs(created_by="user-1", req=BulkCancelRequest(queue="default"), now=T0)
+    assert (again.cancelled, again.cancel_requested) == (0, 0)
+
+
+@pytest.mark.anyio
+async def test_bulk_cancel_by_ids_is_scoped_to_owner(repo):
+    mine = [(await repo.insert_job(created_by="user-1", req=_req(), now=T0)).id for _ in range(3)]
+    theirs = await repo.insert_job(created_by="user-2", req=_req(), now=T0)
+
+    result = await repo.cancel_jobs(
+        created_by="user-1",
+        req=BulkCancelRequest(job_ids=[*mine, mine[0], theirs.id, uuid4()]),
+        now=T0,
+        chunk_size=2,
+    )
+
+    assert (result.cancelled, result.cancel_requested) == (3, 0)
+    assert (await repo.get_job(created_by="user-2", job_id=theirs.id)).status == JobStatus.queued
+
+
+@pytest.mark.anyio
+async def test_cancel_running_is_accepted_and_terminal_is_noop(repo):
+    job = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    await _claim(repo)
+
+    running, accepted = await repo.cancel_job(created_by="user-1", job_id=job.id, now=T0)
+    assert running.status == JobStatus.running
+    assert running.cancel_requested_at is not None
+    assert accepted is True
+
+    done = await repo.complete_job(job_id=job.id, worker_id="w1", now=T0)
+    assert done.status == JobStatus.succeeded
+    assert done.cancel_requested_at is None
+
+    again, accepted = await repo.cancel_job(created_by="user-1", job_id=job.id, now=T0)
+    assert again.status == JobStatus.succeeded
+    assert accepted is False
+
+
+@pytest.mark.anyio
+async def test_complete_requires_current_lease_holder(repo):
+    job = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    await _claim(repo, worker_id="w1")
+
+    assert await repo.complete_job(job_id=job.id, worker_id="w2", now=T0) is None
+    assert (await repo.complete_job(job_id=job.id, worker_id="w1", now=T0)).status == JobStatus.succeeded
+    assert await repo.complete_job(job_id=job.id, worker_id="w1", now=T0) is None
+
+
+@pytest.mark.anyio
+async def test_expired_lease_is_requeued_and_reclaimable(repo):
+    job = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    await _claim(repo, worker_id="w1", lease_seconds=1)
+
+    later = T0 + timedelta(seconds=2)
+    reaped = await repo.reap_expired_leases(queue="default", now=later)
+
+    assert [j.id for j in reaped] == [job.id]
+    assert reaped[0].status == JobStatus.queued
+    assert reaped[0].last_error["type"] == "LeaseExpired"
+
+    # old holder lost the lease
+    assert await repo.complete_job(job_id=job.id, worker_id="w1", now=later) is None
+
+    reclaimed = await _claim(repo, worker_id="w2", now=later)
+    assert [j.id for j in reclaimed] == [job.id]
+    assert reclaimed[0].attempts == 2
+
+
+@pytest.mark.anyio
+async def test_expired_lease_with_cancel_request_becomes_cancelled(repo):
+    job = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    await _claim(repo, lease_seconds=1)
+    await repo.cancel_job(created_by="user-1", job_id=job.id, now=T0)
+
+    reaped = await repo.reap_expired_leases(queue="default", now=T0 + timedelta(seconds=2))
+
+    assert reaped[0].status == JobStatus.cancelled
+    assert reaped[0].cancel_requested_at is None
+
+
+@pytest.mark.anyio
+async def test_extend_leases_keeps_job_from_being_reaped(repo):
+    job = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    other = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    await _claim(repo, worker_id="w1", lease_seconds=1)
+
+    extended = await repo.extend_leases(
+        job_ids=[job.id], worker_id="w1", lease_seconds=60, now=T0
+    )
+    not_mine = await repo.extend_leases(
+        job_ids=[other.id], worker_id="w2", lease_seconds=60, now=T0
+    )
+
+    reaped = await repo.reap_expired_leases(queue="default", now=T0 + timedelta(seconds=2))
+
+    assert extended == [job.id]
+    assert not_mine == []
+    assert [j.id for j in reaped] == [other.id]
+
+
+@pytest.mark.anyio
+async def test_claim_filters_by_task_name(repo):
+    a = await repo.insert_job(created_by="user-1", req=_req(task_name="t.a"), now=T0)
+    b = await repo.insert_job(created_by="user-1", req=_req(task_name="t.b"), now=T0)
+
+    none_a = await _claim_repo_filtered(repo, exclude_task_names=["t.a", "t.b"])
+    only_a = await _claim_repo_filtered(repo, task_names=["t.a"])
+    rest = await _claim_repo_filtered(repo, exclude_task_names=["t.a"])
+
+    assert none_a == []
+    assert [j.id for j in only_a] == [a.id]
+    assert [j.id for j in rest] == [b.id]
+
+
+async def _claim_repo_filtered(repo, **filters):
+    return await repo.claim_jobs(
+        queue="default", worker_id="w1", limit=10, lease_seconds=30, now=T0, **filters
+    )
+
+
+@pytest.mark.anyio
+async def test_claim_by_bucket_partitions_the_queue(repo):
+    jobs = [await repo.insert_job(created_by="user-1", req=_req(), now=T0) for _ in range(100)]
+
+    per_bucket = [await _claim_repo_filtered(repo, bucket=b) for b in range(CLAIM_BUCKETS)]
+
+    claimed = [j.id for batch in per_bucket for j in batch]
+    assert sorted(claimed) == sorted(j.id for j in jobs)    # each job in exactly one bucket
+    assert sum(1 for batch in per_bucket if batch) > 1
+    assert await _claim_repo_filtered(repo) == []
+
+
+@pytest.mark.anyio
+async def test_claim_members_expire_after_ttl(repo):
+    assert await repo.heartbeat_member(queue="default", worker_id="w1", now=T0, ttl=20) == ["w1"]
+    assert await repo.heartbeat_member(queue="other", worker_id="w9", now=T0, ttl=20) == ["w9"]
+    later = T0 + timedelta(seconds=15)
+    assert await repo.heartbeat_member(queue="default", worker_id="w2", now=later, ttl=20) == ["w1", "w2"]
+
+    # w1 went silent at T0
+    assert await repo.heartbeat_member(queue="default", worker_id="w2", now=T0 + timedelta(seconds=25), ttl=20) == ["w2"]
+
+    await repo.leave_members(queue="default", worker_id="w2")
+    assert await repo.heartbeat_member(queue="default", worker_id="w3", now=later, ttl=20) == ["w3"]
+
+
+@pytest.mark.anyio
+async def test_count_running_by_task(repo):
+    for i, name in enumerate(("t.a", "t.a", "t.b", "t.c")):
+        run_at = T0 - timedelta(seconds=10 - i)
+        await repo.insert_job(created_by="user-1", req=_req(task_name=name, run_at=run_at), now=T0)
+    await _claim(repo, limit=3)
+
+    counts = await repo.count_running(task_names=["t.a", "t.b", "t.c"])
+    assert counts == {"t.a": 2, "t.b": 1}
+
+
+@pytest.mark.anyio
+async def test_fail_jobs_reschedules_retryable_and_kills_the_rest(repo):
+    retry = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    fatal = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    await _claim(repo)
+
+    error = {"type": "RuntimeError", "message": "boom", "retryable": True}
+    later = T0 + timedelta(seconds=30)
+    failed = await repo.fail_jobs(
+        failures=[
+            JobFailure(job_id=retry.id, error=error, retryable=True, run_at=later),
+            JobFailure(job_id=fatal.id, error=error, retryable=False, run_at=later),
+        ],
+        worker_id="w1",
+        now=T0,
+    )
+
+    by_id = {j.id: j for j in failed}
+    assert by_id[retry.id].status == JobStatus.queued
+    assert by_id[retry.id].run_at == later
+    assert by_id[retry.id].last_error["message"] == "boom"
+    assert by_id[fatal.id].status == JobStatus.dead
+
+    # backoff: not runnable before run_at
+    assert await _claim(repo, now=T0 + timedelta(seconds=29)) == []
+    assert [j.id for j in await _claim(repo, now=later)] == [retry.id]
+
+
+@pytest.mark.anyio
+async def test_fail_jobs_goes_dead_when_attempts_exhausted_or_lease_lost(repo):
+    job = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    await _claim(repo, worker_id="w1")
+    error = {"type": "RuntimeError", "message": "boom"}
+    failure = JobFailure(job_id=job.id, error=error, retryable=True, run_at=T0)
+
+    assert await repo.fail_jobs(failures=[failure], worker_id="w2", now=T0) == []
+
+    for _ in range(24):  # max_attempts = 25
+        assert (await repo.fail_jobs(failures=[failure], worker_id="w1", now=T0))[0].status == JobStatus.queued
+        await _claim(repo, worker_id="w1")
+
+    (dead,) = await repo.fail_jobs(failures=[failure], worker_id="w1", now=T0)
+    assert dead.status == JobStatus.dead
+    assert dead.attempts == 25
+
+
+async def _kill(repo, jobs, error_type: str, *, now: datetime = T0):
+    await _claim(repo, limit=len(jobs), now=now)
+    error = {"type": error_type, "message": "boom"}
+    failures = [JobFailure(job_id=j.id, error=error, retryable=False, run_at=now) for j in jobs]
+    return await repo.fail_jobs(failures=failures, worker_id="w1", now=now)
+
+
+@pytest.mark.anyio
+async def test_replay_dead_jobs_by_error_type_spreads_run_at(repo):
+    timeouts = [await repo.insert_job(created_by="user-1", req=_req(payload={"i": i}), now=T0) for i in range(5)]
+    await _kill(repo, timeouts, "ConnectTimeout")
+    (other,) = await _kill(repo, [await repo.insert_job(created_by="user-1", req=_req(), now=T0)], "ValueError")
+    (not_mine,) = await _kill(repo, [await repo.insert_job(created_by="user-2", req=_req(), now=T0)], "ConnectTimeout")
+
+    now = T0 + timedelta(minutes=5)
+    req = ReplayDeadJobsRequest(error_type="ConnectTimeout", spread_seconds=60)
+    result = await repo.replay_dead_jobs(created_by="user-1", req=req, now=now, chunk_size=2)
+
+    assert result.replayed == 5
+    for j in timeouts:
+        job = await repo.get_job(created_by="user-1", job_id=j.id)
+        assert (job.status, job.attempts) == (JobStatus.queued, 0)
+        assert now <= job.run_at <= now + timedelta(seconds=60)
+    assert (await repo.get_job(created_by="user-1", job_id=other.id)).status == JobStatus.dead
+    assert (await repo.get_job(created_by="user-2", job_id=not_mine.id)).status == JobStatus.dead
+
+    claimed = await _claim(repo, now=now + timedelta(seconds=60))
+    assert {j.id for j in claimed} == {j.id for j in timeouts}
+
+    # only dead jobs are replayed: running ones are left alone
+    assert (await repo.replay_dead_jobs(created_by="user-1", req=req, now=now)).replayed == 0
+
+
+@pytest.mark.anyio
+async def test_replay_dead_jobs_filters_by_time_of_death(repo):
+    early = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    await _kill(repo, [early], "ConnectTimeout", now=T0)
+    late = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    await _kill(repo, [late], "ConnectTimeout", now=T0 + timedelta(hours=1))
+
+    req = ReplayDeadJobsRequest(died_after=T0 + timedelta(minutes=30))
+    assert (await repo.replay_dead_jobs(created_by="user-1", req=req, now=T0 + timedelta(hours=2))).replayed == 1
+    assert (await repo.get_job(created_by="user-1", job_id=early.id)).status == JobStatus.dead
+    assert (await repo.get_job(created_by="user-1", job_id=late.id)).status == JobStatus.queued
+
+
+@pytest.mark.anyio
+async def test_release_jobs_requeues_without_spending_an_attempt(repo):
+    job = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    cancelled = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    await _claim(repo, worker_id="w1")
+    await repo.cancel_job(created_by="user-1", job_id=cancelled.id, now=T0)
+
+    assert await repo.release_jobs(job_ids=[job.id], worker_id="w2", now=T0) == []
+    released = await repo.release_jobs(job_ids=[job.id, cancelled.id], worker_id="w1", now=T0)
+    assert sorted(released) == sorted([job.id, cancelled.id])
+
+    got = await repo.get_job(created_by="user-1", job_id=job.id)
+    assert (got.status, got.attempts, got.run_at) == (JobStatus.queued, 0, T0)
+    assert (await repo.get_job(created_by="user-1", job_id=cancelled.id)).status == JobStatus.cancelled
+
+    (again,) = await _claim(repo, worker_id="w2")
+    assert again.id == job.id
+
+
+@pytest.mark.anyio
+async def test_cancel_requests_are_polled_and_finished_by_lease_holder(repo):
+    job = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    other = await repo.insert_job(created_by="user-1", req=_req(), now=T0)
+    await _claim(repo, worker_id="w1")
+    await repo.cancel_job(created_by="user-1", job_id=job.id, now=T0)
+
+    assert await repo.cancel_requested(job_ids=[job.id, other.id], worker_id="w1") == [job.id]
+    assert await repo.cancel_requested(job_ids=[job.id], worker_id="w2") == []
+
+    assert await repo.finish_cancelled(job_ids=[job.id], worker_id="w2", now=T0) == []
+    (done,) = await repo.finish_cancelled(job_ids=[job.id], worker_id="w1", now=T0)
+    assert done.status == JobStatus.cancelled
+    assert done.cancel_requested_at is None
+
+
+# ------------------------------------------------------------------
+# Fan-in groups
+# ------------------------------------------------------------------
+
+# the callback is released at the database's now() on Postgres, so claim it "later"
+AFTER_RELEASE = datetime.now(timezone.utc) + timedelta(minutes=5)
+
+
+async def _group(repo, n: int = 3):
+    req = EnqueueJobGroupRequest(
+        jobs=[_req(task_name="t.map", payload={"i": i}) for i in range(n)],
+        callback=_req(task_name="t.reduce"),
+    )
+    return await repo.insert_group(created_by="user-1", req=req, now=T0)
+
+
+@pytest.mark.anyio
+async def test_group_callback_waits_for_every_member(repo):
+    group = await _group(repo)
+    assert (group.total, group.remaining) == (3, 3)
+    assert len(group.job_ids) == 3
+
+    member = await repo.get_job(created_by="user-1", job_id=group.job_ids[0])
+    assert member.group_id == group.id
+    assert member.payload == {"i": 0}
+    held = await repo.get_job(created_by="user-1", job_id=group.callback_job_id)
+    assert held.status == JobStatus.queued
+    assert held.run_at > AFTER_RELEASE
+
+    claimed = await _claim(repo, now=AFTER_RELEASE)
+    assert sorted(j.id for j in claimed) == sorted(group.job_ids)  # callback held back
+
+    m1, m2, m3 = group.job_ids
+    await repo.complete_job(job_id=m1, worker_id="w1", now=T0)
+    await repo.fail_jobs(
+        failures=[JobFailure(job_id=m2, error={"type": "ValueError"}, retryable=False, run_at=T0)],
+        worker_id="w1",
+        now=T0,
+    )
+    assert (await repo.get_group(created_by="user-1", group_id=group.id)).remaining == 1
+    assert await _claim(repo, now=AFTER_RELEASE) == []
+
+    await repo.complete_job(job_id=m3, worker_id="w1", now=T0)
+    done = await repo.get_group(created_by="user-1", group_id=group.id)
+    assert done.remaining == 0
+    assert done.completed_at is not None
+
+    (callback,) = await _claim(repo, now=AFTER_RELEASE)
+    assert callback.id == group.callback_job_id
+    assert callback.task_name == "t.reduce"
+
+
+@pytest.mark.anyio
+async def test_group_counts_terminal_states_only(repo):
+    group = await _group(repo, n=2)
+    m1, m2 = group.job_ids
+
+    await repo.cancel_job(created_by="user-1", job_id=m1, now=T0)
+    await _claim(repo)
+    await repo.fail_jobs(
+        failures=[JobFailure(job_id=m2, error={"type": "RuntimeError"}, retryable=True, run_at=T0)],
+        worker_id="w1",
+        now=T0,
+    )
+
+    # cancelled counts; a retry (running -> queued) does not
+    assert (await repo.get_group(created_by="user-1", group_id=group.id)).remaining == 1
+    assert await repo.get_group(created_by="user-2", group_id=group.id) is None
+
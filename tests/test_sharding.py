@@ -0,0 +1,211 @@
+# tests/test_sharding.py
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from equeue.api.models.jobs import BulkCancelRequest, EnqueueJobRequest, JobChangesQuery, JobListQuery, JobStatus
+from equeue.api.queue_client import QueueClient
+from equeue.api.routes.jobs import AuthContext, get_auth_context, get_queue_client, router
+from equeue.db.job_repo import SqlAlchemyJobRepo
+from equeue.db.memory_repo import InMemoryJobRepo
+from equeue.db.sharding import HashRing, ShardedJobRepo, job_shard, sharded_job_id
+
+T0 = datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+QUEUES = [f"queue-{i}" for i in range(12)]
+
+
+def test_sharded_ids_round_trip():
+    for shard in (0, 1, 513, 65535):
+        job_id = sharded_job_id(shard)
+        assert job_id.version == 8
+        assert job_shard(job_id) == shard
+    assert job_shard(uuid4()) is None
+    with pytest.raises(ValueError):
+        sharded_job_id(1 << 16)
+
+
+def test_ring_spreads_queues_and_moves_few_when_a_shard_is_added():
+    keys = [f"q{i}" for i in range(10_000)]
+    four, five = HashRing(4), HashRing(5)
+
+    counts = Counter(four.shard_for(k) for k in keys)
+    assert set(counts) == {0, 1, 2, 3}
+    assert min(counts.values()) > 1_500
+
+    moved = [k for k in keys if four.shard_for(k) != five.shard_for(k)]
+    assert 1_000 < len(moved) < 3_000    # about 1/5
+    assert all(five.shard_for(k) == 4 for k in moved)
+
+
+@pytest.fixture(params=["memory", "postgres"])
+def sharded(request) -> ShardedJobRepo:
+    if request.param == "memory":
+        return ShardedJobRepo([InMemoryJobRepo(shard=i) for i in range(3)])
+    sessions = request.getfixturevalue("shard_sessions")
+    return ShardedJobRepo([SqlAlchemyJobRepo(session=s, shard=i) for i, s in enumerate(sessions)])
+
+
+def _req(queue: str, **kw) -> EnqueueJobRequest:
+    return EnqueueJobRequest(task_name="t", queue=queue, run_at=T0, **kw)
+
+
+@pytest.mark.anyio
+async def test_jobs_live_on_their_queues_shard(sharded):
+    jobs = [await sharded.insert_job(created_by="user-1", req=_req(q), now=T0) for q in QUEUES]
+
+    for job in jobs:
+        shard = sharded.shard_for_queue(job.queue)
+        assert job_shard(job.id) == shard
+        assert await sharded.shards[shard].get_job(created_by="user-1", job_id=job.id) is not None
+        assert (await sharded.get_job(created_by="user-1", job_id=job.id)).id == job.id
+    assert len({job_shard(j.id) for j in jobs}) > 1
+
+    assert await sharded.get_job(created_by="user-2", job_id=jobs[0].id) is None
+    assert await sharded.get_job(created_by="user-1", job_id=sharded_job_id(99)) is None
+
+
+class _PinnedRing:
+    def __init__(self, shards: int, shard: int):
+        self.shards = shards
+        self.shard = shard
+
+    def shard_for(self, key: str) -> int:
+        return self.shard
+
+
+@pytest.mark.anyio
+async def test_idempotency_key_is_found_on_any_shard(sharded):
+    home = QUEUES[0]
+    away = next(q for q in QUEUES if sharded.shard_for_queue(q) != sharded.shard_for_queue(home))
+    first = await sharded.insert_job(created_by="user-1", req=_req(home, idempotency_key="k"), now=T0)
+
+    # the same key on a queue placed elsewhere resolves to the job already written
+    assert (await sharded.insert_job(created_by="user-1", req=_req(away, idempotency_key="k"), now=T0)).id == first.id
+    reqs = [_req(away, idempotency_key="k"), _req(away, idempotency_key="k2"), _req(home, idempotency_key="k2")]
+    jobs = await sharded.insert_jobs(created_by="user-1", reqs=reqs, now=T0)
+    assert jobs[0].id == first.id
+    assert jobs[1].id == jobs[2].id
+
+    # a retry after the queue's placement moved (a shard was added) still finds it
+    moved = ShardedJobRepo(sharded.shards, ring=_PinnedRing(len(sharded.shards), sharded.shard_for_queue(away)))
+    assert (await moved.insert_job(created_by="user-1", req=_req(home, idempotency_key="k"), now=T0)).id == first.id
+
+    page = await sharded.list_jobs(created_by="user-1", q=JobListQuery(limit=50))
+    assert len(page.items) == 2
+
+
+@pytest.mark.anyio
+async def test_batch_enqueue_keeps_request_order_across_shards(sharded):
+    reqs = [_req(q, payload={"i": i}) for i, q in enumerate(QUEUES)]
+
+    jobs = await sharded.insert_jobs(created_by="user-1", reqs=reqs, now=T0)
+
+    assert [j.payload["i"] for j in jobs] == list(range(len(QUEUES)))
+    assert [job_shard(j.id) for j in jobs] == [sharded.shard_for_queue(q) for q in QUEUES]
+
+
+@pytest.mark.anyio
+async def test_list_merges_shards_by_created_at_and_id(sharded):
+    for i in range(30):
+        queue = QUEUES[i % len(QUEUES)]
+        await sharded.insert_job(created_by="user-1", req=_req(queue), now=T0 + timedelta(seconds=i // 2))
+
+    seen = []
+    cursor = None
+    while True:
+        page = await sharded.list_jobs(created_by="user-1", q=JobListQuery(limit=7, cursor=cursor))
+        seen.extend(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert len(seen) == 30
+    keys = [(j.created_at, j.id) for j in seen]
+    assert keys == sorted(keys, reverse=True)
+
+    page = await sharded.list_jobs(created_by="user-1", q=JobListQuery(limit=5, fields="status"))
+    assert [j.id for j in page.items] == [j.id for j in seen[:5]]
+    assert page.items[0].model_dump(exclude_unset=True).keys() == {"id", "status"}
+
+
+@pytest.mark.anyio
+async def test_change_feed_merges_shards_by_updated_at_and_id(sharded):
+    until = datetime.now(timezone.utc) + timedelta(minutes=1)    # Postgres stamps inserts with now()
+    for i in range(20):
+        await sharded.insert_job(created_by="user-1", req=_req(QUEUES[i % len(QUEUES)]), now=T0 + timedelta(seconds=i // 3))
+
+    seen = []
+    token = None
+    while True:
+        page = await sharded.list_changes(
+            created_by="user-1", q=JobChangesQuery(since=token, limit=6, fields="status"), until=until
+        )
+        seen.extend(page.items)
+        token = page.next_token
+        if not page.has_more:
+            break
+
+    assert len({j.id for j in seen}) == 20
+    assert seen[0].model_dump(exclude_unset=True).keys() == {"id", "status"}
+
+
+@pytest.mark.anyio
+async def test_cancel_routes_by_id_and_fans_out_by_filter(sharded):
+    jobs = [await sharded.insert_job(created_by="user-1", req=_req(q), now=T0) for q in QUEUES]
+
+    job, accepted = await sharded.cancel_job(created_by="user-1", job_id=jobs[0].id, now=T0)
+    assert (job.status, accepted) == (JobStatus.cancelled, False)
+
+    by_ids = BulkCancelRequest(job_ids=[j.id for j in jobs[1:4]])
+    assert (await sharded.cancel_jobs(created_by="user-1", req=by_ids, now=T0)).cancelled == 3
+
+    by_filter = BulkCancelRequest(task_name="t")
+    assert (await sharded.cancel_jobs(created_by="user-1", req=by_filter, now=T0)).cancelled == len(QUEUES) - 4
+
+
+@pytest.mark.anyio
+async def test_ids_without_a_shard_are_found_on_shard_zero():
+    legacy = InMemoryJobRepo()
+    job = await legacy.insert_job(created_by="user-1", req=_req("default"), now=T0)
+    sharded = ShardedJobRepo([legacy, InMemoryJobRepo(shard=1)])
+
+    assert (await sharded.get_job(created_by="user-1", job_id=job.id)).id == job.id
+
+
+@pytest.mark.anyio
+async def test_routes_commit_every_shard_and_return_no_token(shard_sessions, monkeypatch):
+    commits = [0] * len(shard_sessions)
+    for i, session in enumerate(shard_sessions):
+        async def commit(i=i, commit=session.commit):
+            commits[i] += 1
+            await commit()
+        monkeypatch.setattr(session, "commit", commit)
+    sharded = ShardedJobRepo([SqlAlchemyJobRepo(session=s, shard=i) for i, s in enumerate(shard_sessions)])
+
+    # async overrides: sync ones would run in a worker thread
+    async def queue_client() -> QueueClient:
+        return QueueClient(repo=sharded)
+
+    async def auth() -> AuthContext:
+        return AuthContext(principal_id="user-1")
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_queue_client] = queue_client
+    app.dependency_overrides[get_auth_context] = auth
+    jobs = [{"task_name": "t", "queue": q} for q in QUEUES]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://equeue") as client:
+        resp = await client.post("/v1/jobs:batch", json={"jobs": jobs})
+
+    assert resp.status_code == 201
+    assert "X-Consistency-Token" not in resp.headers
+    assert commits == [1] * len(shard_sessions)
+    for job in resp.json()["jobs"]:
+        assert await sharded.get_job(created_by="user-1", job_id=UUID(job["id"])) is not None
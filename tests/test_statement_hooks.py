@@ -0,0 +1,115 @@
+# tests/test_statement_hooks.py
+
+from __future__ import annotations
+
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+
+import pytest
+
+from equeue.api.models.jobs import EnqueueJobRequest, JobListQuery
+from equeue.db.hooks import SlowQueryHook, StatementEvent, TracingHook, param_shape
+from equeue.db.job_repo import SqlAlchemyJobRepo
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class RecordingHook:
+    def __init__(self):
+        self.events: list[StatementEvent] = []
+
+    def before(self, event: StatementEvent) -> str:
+        return "token"
+
+    def after(self, event: StatementEvent, token: str) -> None:
+        assert token == "token"
+        self.events.append(event)
+
+
+def test_param_shape_hides_values():
+    shape = param_shape({"payload": {"secret": "x"}, "queue": "default", "limit": 5, "cursor": None})
+    assert shape == {"payload": "dict[1]", "queue": "str[7]", "limit": "int", "cursor": "null"}
+
+
+@pytest.mark.anyio
+async def test_hooks_see_every_statement(session):
+    hook = RecordingHook()
+    repo = SqlAlchemyJobRepo(session=session, hooks=(hook,))
+
+    req = EnqueueJobRequest(task_name="puzzles.extract_mate_tag", queue="default", payload={})
+    job = await repo.insert_job(created_by="user-1", req=req, now=utcnow())
+    await repo.get_job(created_by="user-1", job_id=job.id)
+
+    assert [e.operation for e in hook.events] == ["insert_job", "get_job"]
+    assert hook.events[1].queue == "default"
+    assert hook.events[1].rowcount == 1
+    assert hook.events[1].elapsed > 0
+
+
+class BrokenBeforeHook:
+    def __init__(self):
+        self.after_calls = 0
+
+    def before(self, event: StatementEvent) -> str:
+        raise RuntimeError("tracer down")
+
+    def after(self, event: StatementEvent, token: str) -> None:
+        self.after_calls += 1
+
+
+@pytest.mark.anyio
+async def test_failing_before_hook_does_not_fail_the_statement(session):
+    recording, broken = RecordingHook(), BrokenBeforeHook()
+    repo = SqlAlchemyJobRepo(session=session, hooks=(recording, broken))
+
+    page = await repo.list_jobs(created_by="user-1", q=JobListQuery(queue="default"))
+
+    assert page.items == []
+    assert [e.operation for e in recording.events] == ["list_jobs"]  # earlier hooks still close
+    assert broken.after_calls == 0
+
+
+@pytest.mark.anyio
+async def test_tracing_hook_opens_span_per_statement(session):
+    spans: list[tuple[str, dict]] = []
+
+    @contextmanager
+    def start_span(name, attrs):
+        spans.append((name, attrs))
+        yield
+
+    repo = SqlAlchemyJobRepo(session=session, hooks=(TracingHook(start_span),))
+    await repo.list_jobs(created_by="user-1", q=JobListQuery(queue="default"))
+
+    assert spans == [("equeue.list_jobs", {"equeue.operation": "list_jobs", "equeue.queue": "default"})]
+
+
+@pytest.mark.anyio
+async def test_slow_query_hook_captures_plan(session, db_conn):
+    @asynccontextmanager
+    async def connect():
+        # same connection as the test transaction, so the migrated schema is visible
+        yield db_conn
+
+    plans: list[tuple[str, str]] = []
+    hook = SlowQueryHook(threshold=0.0, connect=connect, on_plan=lambda e, p: plans.append((e.operation, p)))
+    repo = SqlAlchemyJobRepo(session=session, hooks=(hook,))
+
+    await repo.list_jobs(created_by="user-1", q=JobListQuery(limit=5))
+    await hook.wait()
+
+    assert len(plans) == 1
+    operation, plan = plans[0]
+    assert operation == "list_jobs"
+    assert "Buffers" in plan or "actual time" in plan
+
+
+@pytest.mark.anyio
+async def test_slow_query_hook_ignores_fast_statements(session):
+    hook = SlowQueryHook(threshold=60.0)
+    repo = SqlAlchemyJobRepo(session=session, hooks=(hook,))
+
+    await repo.list_jobs(created_by="user-1", q=JobListQuery(limit=5))
+    assert hook._last_explain == {}
@@ -0,0 +1,683 @@
+# tests/test_worker.py
+
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from equeue.api.models.jobs import EnqueueJobRequest, JobStatus
+from equeue.db.job_repo import CLAIM_BUCKETS
+from equeue.db.memory_repo import InMemoryJobRepo
+from equeue.db.records import JobRecord
+from equeue.registry import task
+from equeue.worker import NonRetryableError, Worker, WorkerConfig
+from equeue.worker.adaptive import AdaptiveConfig, AdaptiveController
+from equeue.worker.limits import TokenBucket
+from equeue.worker.partitions import PartitionAssignment, PartitionConfig, owned_buckets
+from equeue.worker.retry import RetryPolicy
+
+
+T0 = datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def repo() -> InMemoryJobRepo:
+    return InMemoryJobRepo()
+
+
+def make_worker(repo: InMemoryJobRepo, **kw) -> Worker:
+    config = WorkerConfig(queue="default", worker_id="w1", **kw)
+    return Worker(repo_scope=repo.scope, config=config, clock=lambda: T0)
+
+
+async def enqueue(repo: InMemoryJobRepo, task_name: str, payload: dict | None = None, n: int = 1):
+    jobs = []
+    for _ in range(n):
+        req = EnqueueJobRequest(task_name=task_name, queue="default", payload=payload or {}, run_at=T0)
+        jobs.append(await repo.insert_job(created_by="user-1", req=req, now=T0))
+    return jobs
+
+
+async def status_of(repo: InMemoryJobRepo, job) -> JobStatus:
+    return (await repo.get_job(created_by="user-1", job_id=job.id)).status
+
+
+# ------------------------------------------------------------------
+# Execution
+# ------------------------------------------------------------------
+
+@pytest.mark.anyio
+async def test_runs_async_and_sync_tasks(repo, clean_registry):
+    seen = []
+
+    @task(name="t.async")
+    async def run_async(x: int):
+        seen.append(("async", x))
+
+    @task(name="t.sync")
+    def run_sync(x: int):
+        seen.append(("sync", x))
+
+    (a,) = await enqueue(repo, "t.async", {"x": 1})
+    (b,) = await enqueue(repo, "t.sync", {"x": 2})
+
+    worker = make_worker(repo)
+    assert await worker.claim_once() == 2
+    await worker.join()
+
+    assert sorted(seen) == [("async", 1), ("sync", 2)]
+    assert await status_of(repo, a) == JobStatus.succeeded
+    assert await status_of(repo, b) == JobStatus.succeeded
+
+
+@pytest.mark.anyio
+async def test_failure_is_recorded_and_retried(repo, clean_registry):
+    @task(name="t.flaky")
+    async def flaky():
+        raise RuntimeError("boom")
+
+    (job,) = await enqueue(repo, "t.flaky")
+    worker = make_worker(repo)
+    await worker.claim_once()
+    await worker.join()
+
+    got = await repo.get_job(created_by="user-1", job_id=job.id)
+    assert got.status == JobStatus.queued
+    assert got.last_error["type"] == "RuntimeError"
+    assert got.last_error["retryable"] is True
+    # first retry lands somewhere in [0, base_delay)
+    assert T0 <= got.run_at <= T0 + timedelta(seconds=1)
+
+
+@pytest.mark.anyio
+async def test_failures_are_rescheduled_in_batches(repo, clean_registry, monkeypatch):
+    @task(name="t.flaky")
+    async def flaky():
+        raise RuntimeError("boom")
+
+    calls = []
+    fail_jobs = repo.fail_jobs
+
+    async def counting_fail_jobs(**kw):
+        calls.append(len(kw["failures"]))
+        return await fail_jobs(**kw)
+
+    monkeypatch.setattr(repo, "fail_jobs", counting_fail_jobs)
+
+    jobs = await enqueue(repo, "t.flaky", n=5)
+    worker = make_worker(repo, retry_batch_size=2, retry_flush_interval=60)
+    await worker.claim_once()
+    await worker.join()
+
+    # two full batches flushed eagerly, the remainder on join()
+    assert calls == [2, 2, 1]
+    assert all([await status_of(repo, j) == JobStatus.queued for j in jobs])
+
+
+@pytest.mark.anyio
+async def test_pending_failures_flush_after_interval(repo, clean_registry):
+    @task(name="t.flaky")
+    async def flaky():
+        raise RuntimeError("boom")
+
+    (job,) = await enqueue(repo, "t.flaky")
+    worker = make_worker(repo, retry_flush_interval=0.01)
+    await worker.claim_once()
+    await worker._idle.wait()
+    assert await status_of(repo, job) == JobStatus.running
+
+    await asyncio.sleep(0.05)
+    assert await status_of(repo, job) == JobStatus.queued
+
+
+@pytest.mark.anyio
+async def test_task_retry_options_override_worker_policy(repo, clean_registry):
+    @task(name="t.slow_retry", retry_base_delay=600, retry_max_delay=600)
+    async def slow_retry():
+        raise RuntimeError("boom")
+
+    (job,) = await enqueue(repo, "t.slow_retry")
+    worker = make_worker(repo, retry_policy=RetryPolicy(base_delay=0.001, max_delay=0.001))
+    await worker.claim_once()
+    await worker.join()
+
+    got = await repo.get_job(created_by="user-1", job_id=job.id)
+    assert T0 <= got.run_at <= T0 + timedelta(seconds=600)
+
+
+@pytest.mark.anyio
+async def test_task_retry_max_delay_below_worker_base_delay_is_clamped(repo, clean_registry):
+    @task(name="t.short_cap", retry_max_delay=0.5)
+    async def short_cap():
+        raise RuntimeError("boom")
+
+    (job,) = await enqueue(repo, "t.short_cap")
+    worker = make_worker(repo, retry_policy=RetryPolicy(base_delay=1.0), retry_flush_interval=0.01)
+    await worker.claim_once()
+    await worker.join()
+
+    got = await repo.get_job(created_by="user-1", job_id=job.id)
+    assert got.status == JobStatus.queued
+    assert T0 <= got.run_at <= T0 + timedelta(seconds=0.5)
+
+
+def test_retry_policy_full_jitter_bounds():
+    policy = RetryPolicy(base_delay=2.0, max_delay=30.0)
+
+    assert policy.ceiling(1) == 2.0
+    assert policy.ceiling(3) == 8.0
+    assert policy.ceiling(10) == 30.0
+    assert policy.ceiling(10_000) == 30.0  # no OverflowError
+
+    assert policy.delay(3, rand=lambda: 0.0) == 0.0
+    assert policy.delay(3, rand=lambda: 0.5) == 4.0
+    assert policy.next_run_at(1, T0, rand=lambda: 0.5) == T0 + timedelta(seconds=1)
+
+    with pytest.raises(ValueError):
+        RetryPolicy(base_delay=10, max_delay=1)
+
+
+@pytest.mark.anyio
+async def test_non_retryable_and_unknown_tasks_go_dead(repo, clean_registry):
+    @task(name="t.bad_input")
+    async def bad_input():
+        raise NonRetryableError("invalid puzzle id")
+
+    (bad,) = await enqueue(repo, "t.bad_input")
+    (unknown,) = await enqueue(repo, "t.not_registered")
+
+    worker = make_worker(repo)
+    await worker.claim_once()
+    await worker.join()
+
+    assert await status_of(repo, bad) == JobStatus.dead
+    assert await status_of(repo, unknown) == JobStatus.dead
+
+
+@pytest.mark.anyio
+async def test_timeout_option_bounds_an_attempt(repo, clean_registry):
+    @task(name="t.hangs", timeout=0.01)
+    async def hangs():
+        await asyncio.sleep(10)
+
+    (job,) = await enqueue(repo, "t.hangs")
+    worker = make_worker(repo)
+    await worker.claim_once()
+    await worker.join()
+
+    got = await repo.get_job(created_by="user-1", job_id=job.id)
+    assert got.last_error["type"] == "TimeoutError"
+
+
+# ------------------------------------------------------------------
+# Limits
+# ------------------------------------------------------------------
+
+@pytest.mark.anyio
+async def test_max_concurrency_leaves_excess_jobs_unclaimed(repo, clean_registry):
+    release = asyncio.Event()
+
+    @task(name="t.limited", max_concurrency=1)
+    async def limited():
+        await release.wait()
+
+    @task(name="t.free")
+    async def free():
+        await release.wait()
+
+    limited_jobs = await enqueue(repo, "t.limited", n=3)
+    free_jobs = await enqueue(repo, "t.free", n=2)
+
+    worker = make_worker(repo, concurrency=10, prefetch=10)
+    assert await worker.claim_once() == 3
+    assert await worker.claim_once() == 0
+
+    statuses = [await status_of(repo, j) for j in limited_jobs]
+    assert statuses.count(JobStatus.running) == 1
+    assert statuses.count(JobStatus.queued) == 2
+    assert all([await status_of(repo, j) == JobStatus.running for j in free_jobs])
+
+    release.set()
+    await worker.join()
+    assert await worker.claim_once() == 1
+
+
+@pytest.mark.anyio
+async def test_global_concurrency_counts_other_workers(repo, clean_registry):
+    @task(name="t.fleet", global_concurrency=1)
+    async def fleet():
+        pass
+
+    await enqueue(repo, "t.fleet", n=2)
+    # another worker already runs one
+    await repo.claim_jobs(queue="default", worker_id="other", limit=1, lease_seconds=60, now=T0)
+
+    worker = make_worker(repo)
+    assert await worker.claim_once() == 0
+
+
+@pytest.mark.anyio
+async def test_rate_limit_caps_claims_per_second(repo, clean_registry):
+    @task(name="t.rated", rate_limit=2)
+    async def rated():
+        pass
+
+    await enqueue(repo, "t.rated", n=5)
+    worker = make_worker(repo)
+
+    assert await worker.claim_once() == 2
+    await worker.join()
+    assert await worker.claim_once() == 0
+
+
+def test_token_bucket_refills():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, clock=lambda: now[0])
+
+    assert bucket.available() == 2
+    bucket.take(2)
+    assert bucket.available() == 0
+    now[0] += 0.5
+    assert bucket.available() == 1
+    now[0] += 10
+    assert bucket.available() == 2
+
+
+@pytest.mark.anyio
+async def test_run_until_stopped(repo, clean_registry):
+    done = asyncio.Event()
+
+    @task(name="t.signal")
+    async def signal():
+        done.set()
+
+    await enqueue(repo, "t.signal")
+    worker = make_worker(repo, poll_interval=0.01)
+
+    runner = asyncio.create_task(worker.run())
+    await asyncio.wait_for(done.wait(), 1)
+    await worker.join()
+    worker.stop()
+    await asyncio.wait_for(runner, 1)
+
+
+# ------------------------------------------------------------------
+# Graceful drain
+# ------------------------------------------------------------------
+
+@pytest.mark.anyio
+async def test_drain_releases_prefetched_jobs_and_finishes_inflight(repo, clean_registry):
+    release = asyncio.Event()
+
+    @task(name="t.blocked")
+    async def blocked():
+        await release.wait()
+
+    jobs = await enqueue(repo, "t.blocked", n=3)
+    worker = make_worker(repo, concurrency=1, prefetch=10)
+    assert await worker.claim_once() == 3
+    (running,) = [j for j in jobs if j.id in worker._inflight]
+    prefetched = [j for j in jobs if j is not running]
+
+    drain = asyncio.create_task(worker.drain(timeout=5))
+    await asyncio.sleep(0.01)
+
+    for job in prefetched:
+        got = await repo.get_job(created_by="user-1", job_id=job.id)
+        assert got.status == JobStatus.queued
+        assert got.attempts == 0  # never started: the claim's attempt is refunded
+    assert await status_of(repo, running) == JobStatus.running
+
+    release.set()
+    await asyncio.wait_for(drain, 1)
+    assert await status_of(repo, running) == JobStatus.succeeded
+
+
+@pytest.mark.anyio
+async def test_drain_cancels_inflight_jobs_at_the_deadline(repo, clean_registry):
+    @task(name="t.hangs")
+    async def hangs():
+        await asyncio.sleep(10)
+
+    (job,) = await enqueue(repo, "t.hangs")
+    worker = make_worker(repo)
+    await worker.claim_once()
+    await asyncio.sleep(0)
+
+    await asyncio.wait_for(worker.drain(timeout=0.01), 1)
+
+    got = await repo.get_job(created_by="user-1", job_id=job.id)
+    assert got.status == JobStatus.queued
+    assert got.attempts == 1
+    assert got.last_error["type"] == "WorkerShutdown"
+
+
+@pytest.mark.anyio
+async def test_signal_drains_a_running_worker(repo, clean_registry):
+    @task(name="t.noop")
+    async def noop():
+        pass
+
+    worker = make_worker(repo, poll_interval=10)
+    worker.install_signal_handlers(signals=(signal.SIGUSR1,))
+    try:
+        runner = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.01)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        await asyncio.wait_for(runner, 1)  # claim loop woke from its poll sleep
+    finally:
+        asyncio.get_running_loop().remove_signal_handler(signal.SIGUSR1)
+
+
+# ------------------------------------------------------------------
+# Cancellation
+# ------------------------------------------------------------------
+
+async def wait_for_status(repo, job, status: JobStatus, timeout: float = 1.0) -> None:
+    async def poll():
+        while await status_of(repo, job) != status:
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(poll(), timeout)
+
+
+@pytest.mark.anyio
+async def test_cancel_notification_cancels_the_running_task(repo, clean_registry):
+    started, cleaned_up = asyncio.Event(), asyncio.Event()
+
+    @task(name="t.long")
+    async def long():
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        finally:
+            cleaned_up.set()
+
+    (job,) = await enqueue(repo, "t.long")
+    worker = Worker(
+        repo_scope=repo.scope,
+        config=WorkerConfig(queue="default", worker_id="w1", poll_interval=0.01, cancel_poll_interval=60),
+        clock=lambda: T0,
+        cancel_listener=repo.listen_cancellations,
+    )
+    runner = asyncio.create_task(worker.run())
+    try:
+        await asyncio.wait_for(started.wait(), 1)
+        _, accepted = await repo.cancel_job(created_by="user-1", job_id=job.id, now=T0)
+        assert accepted
+
+        await wait_for_status(repo, job, JobStatus.cancelled)
+        assert cleaned_up.is_set()
+        assert not worker._inflight
+    finally:
+        worker.stop()
+        await asyncio.wait_for(runner, 1)
+
+
+@pytest.mark.anyio
+async def test_cancel_poll_fallback_without_listener(repo, clean_registry):
+    @task(name="t.long")
+    async def long():
+        await asyncio.sleep(60)
+
+    (job,) = await enqueue(repo, "t.long")
+    worker = make_worker(repo, poll_interval=0.01, cancel_poll_interval=0.01)
+    runner = asyncio.create_task(worker.run())
+    try:
+        await wait_for_status(repo, job, JobStatus.running)
+        await repo.cancel_job(created_by="user-1", job_id=job.id, now=T0)
+        await wait_for_status(repo, job, JobStatus.cancelled)
+    finally:
+        worker.stop()
+        await asyncio.wait_for(runner, 1)
+
+
+@pytest.mark.anyio
+async def test_cancelled_prefetched_job_never_runs(repo, clean_registry):
+    release = asyncio.Event()
+    ran = []
+
+    @task(name="t.blocked")
+    async def blocked(i: int):
+        ran.append(i)
+        await release.wait()
+
+    jobs = [(await enqueue(repo, "t.blocked", {"i": i}))[0] for i in range(2)]
+    worker = make_worker(repo, concurrency=1)
+    await worker.claim_once()
+    (prefetched,) = [j for j in jobs if j.id not in worker._inflight]
+
+    assert worker.request_cancel(prefetched.id)
+    release.set()
+    await worker.join()
+
+    assert ran == [j.payload["i"] for j in jobs if j is not prefetched]
+    assert await status_of(repo, prefetched) == JobStatus.cancelled
+
+
+def _block_complete_job(repo, monkeypatch) -> tuple[asyncio.Event, asyncio.Event]:
+    entered, proceed = asyncio.Event(), asyncio.Event()
+    complete_job = repo.complete_job
+
+    async def blocked_complete_job(**kw):
+        entered.set()
+        await proceed.wait()
+        return await complete_job(**kw)
+
+    monkeypatch.setattr(repo, "complete_job", blocked_complete_job)
+    return entered, proceed
+
+
+@pytest.mark.anyio
+async def test_cancel_after_the_task_returned_does_not_abort_the_ack(repo, clean_registry, monkeypatch):
+    @task(name="t.quick")
+    async def quick():
+        pass
+
+    (job,) = await enqueue(repo, "t.quick")
+    entered, proceed = _block_complete_job(repo, monkeypatch)
+    worker = make_worker(repo)
+    await worker.claim_once()
+    await entered.wait()
+
+    assert worker.request_cancel(job.id)  # still held, but too late to stop
+    proceed.set()
+    await worker.join()
+
+    assert await status_of(repo, job) == JobStatus.succeeded
+
+
+@pytest.mark.anyio
+async def test_drain_deadline_lets_a_started_ack_finish(repo, clean_registry, monkeypatch):
+    @task(name="t.quick")
+    async def quick():
+        pass
+
+    (job,) = await enqueue(repo, "t.quick")
+    entered, proceed = _block_complete_job(repo, monkeypatch)
+    worker = make_worker(repo)
+    await worker.claim_once()
+    await entered.wait()
+
+    drain = asyncio.create_task(worker.drain(timeout=0.01))
+    await asyncio.sleep(0.05)
+    proceed.set()
+    await asyncio.wait_for(drain, 1)
+
+    assert await status_of(repo, job) == JobStatus.succeeded
+
+
+# ------------------------------------------------------------------
+# Adaptive limits (AIMD)
+# ------------------------------------------------------------------
+
+def _controller(**kw) -> AdaptiveController:
+    cfg = AdaptiveConfig(min_concurrency=2, max_concurrency=12, min_batch=1, max_batch=11, smoothing=1.0, **kw)
+    return AdaptiveController(cfg, concurrency=10, batch=10)
+
+
+def test_aimd_grows_additively_while_work_is_waiting():
+    c = _controller()
+    c.observe_claim(0.001, requested=10, claimed=10)
+    assert c.adjust() == (11, 11)
+    c.observe_claim(0.001, requested=11, claimed=3)  # partial claim: batch holds
+    assert c.adjust() == (12, 11)
+    c.observe_claim(0.001, requested=11, claimed=11)
+    assert c.adjust() == (12, 11)  # capped
+
+
+def test_aimd_holds_when_the_queue_is_drained():
+    c = _controller()
+    for _ in range(3):
+        c.observe_claim(0.001, requested=10, claimed=0)
+    assert c.adjust() == (10, 10)
+    assert c.adjust() == (10, 10)  # no claims at all: no evidence either way
+
+
+@pytest.mark.parametrize(
+    "signal",
+    [
+        lambda c: c.observe_claim(0.5, requested=10, claimed=10),   # slow claims
+        lambda c: c.observe_loop_lag(0.2),                           # loop saturated
+    ],
+)
+def test_aimd_backs_off_multiplicatively_on_overload(signal):
+    c = _controller()
+    signal(c)
+    assert c.adjust() == (5, 5)
+    signal(c)
+    assert c.adjust() == (2, 2)
+    signal(c)
+    assert c.adjust() == (2, 1)  # floors
+
+
+def test_aimd_backs_off_when_tasks_slow_down():
+    c = _controller()
+    c.observe_task(0.1)
+    c.observe_claim(0.001, requested=10, claimed=10)
+    assert c.adjust() == (11, 11)  # baseline 0.1s
+
+    c.observe_task(0.5)
+    assert c.adjust() == (5, 5)
+
+    # one backoff per congestion signal: the next window starts from fresh samples
+    c.observe_task(0.1)
+    c.observe_claim(0.001, requested=5, claimed=5)
+    assert c.adjust() == (6, 6)
+
+
+@pytest.mark.anyio
+async def test_worker_applies_adaptive_limits(repo, clean_registry):
+    @task(name="t.noop")
+    async def noop():
+        pass
+
+    await enqueue(repo, "t.noop", n=5)
+    worker = make_worker(repo, concurrency=2, claim_batch_size=2, adaptive=AdaptiveConfig(smoothing=1.0))
+    assert await worker.claim_once() == 2
+    await worker.join()
+
+    worker._apply_limits(*worker.adaptive.adjust())
+    assert (worker.concurrency, worker.claim_batch_size) == (3, 3)
+    assert await worker.claim_once() == 3
+
+
+
+# ------------------------------------------------------------------
+# Claim partitions
+# ------------------------------------------------------------------
+
+def test_owned_buckets_split_the_queue_and_move_little_on_join():
+    members = [f"w{i}" for i in range(4)]
+    owned = {m: owned_buckets(members, m) for m in members}
+    assert sorted(b for bs in owned.values() for b in bs) == list(range(CLAIM_BUCKETS))
+    assert all(owned.values())
+
+    joined = members + ["w4"]
+    after = {m: owned_buckets(joined, m) for m in joined}
+    for m in members:
+        assert set(after[m]) <= set(owned[m])   # only the newcomer gains buckets
+    assert len(after["w4"]) == CLAIM_BUCKETS - sum(len(after[m]) for m in members)
+
+
+def test_partition_assignment_rotates_owned_buckets():
+    a = PartitionAssignment("w1")
+    assert a.rotation(4) == []
+    a.update(["w1"])
+    assert a.rotation(4) == [0, 1, 2, 3]
+    assert a.rotation(4) == [1, 2, 3, 4]
+
+
+def test_partition_config_validates():
+    with pytest.raises(ValueError):
+        PartitionConfig(heartbeat_interval=5, member_ttl=5)
+
+
+@pytest.mark.anyio
+async def test_partitioned_worker_still_claims_unowned_buckets(repo, clean_registry):
+    @task(name="t.noop")
+    async def noop():
+        pass
+
+    await enqueue(repo, "t.noop", n=20)
+    worker = make_worker(repo, claim_batch_size=20, prefetch=20, partitions=PartitionConfig())
+    worker.partitions.update(["w1", "w2", "w3"])    # owns about a third of the buckets
+
+    assert await worker.claim_once() == 20
+    await worker.join()
+
+
+@pytest.mark.anyio
+async def test_partitioned_workers_join_and_leave(repo, clean_registry):
+    done = []
+
+    @task(name="t.record")
+    async def record(i: int):
+        done.append(i)
+
+    for i in range(30):
+        await enqueue(repo, "t.record", {"i": i})
+    config = dict(queue="default", poll_interval=0.01, partitions=PartitionConfig(heartbeat_interval=0.01, member_ttl=1))
+    workers = [
+        Worker(repo_scope=repo.scope, config=WorkerConfig(worker_id=w, **config), clock=lambda: T0)
+        for w in ("w1", "w2")
+    ]
+
+    runners = [asyncio.create_task(w.run()) for w in workers]
+    for _ in range(100):
+        if len(done) == 30 and all(w.partitions.members == ["w1", "w2"] for w in workers):
+            break
+        await asyncio.sleep(0.01)
+    for w in workers:
+        await w.join()
+        w.stop()
+    await asyncio.wait_for(asyncio.gather(*runners), 1)
+
+    assert sorted(done) == list(range(30))
+    assert sorted(workers[0].partitions.buckets + workers[1].partitions.buckets) == list(range(CLAIM_BUCKETS))
+    assert await repo.heartbeat_member(queue="default", worker_id="w3", now=T0, ttl=1) == ["w3"]
+
+
+# ------------------------------------------------------------------
+# Job records
+# ------------------------------------------------------------------
+
+def test_job_record_decodes_payload_on_first_read():
+    record = JobRecord(
+        id=uuid4(), task_name="t", status=JobStatus.running, queue="default", priority=0, run_at=T0,
+        attempts=1, max_attempts=25, created_by="user-1", created_at=T0, updated_at=T0,
+        payload_json='{"n": 1}',
+    )
+    assert not hasattr(record, "__dict__")
+    assert record._payload is None
+    assert record.payload is record.payload == {"n": 1}
+    assert record.to_public().payload == {"n": 1}